@@ -0,0 +1,169 @@
+"""Patient context assembly for Chat V1 turns."""
+
+import asyncio
+from collections.abc import Awaitable
+from typing import Any, Optional
+
+from app.models import Patient, RiskLevel
+from app.shared.config import get_settings
+from app.shared.database import (
+    AppointmentRepositoryProtocol,
+    FollowingRepositoryProtocol,
+    FollowingSummary,
+    PatientRepositoryProtocol,
+    PlanRepositoryProtocol,
+    get_appointment_repository,
+    get_following_repository,
+    get_patient_repository,
+    get_plan_repository,
+)
+
+from .core.schemas import PatientContextData
+
+RECENT_SYMPTOMS_LIMIT = 5
+UPCOMING_APPOINTMENTS_LIMIT = 5
+
+
+class PatientContextBuilder:
+    """
+    Builds PatientContextData for a turn under a single deadline.
+
+    The patient is resolved first (usually a patient-cache hit), then active
+    plans, upcoming appointments and recent symptom followings are fetched
+    concurrently. Sources that fail or miss the deadline are cancelled and
+    fall back to the previous turn's context (read from the checkpoint by the
+    caller), so a slow source degrades the context instead of the reply.
+    """
+
+    def __init__(
+        self,
+        patient_repo: PatientRepositoryProtocol | None = None,
+        plan_repo: PlanRepositoryProtocol | None = None,
+        appointment_repo: AppointmentRepositoryProtocol | None = None,
+        following_repo: FollowingRepositoryProtocol | None = None,
+        timeout: float | None = None,
+    ):
+        self.patient_repo = patient_repo or get_patient_repository()
+        self.plan_repo = plan_repo or get_plan_repository()
+        self.appointment_repo = appointment_repo or get_appointment_repository()
+        self.following_repo = following_repo or get_following_repository()
+        self.timeout = timeout if timeout is not None else get_settings().CHAT_CONTEXT_TIMEOUT
+
+    async def build(
+        self,
+        phone: str,
+        previous: Awaitable[Optional[PatientContextData]] | None = None,
+    ) -> PatientContextData:
+        """
+        Build the context for a phone number.
+
+        Args:
+            phone: Patient phone number
+            previous: Optional awaitable for the previous turn's context (e.g. the
+                checkpoint load); it runs concurrently with the queries and fills
+                in any source that misses the deadline
+
+        Returns:
+            PatientContextData (fields empty when a source is unavailable)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        previous_task = asyncio.ensure_future(previous) if previous is not None else None
+
+        results = await _gather_until({"identity": self.patient_repo.get_identity(phone)}, deadline)
+        identity = results.get("identity")
+        if identity:
+            results |= await _gather_until(
+                {
+                    "active_medications": self._load_medications(identity.id),
+                    "upcoming_appointments": self.appointment_repo.get_upcoming(
+                        identity.id, limit=UPCOMING_APPOINTMENTS_LIMIT
+                    ),
+                    "recent_symptoms": self._load_symptoms(identity.id),
+                },
+                deadline,
+            )
+
+        fallback = None
+        if previous_task is not None:
+            fallback = (await _gather_until({"previous": previous_task}, deadline)).get("previous")
+
+        def pick(source: str) -> Any:
+            if source in results:
+                return results[source]
+            if "identity" in results and not identity:
+                return []  # Unknown phone: nothing to fall back to
+            return getattr(fallback, source) if fallback else []
+
+        if "identity" in results:
+            patient = Patient(phone_number=phone, name=identity.name) if identity else None
+        else:
+            patient = fallback.patient if fallback else None
+
+        return PatientContextData(
+            phone_number=phone,
+            patient=patient,
+            active_medications=pick("active_medications"),
+            upcoming_appointments=pick("upcoming_appointments"),
+            recent_symptoms=pick("recent_symptoms"),
+            conversation_summary=fallback.conversation_summary if fallback else "",
+        )
+
+    async def _load_medications(self, patient_id: str) -> list[dict]:
+        plans = await self.plan_repo.get_active_by_patient(patient_id)
+        medications = []
+        for plan in plans:
+            for medication in (plan.get("plan") or {}).get("medications", []):
+                # Plans store either plain names or structured medication dicts
+                if isinstance(medication, str):
+                    medication = {"name": medication}
+                medications.append(medication)
+        return medications
+
+    async def _load_symptoms(self, patient_id: str) -> list[dict]:
+        followings = await self.following_repo.get_summaries(
+            patient_id, limit=RECENT_SYMPTOMS_LIMIT, following_type="symptoms"
+        )
+        # Agents read the history oldest → newest
+        return [_symptom_entry(following) for following in reversed(followings)]
+
+
+async def _gather_until(sources: dict[str, Awaitable], deadline: float) -> dict[str, Any]:
+    """
+    Run awaitables concurrently until `deadline` (loop time).
+
+    Returns the results of the sources that finished in time without raising;
+    the rest are cancelled and left out.
+    """
+    tasks = {name: asyncio.ensure_future(source) for name, source in sources.items()}
+    timeout = max(deadline - asyncio.get_running_loop().time(), 0)
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    for name, task in tasks.items():
+        if task not in done:
+            print(f"⚠️ Patient context: {name} missed the deadline")
+        elif task.exception() is not None:
+            print(f"⚠️ Patient context: {name} failed: {task.exception()}")
+        else:
+            results[name] = task.result()
+    return results
+
+
+def _symptom_entry(following: FollowingSummary) -> dict:
+    score = following.severity_score or 0
+    if following.is_urgent or score >= 8:
+        risk_level = RiskLevel.HIGH
+    elif score >= 4:
+        risk_level = RiskLevel.MEDIUM
+    elif score >= 1:
+        risk_level = RiskLevel.LOW
+    else:
+        risk_level = RiskLevel.NONE
+    return {
+        "timestamp": following.contacted_at,
+        "summary": following.summary,
+        "risk_level": risk_level.value,
+    }
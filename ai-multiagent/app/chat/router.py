@@ -2,6 +2,8 @@
 
 from fastapi import APIRouter, HTTPException
 
+from app.shared.concurrency import ThreadBusyError, get_idempotency_cache
+
 from .dependencies import ChatServiceDep
 from .schemas import (
     CheckinRequest,
@@ -22,7 +24,8 @@ async def process_message(
 
     Identifiers:
     - thread_id: Conversation session ID (for checkpointing/memory)
-    - message_id: Message ID for tracing (auto-generated if not provided)
+    - message_id: Message ID for tracing (auto-generated if not provided); a retry
+      with the same message_id gets the original response instead of a new turn
     - phone: Patient identifier (for context/personalization)
 
     Args:
@@ -32,7 +35,8 @@ async def process_message(
     Returns:
         MessageResponse with the reply and metadata
     """
-    try:
+
+    async def respond() -> MessageResponse:
         response = await service.process_message(
             request.thread_id,
             request.message_id,
@@ -51,7 +55,15 @@ async def process_message(
             appointments=response.appointments,
             follow_up_questions=response.follow_up_questions,
             agent_used=response.agent_used,
+            coalesced_into=response.coalesced_into,
+        )
+
+    try:
+        return await get_idempotency_cache().run(
+            f"v1:{request.message_id}", respond, MessageResponse
         )
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -55,5 +55,10 @@ class MessageResponse(BaseModel):
     appointments: list[dict] = Field(default_factory=list)
     follow_up_questions: list[str] = Field(default_factory=list)
     agent_used: Optional[str] = None
+    coalesced_into: Optional[str] = Field(
+        default=None,
+        description="Set when this message was answered together with a later one: "
+        "that message's ID, which carries the reply (reply_text is empty here)",
+    )
 
 
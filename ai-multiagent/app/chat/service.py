@@ -1,14 +1,16 @@
 """Business logic for the chat service."""
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.graph.state import CompiledStateGraph
 
 from app.models import AgentResponse, RiskLevel
-from app.shared.database import PatientRepository
+from app.shared.checkpoint import BoundedCheckpointer
+from app.shared.concurrency import QueuedMessage, get_thread_locks, get_turn_coalescer
 
 from .agents import generate_checkin_prompt
+from .context import PatientContextBuilder
 from .core.schemas import InputState, PatientContextData
 from .core.types import MessageCategory
 
@@ -24,7 +26,7 @@ class ChatService:
         graph: CompiledStateGraph,
     ):
         self.graph = graph
-        self.patient_repo = PatientRepository()
+        self.context_builder = PatientContextBuilder()
 
     async def process_message(
         self, thread_id: str, message_id: str, phone: str, message: str
@@ -34,44 +36,25 @@ class ChatService:
 
         Args:
             thread_id: Conversation session ID (for checkpointing)
-            message_id: Message ID for tracing (assigned to HumanMessage)
+            message_id: Message ID for tracing (assigned to HumanMessage; messages
+                merged into a later message's turn get an empty reply)
             phone: Patient phone number (for context/personalization)
             message: Message content
 
         Returns:
             AgentResponse with the reply and metadata
         """
-        # Build patient context using phone number
-        patient_context = self._build_patient_context(phone)
-
-        # Create HumanMessage with assigned message_id for tracing
-        human_message = HumanMessage(content=message)
-        human_message.id = message_id
-
-        # Create input state
-        input_state = InputState(
-            messages=[human_message],
-            thread_id=thread_id,
-            phone_number=phone,
-            category=MessageCategory.GENERAL,
-        )
-
-        # Run the graph with thread_id for conversation memory
-        # thread_id is the session identifier, phone_number is for patient context
-        result = await self.graph.ainvoke(
-            {
-                "messages": input_state.messages,
-                "thread_id": thread_id,
-                "phone_number": phone,
-                "category": MessageCategory.GENERAL,
-                "patient_context": patient_context,
-            },
-            config={
-                "configurable": {"thread_id": thread_id},
-                "run_name": "Pausiva Chat",
-                "tags": ["whatsapp", "patient", f"phone:{phone}"],
-            },
+        # Messages of a thread are queued; a quick burst is answered in one turn
+        queued = QueuedMessage(message_id=message_id, content=message)
+        result, batch = await get_turn_coalescer("v1").submit(
+            thread_id,
+            queued,
+            lambda messages: self._run_turn(thread_id, messages, phone),
         )
+        latest_id = batch[-1].message_id
+        if latest_id != message_id:
+            # The reply goes out once, on the burst's latest message
+            return AgentResponse(reply_text="", actions=[], coalesced_into=latest_id)
 
         # Extract the response
         reply_text = ""
@@ -92,6 +75,53 @@ class ChatService:
             agent_used=result.get("agent_used"),
         )
 
+    async def _run_turn(self, thread_id: str, messages: list[QueuedMessage], phone: str) -> dict:
+        """Run the graph once for a batch of messages and return the final state."""
+        config = {
+            "configurable": {"thread_id": thread_id},
+            "run_name": "Pausiva Chat",
+            "tags": ["whatsapp", "patient", f"phone:{phone}"],
+        }
+
+        # One turn per conversation at a time, across all workers
+        async with get_thread_locks().hold(thread_id):
+            # Build patient context using phone number; the thread's checkpoint is
+            # read concurrently and backs any source that misses the deadline
+            patient_context = await self.context_builder.build(
+                phone, previous=self._load_previous_context(config)
+            )
+
+            # One HumanMessage for the whole burst, with the latest message_id for tracing
+            human_message = HumanMessage(content="\n".join(queued.content for queued in messages))
+            human_message.id = messages[-1].message_id
+
+            # Create input state
+            input_state = InputState(
+                messages=[human_message],
+                thread_id=thread_id,
+                phone_number=phone,
+                category=MessageCategory.GENERAL,
+            )
+
+            # Run the graph with thread_id for conversation memory
+            # thread_id is the session identifier, phone_number is for patient context
+            result = await self.graph.ainvoke(
+                {
+                    "messages": input_state.messages,
+                    "thread_id": thread_id,
+                    "phone_number": phone,
+                    "category": MessageCategory.GENERAL,
+                    "patient_context": patient_context,
+                },
+                config=config,
+            )
+
+            # Drop this turn's intermediate checkpoints in the background
+            if isinstance(self.graph.checkpointer, BoundedCheckpointer):
+                self.graph.checkpointer.turn_completed(thread_id)
+
+        return result
+
     async def send_checkin(
         self, thread_id: str, message_id: str, phone: str
     ) -> AgentResponse:
@@ -116,15 +146,12 @@ class ChatService:
             agent_used="checkin",
         )
 
-    def _build_patient_context(self, phone: str) -> PatientContextData:
-        """Build patient context data for the graph."""
-        patient_data = self.patient_repo.get_by_phone(phone)
-
-        return PatientContextData(
-            phone_number=phone,
-            patient=None,  # TODO: Convert to Patient model
-            active_medications=[],  # TODO: Load from storage
-            upcoming_appointments=[],  # TODO: Load from storage
-            recent_symptoms=[],  # TODO: Load from storage
-            conversation_summary="",
-        )
+    async def _load_previous_context(self, config: dict) -> Optional[PatientContextData]:
+        """Get the patient context stored in the thread's last checkpoint."""
+        if self.graph.checkpointer is None:
+            return None
+        snapshot = await self.graph.aget_state(config)
+        previous = snapshot.values.get("patient_context")
+        if isinstance(previous, dict):
+            return PatientContextData.model_validate(previous)
+        return previous
@@ -1,15 +1,16 @@
 """Single LangGraph agent for Chat V2."""
 
+import time
 from typing import Annotated, Literal, TypedDict
 
-from langchain_core.messages import AIMessage, BaseMessage, SystemMessage  # noqa: F401
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage  # noqa: F401
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition  # noqa: F401
 
-from app.shared.llm import get_chat_model_with_fallbacks
+from app.shared.llm import get_model_registry, get_usage_tracker
 
-from .prompts import get_system_prompt
+from .prompts import SUMMARY_PROMPT, SYSTEM_PROMPT, get_context_prompt
 from .tools import ALL_TOOLS
 
 
@@ -25,6 +26,9 @@ class AgentState(TypedDict, total=False):
     - user_id: Optional user ID
     - conversation_id: Conversation UUID for CMS mapping (from thread_id)
 
+    Kept across turns:
+    - summary: Rolling summary of turns folded out of `messages` (see history.py)
+
     Output fields (filled by agent, not required as input):
     - risk_level, risk_score, symptom_summary, etc.
     """
@@ -37,6 +41,7 @@ class AgentState(TypedDict, total=False):
     patient_data: dict | None
     user_id: str | None
     conversation_id: str | None  # For CMS mapping - injected into tools
+    summary: str  # Older turns, folded by the history manager
     # Output fields (optional, filled by agent)
     risk_level: str
     risk_score: int
@@ -49,41 +54,59 @@ class AgentState(TypedDict, total=False):
 
 def create_agent_node():
     """Create the agent node function."""
+    # Model with fallbacks (gpt-5.1 -> gemini-2.0-flash) and all tools bound with
+    # parallel execution and strict schema, built once when the graph is compiled
+    model_with_tools = get_model_registry().with_tools(
+        ALL_TOOLS,
+        temperature=0.7,
+        strict=True,
+        parallel_tool_calls=True,
+    )
+    # Same for every request: with the tools it is the provider-cached prefix
+    system_message = SystemMessage(content=SYSTEM_PROMPT)
 
     async def agent_node(state: AgentState) -> dict:
         """
         Main agent node that processes messages and decides on tool calls.
         """
-        # Get the model with fallbacks (gpt-5.1 -> gemini-2.0-flash)
-        model = get_chat_model_with_fallbacks(temperature=0.7)
-
-        # Bind all tools to the model with parallel execution and strict schema
-        model_with_tools = model.bind_tools(
-            ALL_TOOLS,
-            strict=True,
-            parallel_tool_calls=True,
-        )
-
-        # Build system prompt with context
-        system_prompt = get_system_prompt(
-            phone_number=state.get("phone_number", ""),
-            is_new_patient=state.get("is_new_patient", False),
-            is_new_conversation=state.get("is_new_conversation", False),
-            patient_data=state.get("patient_data"),
-            conversation_id=state.get("conversation_id"),
-        )
-
-        # Prepare messages with system prompt
-        messages = [SystemMessage(content=system_prompt)] + list(state["messages"])
+        messages = build_prompt(system_message, state)
 
         # Invoke the model
+        started = time.perf_counter()
         response = await model_with_tools.ainvoke(messages)
+        get_usage_tracker().record("chat_v2", response, time.perf_counter() - started)
 
         return {"messages": [response]}
 
     return agent_node
 
 
+def build_prompt(system_message: SystemMessage, state: AgentState) -> list[BaseMessage]:
+    """
+    Messages for one model call.
+
+    Static prompt, summary of older turns, recent history, then the per-turn
+    context. The context goes last so it doesn't break the cached prefix, and
+    as a tagged user message: most providers reject a system message after
+    the conversation has started (Gemini would silently move it up into the
+    system instruction, changing the prefix every turn).
+    """
+    context_message = HumanMessage(
+        content=get_context_prompt(
+            phone_number=state.get("phone_number", ""),
+            is_new_patient=state.get("is_new_patient", False),
+            is_new_conversation=state.get("is_new_conversation", False),
+            patient_data=state.get("patient_data"),
+            conversation_id=state.get("conversation_id"),
+        )
+    )
+    summary = state.get("summary")
+    summary_messages = (
+        [SystemMessage(content=SUMMARY_PROMPT.format(summary=summary))] if summary else []
+    )
+    return [system_message, *summary_messages, *state["messages"], context_message]
+
+
 def should_continue(state: AgentState) -> Literal["tools", "end"]:
     """
     Determine if we should continue to tools or end.
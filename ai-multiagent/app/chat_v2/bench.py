@@ -0,0 +1,186 @@
+"""Throughput benchmark for /v2/chat/message across worker counts.
+
+Starts the API with 1, 2, 4, ... uvicorn workers, drives it with concurrent
+conversations (each client owns its threads, so turns never contend for a
+thread lock) and prints requests/s and latency percentiles per worker count:
+
+    DATABASE_BACKEND=local LOCAL_DATABASE_SEED_PATIENTS=1000 \\
+    CHECKPOINT_BACKEND=sqlite CHECKPOINT_SQLITE_PATH=/tmp/bench-checkpoints.sqlite \\
+        uv run python -m app.chat_v2.bench --workers 1,2,4 --stub-llm
+
+--stub-llm points the OpenAI client at a local stub that answers instantly,
+so the numbers measure this service (graph, checkpoints, repositories)
+rather than model latency; without it the configured models are called.
+Use --url to load an already running server instead, and --batch N to send
+N messages per request to /v2/chat/messages:batch.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from app.shared.database import synthetic_phone
+
+STUB_REPLY = "Gracias por escribirnos. ¿Cómo te sientes hoy?"
+
+stub_app = FastAPI()
+
+
+@stub_app.post("/v1/chat/completions")
+async def stub_completion(body: dict) -> dict:
+    """OpenAI-compatible completion that replies without calling a model."""
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": STUB_REPLY},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def _serve(target: str, port: int, workers: int, env: dict[str, str]) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1"]
+    command += ["--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, env=env)
+
+
+async def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+async def load(
+    base_url: str, requests: int, concurrency: int, threads: int, batch: int = 0
+) -> None:
+    """
+    Send `requests` requests over `threads` conversations with `concurrency` clients.
+
+    With `batch`, each request carries that many messages (latencies are per batch).
+    """
+    latencies: list[float] = []
+    failures = 0
+    sent = 0
+    remaining = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient, index: int) -> None:
+        nonlocal failures, sent
+        own_threads = [
+            (f"bench-{uuid.uuid4().hex[:8]}-{n}", synthetic_phone(n))
+            for n in range(index, threads, concurrency)
+        ] or [(f"bench-{uuid.uuid4().hex[:8]}", synthetic_phone(index))]
+        turn = 0
+        for _ in remaining:
+            messages = []
+            for _ in range(max(batch, 1)):
+                thread_id, phone = own_threads[turn % len(own_threads)]
+                turn += 1
+                messages.append(
+                    {"thread_id": thread_id, "phone": phone, "message": "Hola, ¿qué tal?"}
+                )
+            started = time.perf_counter()
+            try:
+                if batch:
+                    response = await client.post(
+                        f"{base_url}/v2/chat/messages:batch", json={"messages": messages}
+                    )
+                    response.raise_for_status()
+                    failures += response.json()["failed"]
+                else:
+                    response = await client.post(f"{base_url}/v2/chat/message", json=messages[0])
+                    response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+                sent += len(messages)
+            except httpx.HTTPError:
+                failures += len(messages)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    if len(latencies) < 2:
+        print(f"  ❌ {failures} of {requests} requests failed")
+        return
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"  {sent / elapsed:8.1f} msg/s  p50={percentiles[49]:7.1f}ms  "
+        f"p95={percentiles[94]:7.1f}ms  failures={failures}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the benchmark for every worker count (or against --url)."""
+    if args.url:
+        print(f"Server: {args.url}")
+        await load(args.url.rstrip("/"), args.requests, args.concurrency, args.threads, args.batch)
+        return
+
+    env = dict(os.environ)
+    stub = None
+    if args.stub_llm:
+        stub_port = args.port + 1
+        stub = _serve("app.chat_v2.bench:stub_app", stub_port, 2, env)
+        await _wait_ready(f"http://127.0.0.1:{stub_port}/docs")
+        env |= {"OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1", "OPENAI_API_KEY": "stub"}
+
+    try:
+        for workers in args.workers:
+            print(f"Workers: {workers}")
+            server = _serve("app.main:app", args.port, workers, env | {"ENVIRONMENT": "local"})
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                await _wait_ready(f"{base_url}/health")
+                await load(base_url, args.requests, args.concurrency, args.threads, args.batch)
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        if stub:
+            stub.terminate()
+            stub.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--workers",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[1, 2, 4],
+        help="Comma-separated worker counts",
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=200, help="Distinct conversations")
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--stub-llm", action="store_true", help="Answer with a local stub model")
+    parser.add_argument("--batch", type=int, default=0, help="Messages per batch request")
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
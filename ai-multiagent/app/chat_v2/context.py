@@ -0,0 +1,69 @@
+"""Turn-scoped patient context shared by Chat V2 tools."""
+
+import asyncio
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from app.shared.database import PatientRepositoryProtocol, get_patient_repository
+from app.shared.database.repositories import normalize_phone
+
+# Key under config["configurable"] where the service injects the context
+PATIENT_CONTEXT_KEY = "patient_context"
+
+
+class PatientContext:
+    """
+    Resolves phone → patient once per graph invocation.
+
+    Created by ChatServiceV2 for every turn and injected through the graph
+    config, so every tool called during the run shares the same record instead
+    of re-running the users + patients join. Tools that write patient data
+    call `refresh()` so later tools in the same run see the update.
+    """
+
+    def __init__(self, patient_repo: PatientRepositoryProtocol | None = None):
+        self._repo = patient_repo or get_patient_repository()
+        self._patients: dict[str, Optional[dict]] = {}
+        self._lock = asyncio.Lock()
+
+    async def get_patient(self, phone: str) -> Optional[dict]:
+        """Get the patient for a phone, hitting the database at most once per run."""
+        key = normalize_phone(phone)
+        if key in self._patients:
+            return self._patients[key]
+
+        # Parallel tool calls may ask for the same phone at the same time
+        async with self._lock:
+            if key not in self._patients:
+                self._patients[key] = await self._repo.get_by_phone(phone)
+            return self._patients[key]
+
+    def prime(self, phone: str, patient: Optional[dict]) -> None:
+        """Seed the context with a lookup already done by the caller."""
+        self._patients[normalize_phone(phone)] = patient
+
+    def refresh(self, phone: str, patient: Optional[dict]) -> None:
+        """Replace the cached record after a write made during the run.
+
+        A None result (failed write) drops the entry so the next read refetches.
+        """
+        key = normalize_phone(phone)
+        if patient is None:
+            self._patients.pop(key, None)
+        else:
+            self._patients[key] = patient
+
+
+def get_patient_context(config: RunnableConfig | None) -> PatientContext:
+    """
+    Get the turn-scoped context from a tool's config.
+
+    Falls back to a fresh context when the tool is invoked outside
+    ChatServiceV2 (e.g. LangGraph Studio or direct tool calls).
+    """
+    configurable = (config or {}).get("configurable", {})
+    context = configurable.get(PATIENT_CONTEXT_KEY)
+    if isinstance(context, PatientContext):
+        return context
+    return PatientContext()
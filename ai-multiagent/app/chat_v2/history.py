@@ -0,0 +1,273 @@
+"""Sliding-window conversation history with a rolling summary and tool-result pruning."""
+
+import asyncio
+from collections.abc import Sequence
+from functools import lru_cache
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import Runnable
+from langgraph.graph.state import CompiledStateGraph
+
+from app.shared.concurrency import get_thread_locks
+from app.shared.config import get_settings
+from app.shared.llm import AllowedModel, get_model_registry
+
+from .prompts import SUMMARIZE_PROMPT
+from .pruning import PRUNED_KEY, PruneRule, ToolResultArchive, parse_rules, prunable
+
+# Summaries don't need the conversational model
+SUMMARY_MODEL: AllowedModel = "gpt-4.1-mini"
+
+# Tool results are cut to this many characters in the transcript
+TOOL_RESULT_CHARS = 300
+
+
+def split_history(
+    messages: Sequence[BaseMessage], keep_turns: int
+) -> tuple[list[BaseMessage], list[BaseMessage]]:
+    """
+    Split a history into older messages and the last `keep_turns` turns.
+
+    A turn starts at a patient message, so tool calls and their results
+    always stay in the same part.
+    """
+    starts = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if len(starts) <= keep_turns:
+        return [], list(messages)
+    cut = starts[-keep_turns] if keep_turns > 0 else len(messages)
+    return list(messages[:cut]), list(messages[cut:])
+
+
+def render_transcript(messages: Sequence[BaseMessage]) -> str:
+    """Plain-text transcript of messages for the summarizer."""
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"Paciente: {message.text}")
+        elif isinstance(message, AIMessage):
+            if message.text:
+                lines.append(f"Pausi: {message.text}")
+            for call in message.tool_calls:
+                lines.append(f"[Pausi usa {call['name']}({call['args']})]")
+        elif isinstance(message, ToolMessage):
+            lines.append(f"[Resultado de {message.name}: {message.text[:TOOL_RESULT_CHARS]}]")
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """
+    Keeps the stored conversation bounded for long-lived threads.
+
+    Once the messages exceed `token_budget` (approximate tokens), a
+    background task (started once the reply is on its way, run under the
+    thread's lock so the next turn waits instead of racing it) maintains the
+    thread's state in one update:
+
+    - Tool results older than the last `prune_keep_turns` turns are replaced
+      by compact stubs or truncated, per tool (`prune_rules`, see pruning.py).
+    - If the messages are still over budget, everything except the last
+      `keep_turns` turns is folded into the rolling summary and removed
+      from state.
+
+    Both rewrite earlier messages, so the provider's prompt cache misses from
+    the first changed message on; doing them together, only when over
+    budget, costs that miss once per fold instead of on every turn. With a
+    budget of 0 (no summaries) tool results are pruned after every turn
+    instead, trading the cache for a smaller prompt.
+
+    Raw tool results leaving state either way go to `archive` first (when
+    the checkpoint backend persists one), so they stay retrievable for audit.
+    The prompt thus stays around budget however long the thread lives. A
+    budget of 0 disables summarization; `prune_rules=None` disables pruning.
+    """
+
+    def __init__(
+        self,
+        keep_turns: int,
+        token_budget: int,
+        prune_keep_turns: int = 1,
+        prune_rules: dict[str, PruneRule] | None = None,
+    ):
+        self.keep_turns = max(keep_turns, 1)
+        self.token_budget = token_budget
+        self.prune_keep_turns = max(prune_keep_turns, 0)
+        self.prune_rules = prune_rules
+        self.archive: ToolResultArchive | None = None
+        self._pending: dict[str, asyncio.Task] = {}
+        self.summaries = 0
+        self.folded_messages = 0
+        self.pruned_results = 0
+        self.archived_results = 0
+        self.archive_failures = 0
+        self.folds_postponed = 0
+        self.failures = 0
+
+    def schedule(
+        self, graph: CompiledStateGraph, thread_id: str, messages: Sequence[BaseMessage]
+    ) -> None:
+        """
+        Prune and summarize the thread in the background if it needs it.
+
+        Args:
+            graph: Compiled graph with a checkpointer
+            thread_id: Conversation to maintain
+            messages: The conversation's messages after the turn
+        """
+        if thread_id in self._pending or not self._needs_maintenance(messages):
+            return
+        task = asyncio.create_task(self.maintain(graph, thread_id), name="history-maintenance")
+        self._pending[thread_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(thread_id, None))
+
+    async def maintain(self, graph: CompiledStateGraph, thread_id: str) -> bool:
+        """
+        Prune stale tool results and fold old turns of a thread into its summary.
+
+        Returns:
+            True if the state was updated
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            async with get_thread_locks().hold(thread_id):
+                snapshot = await graph.aget_state(config)
+                messages = snapshot.values.get("messages", [])
+                if not self._needs_maintenance(messages):
+                    return False
+
+                replacements = {
+                    original.id: replacement for original, replacement in self._prunable(messages)
+                }
+                pruned = [replacements.get(message.id, message) for message in messages]
+                older = []
+                if self._over_budget(pruned):
+                    older, _ = split_history(pruned, self.keep_turns)
+                folded = {message.id for message in older}
+
+                # Raw results are about to leave state: archive them first
+                for message in messages:
+                    if not isinstance(message, ToolMessage):
+                        continue
+                    if message.id not in replacements and message.id not in folded:
+                        continue
+                    if not await self._archive(thread_id, message):
+                        replacements.pop(message.id, None)
+                        if message.id in folded:
+                            # Folding would drop it unarchived: wait for the archive
+                            self.folds_postponed += 1
+                            print(f"⚠️ Folding of {thread_id} postponed until the archive works")
+                            folded = set()
+
+                summary = ""
+                if folded:
+                    summary = await self._fold(snapshot.values.get("summary"), older)
+                if not summary:
+                    folded = set()
+
+                update: dict = {
+                    "messages": [
+                        replacement
+                        for message_id, replacement in replacements.items()
+                        if message_id not in folded
+                    ]
+                    + [RemoveMessage(id=message_id) for message_id in folded]
+                }
+                if not update["messages"]:
+                    return False
+                if folded:
+                    update["summary"] = summary
+                await graph.aupdate_state(config, update, as_node="agent")
+        except Exception as e:
+            # The history stays as it is; the next turn tries again
+            self.failures += 1
+            print(f"⚠️ Failed to maintain history of {thread_id}: {e}")
+            return False
+
+        if folded:
+            self.summaries += 1
+            self.folded_messages += len(folded)
+        self.pruned_results += len(set(replacements) - folded)
+        return True
+
+    def summary_model(self) -> Runnable:
+        """The summarizer, from the process-wide model registry (built on first use)."""
+        return get_model_registry().model(temperature=0.0, model_name=SUMMARY_MODEL)
+
+    async def stop(self) -> None:
+        """Wait for pending maintenance tasks (app shutdown)."""
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "keep_turns": self.keep_turns,
+            "token_budget": self.token_budget,
+            "pruning": self.prune_rules is not None,
+            "archive": self.archive is not None,
+            "pending": len(self._pending),
+            "summaries": self.summaries,
+            "folded_messages": self.folded_messages,
+            "pruned_results": self.pruned_results,
+            "archived_results": self.archived_results,
+            "archive_failures": self.archive_failures,
+            "folds_postponed": self.folds_postponed,
+            "failures": self.failures,
+        }
+
+    def _needs_maintenance(self, messages: Sequence[BaseMessage]) -> bool:
+        if self.token_budget > 0:
+            return self._over_budget(messages)
+        return bool(self._prunable(messages))
+
+    def _over_budget(self, messages: Sequence[BaseMessage]) -> bool:
+        return self.token_budget > 0 and count_tokens_approximately(messages) > self.token_budget
+
+    def _prunable(self, messages: Sequence[BaseMessage]) -> list[tuple[ToolMessage, ToolMessage]]:
+        if self.prune_rules is None:
+            return []
+        stale, _ = split_history(messages, self.prune_keep_turns)
+        return prunable(stale, self.prune_rules)
+
+    async def _archive(self, thread_id: str, message: ToolMessage) -> bool:
+        """Archive a raw tool result; False if an archive is set but failed."""
+        if self.archive is None or message.additional_kwargs.get(PRUNED_KEY):
+            return True
+        try:
+            await self.archive.put(thread_id, message)
+        except Exception as e:
+            self.archive_failures += 1
+            print(f"⚠️ Failed to archive {message.name} result of {thread_id}: {e}")
+            return False
+        self.archived_results += 1
+        return True
+
+    async def _fold(self, summary: str | None, older: Sequence[BaseMessage]) -> str:
+        """The previous summary updated with `older` messages ("" on an empty reply)."""
+        prompt = SUMMARIZE_PROMPT.format(
+            summary=summary or "(sin resumen todavía)",
+            transcript=render_transcript(older),
+        )
+        return (await self.summary_model().ainvoke(prompt)).text.strip()
+
+
+@lru_cache
+def get_history_manager() -> HistoryManager:
+    """Get the process-wide history manager."""
+    settings = get_settings()
+    return HistoryManager(
+        keep_turns=settings.CHAT_HISTORY_KEEP_TURNS,
+        token_budget=settings.CHAT_HISTORY_TOKEN_BUDGET,
+        prune_keep_turns=settings.CHAT_TOOL_RESULT_KEEP_TURNS,
+        prune_rules=(
+            parse_rules(settings.CHAT_TOOL_RESULT_RULES)
+            if settings.CHAT_TOOL_RESULT_PRUNING
+            else None
+        ),
+    )
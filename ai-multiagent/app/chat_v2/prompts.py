@@ -1,4 +1,13 @@
-"""Unified system prompt for Chat V2 single agent."""
+"""Unified system prompt for Chat V2 single agent.
+
+SYSTEM_PROMPT is identical for every request so that, together with the tool
+definitions, it forms a prefix the provider can cache. Everything specific to
+the patient or conversation goes into the context message, which the agent
+sends after the conversation history as a user message wrapped in <contexto>
+tags (a system message there is rejected by most providers).
+"""
+
+from app.shared.database import OnboardingStatus
 
 SYSTEM_PROMPT = """Eres Pausi, el asistente de acompañamiento de Pausiva para mujeres de 40 a 60 años en etapa de menopausia.
 
@@ -96,8 +105,8 @@ Cuando la paciente pregunte sobre citas:
 
 IMPORTANTE sobre agendar citas:
 - Cuando la paciente quiera agendar, SIEMPRE usa `schedule_meeting`
-- Esta herramienta primero crea la cita y luego crea un following de tipo "business"
-- El orden es: (1) crear appointment, (2) crear following
+- Esta herramienta crea la cita y el following de tipo "business" en una sola operación
+- Si devuelve status="error", NO se agendó nada: discúlpate y ofrece intentarlo de nuevo
 
 NO inventes fechas ni horarios de citas fuera de las disponibles.
 
@@ -111,20 +120,17 @@ Para cualquier interacción significativa:
 
 # CONTEXTO DE LA CONVERSACIÓN
 
-Información disponible sobre la paciente:
-- Teléfono: {phone_number}
-- Es paciente nueva: {is_new_patient}
-- Es nueva conversación: {is_new_conversation}
-- Datos del paciente: {patient_data}
-- ID de conversación: {conversation_id}
-
-Usa esta información para personalizar tus respuestas y dar continuidad a la conversación.
+Al final de la conversación recibirás un mensaje entre etiquetas <contexto> con
+la información disponible sobre la paciente (teléfono, si es paciente nueva, si es
+nueva conversación, sus datos y el ID de conversación). Ese mensaje lo agrega el
+sistema, no la paciente: no lo menciones ni lo respondas. Usa siempre el contexto más
+reciente para personalizar tus respuestas y dar continuidad a la conversación.
 
 # IMPORTANTE - CONVERSATION_ID
 
-SIEMPRE pasa el `conversation_id` (valor: {conversation_id}) cuando llames a estas herramientas:
-- `schedule_meeting`: pasa conversation_id="{conversation_id}"
-- `create_following`: pasa conversation_id="{conversation_id}"
+SIEMPRE pasa el `conversation_id` indicado en el contexto cuando llames a estas herramientas:
+- `schedule_meeting`
+- `create_following`
 
 Esto es OBLIGATORIO para vincular los registros con esta conversación en el CMS.
 
@@ -136,8 +142,43 @@ Esto es OBLIGATORIO para vincular los registros con esta conversación en el CMS
 - Prioriza la seguridad de la paciente - si hay riesgo alto, actúa inmediatamente
 """
 
+CONTEXT_PROMPT = """<contexto>
+# CONTEXTO DE LA CONVERSACIÓN
+
+Información disponible sobre la paciente:
+- Teléfono: {phone_number}
+- Es paciente nueva: {is_new_patient}
+- Es nueva conversación: {is_new_conversation}
+- Datos del paciente: {patient_data}
+- ID de conversación: {conversation_id}
+
+Cuando llames a `schedule_meeting` o `create_following`, pasa conversation_id="{conversation_id}".
+</contexto>
+"""
+
+SUMMARY_PROMPT = """# RESUMEN DE LA CONVERSACIÓN ANTERIOR
+
+Lo que pasó antes de los mensajes que siguen (ya no están en el historial):
+{summary}
+"""
+
+SUMMARIZE_PROMPT = """Mantienes el resumen de una conversación de WhatsApp entre Pausi \
+(asistente de Pausiva) y una paciente en etapa de menopausia.
+
+Actualiza el resumen anterior con los mensajes nuevos. Conserva lo que sirva para continuar la \
+conversación: nombre y datos de la paciente, síntomas y nivel de riesgo, citas agendadas o \
+canceladas, recomendaciones dadas, preguntas pendientes y estado del onboarding. Omite saludos y \
+detalles sin importancia. Escribe en español, en prosa breve (máximo 200 palabras), sin Markdown.
+
+# RESUMEN ANTERIOR
+{summary}
+
+# MENSAJES NUEVOS
+{transcript}
+"""
+
 
-def get_system_prompt(
+def get_context_prompt(
     phone_number: str,
     is_new_patient: bool,
     is_new_conversation: bool,
@@ -145,22 +186,27 @@ def get_system_prompt(
     conversation_id: str | None = None,
 ) -> str:
     """
-    Get the system prompt with context variables filled in.
+    Get the per-turn context message (patient and conversation details).
 
     Args:
         phone_number: Patient phone number
         is_new_patient: Whether this is a new patient
         is_new_conversation: Whether this is a new conversation
-        patient_data: Patient data from database (or None if new)
+        patient_data: Patient data from database (or None if new); only the
+            onboarding view (name, state, clinical profile) goes into the prompt
         conversation_id: Conversation UUID for CMS mapping
 
     Returns:
-        Formatted system prompt
+        Formatted context message
     """
-    return SYSTEM_PROMPT.format(
+    return CONTEXT_PROMPT.format(
         phone_number=phone_number,
         is_new_patient=is_new_patient,
         is_new_conversation=is_new_conversation,
-        patient_data=patient_data or "No hay datos previos (paciente nueva)",
+        patient_data=(
+            OnboardingStatus.from_patient(patient_data).as_dict()
+            if patient_data
+            else "No hay datos previos (paciente nueva)"
+        ),
         conversation_id=conversation_id or "no disponible",
     )
@@ -0,0 +1,139 @@
+"""Pruning of stale tool results in stored conversation state."""
+
+import json
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Literal
+
+from langchain_core.messages import BaseMessage, ToolMessage
+from langgraph.store.base import BaseStore
+
+# How a tool's result is kept once its turn is stale: "keep" it verbatim,
+# replace it with a one-line "stub", or truncate it to N characters
+type PruneRule = Literal["keep", "stub"] | int
+
+# Lookups the model can repeat are stubbed; results of actions (what was
+# scheduled, recorded or assessed) are kept, since later turns refer to them
+DEFAULT_RULES: dict[str, PruneRule] = {
+    "get_patient_by_phone": "stub",
+    "get_followings": "stub",
+    "get_urgent_followings": "stub",
+    "get_symptom_history": "stub",
+    "get_available_appointments": "stub",
+    "get_next_appointment": 400,
+    "get_appointment_info": 400,
+    "update_patient_info": 400,
+    "update_onboarding_state": "keep",
+    "create_following": 200,
+    "record_symptom_report": 200,
+    "assess_symptoms": "keep",
+    "schedule_meeting": "keep",
+    "cancel_appointment_request": "keep",
+}
+
+# Rule for tools not listed above
+DEFAULT_RULE: PruneRule = 1000
+
+# Marks a ToolMessage that was already pruned
+PRUNED_KEY = "pruned"
+
+
+def parse_rules(overrides: dict[str, str]) -> dict[str, PruneRule]:
+    """Default rules updated with settings overrides ("keep", "stub" or a length)."""
+    rules = dict(DEFAULT_RULES)
+    for tool, rule in overrides.items():
+        if rule.isdigit():
+            rules[tool] = int(rule)
+        elif rule in ("keep", "stub"):
+            rules[tool] = rule  # type: ignore[assignment]
+        else:
+            raise ValueError(f"Invalid pruning rule for {tool}: {rule!r}")
+    return rules
+
+
+def _describe(content: str) -> str:
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return f"{len(content)} caracteres"
+    if isinstance(payload, list):
+        return f"{len(payload)} elementos"
+    if isinstance(payload, dict):
+        return "campos: " + ", ".join(list(payload)[:8])
+    return f"{len(content)} caracteres"
+
+
+def prune_message(message: ToolMessage, rule: PruneRule) -> ToolMessage | None:
+    """
+    The compact replacement for a tool result, or None if it stays as is.
+
+    The replacement keeps the message id (so it replaces the original in
+    state) and tool_call_id (so the tool call still has its answer).
+    """
+    content = message.text
+    if rule == "keep":
+        return None
+    if rule == "stub":
+        replacement = (
+            f"[Resultado anterior de {message.name} archivado ({_describe(content)}). "
+            "Vuelve a llamar la herramienta si necesitas los datos.]"
+        )
+    else:
+        replacement = f"{content[:rule]}… [recortado, {len(content)} caracteres]"
+    if len(replacement) >= len(content):
+        return None
+    return ToolMessage(
+        content=replacement,
+        id=message.id,
+        name=message.name,
+        tool_call_id=message.tool_call_id,
+        status=message.status,
+        additional_kwargs={**message.additional_kwargs, PRUNED_KEY: True},
+    )
+
+
+def prunable(
+    messages: Sequence[BaseMessage], rules: dict[str, PruneRule]
+) -> list[tuple[ToolMessage, ToolMessage]]:
+    """(original, replacement) for each tool result in `messages` that its rule shrinks."""
+    pairs = []
+    for message in messages:
+        if not isinstance(message, ToolMessage) or message.additional_kwargs.get(PRUNED_KEY):
+            continue
+        replacement = prune_message(message, rules.get(message.name or "", DEFAULT_RULE))
+        if replacement is not None:
+            pairs.append((message, replacement))
+    return pairs
+
+
+class ToolResultArchive:
+    """
+    Raw tool results, kept for audit after they're pruned from state.
+
+    Stored in a LangGraph store under ("tool_results", namespace, thread_id),
+    keyed by tool_call_id.
+    """
+
+    def __init__(self, store: BaseStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    async def put(self, thread_id: str, message: ToolMessage) -> None:
+        """Archive a tool result before it's pruned."""
+        await self.store.aput(
+            ("tool_results", self.namespace, thread_id),
+            message.tool_call_id,
+            {
+                "tool": message.name,
+                "message_id": message.id,
+                "status": message.status,
+                "content": message.text,
+                "archived_at": datetime.now(UTC).isoformat(),
+            },
+            index=False,
+        )
+
+    async def get(self, thread_id: str, tool_call_id: str) -> dict | None:
+        """The archived result of a tool call, if any."""
+        item = await self.store.aget(("tool_results", self.namespace, thread_id), tool_call_id)
+        return item.value if item else None
@@ -1,9 +1,16 @@
 """FastAPI router for Chat V2 API."""
 
+import json
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.shared.concurrency import ThreadBusyError
+from app.shared.config import get_settings
 
 from .dependencies import ChatServiceV2Dep
-from .schemas import MessageRequest, MessageResponse
+from .schemas import BatchMessageRequest, BatchMessageResponse, MessageRequest, MessageResponse
 
 router = APIRouter(tags=["Chat V2"])
 
@@ -21,7 +28,9 @@ async def process_message(
 
     Identifiers:
     - thread_id: Conversation session ID (for checkpointing/memory)
-    - message_id: Message ID for tracing (auto-generated if not provided)
+    - message_id: Client message ID (e.g. the WhatsApp message id); a retry with
+      the same message_id gets the original response instead of a new turn. If
+      omitted, an id is generated and retries are not detected
     - phone: Patient identifier (for context/personalization)
 
     Args:
@@ -32,15 +41,92 @@ async def process_message(
         MessageResponse with the reply and metadata
     """
     try:
-        response = await service.process_message(
-            thread_id=request.thread_id,
-            message_id=request.message_id,
-            phone=request.phone,
-            message=request.message,
-            user_id=request.user_id,
-            is_new_conversation=request.is_new_conversation,
-        )
-        return response
+        return await service.respond(request)
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/messages:batch", response_model=BatchMessageResponse)
+async def process_batch(
+    request: BatchMessageRequest,
+    service: ChatServiceV2Dep,
+) -> BatchMessageResponse:
+    """
+    Process many messages in one request (e.g. replaying messages queued
+    during an outage).
+
+    Conversations run concurrently (up to `concurrency`); messages of one
+    thread run in list order. Each message gets its own result: the same
+    response /v2/chat/message would return, or its status and error.
+    Retried message_ids get their original response.
+
+    Args:
+        request: Messages to process and optional concurrency
+        service: Injected chat service
+
+    Returns:
+        BatchMessageResponse with per-message results in request order
+    """
+    max_messages = get_settings().CHAT_BATCH_MAX_MESSAGES
+    if len(request.messages) > max_messages:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request.messages)} messages (max {max_messages})",
+        )
+    return await service.process_batch(request.messages, request.concurrency)
+
+
+@router.post(
+    "/message/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_message(
+    request: MessageRequest,
+    service: ChatServiceV2Dep,
+) -> StreamingResponse:
+    """
+    Process a message, streaming the reply as Server-Sent Events.
+
+    Events:
+    - token: {"text"} as the model writes the reply
+    - tool_start / tool_end: {"tool"} while tools run (typing indicator)
+    - done: the same payload as /v2/chat/message
+    - error: {"status", "detail"} if the turn fails (409 if the conversation is busy)
+
+    Args:
+        request: Message request with thread_id, message_id, phone, and message
+        service: Injected chat service
+
+    Returns:
+        text/event-stream response
+    """
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in service.stream_message(
+                thread_id=request.thread_id,
+                message_id=request.message_id,
+                phone=request.phone,
+                message=request.message,
+                user_id=request.user_id,
+                is_new_conversation=request.is_new_conversation,
+            ):
+                yield _sse(event, data)
+        except ThreadBusyError as e:
+            yield _sse("error", {"status": 409, "detail": str(e)})
+        except Exception as e:
+            yield _sse("error", {"status": 500, "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
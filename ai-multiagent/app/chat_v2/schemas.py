@@ -14,7 +14,10 @@ class MessageRequest(BaseModel):
         description="Conversation session ID (created by client for checkpointing)",
     )
     message_id: str = Field(
-        description="Message ID for tracing (auto-generated if not provided)",
+        description=(
+            "Client message ID (e.g. the WhatsApp message id); retries with the same id "
+            "get the original response. Auto-generated if not provided, without that guarantee"
+        ),
         default_factory=lambda: str(uuid.uuid4()),
     )
     phone: str = Field(
@@ -31,6 +34,11 @@ class MessageRequest(BaseModel):
         description="Whether this is the start of a new conversation",
     )
 
+    @property
+    def has_client_message_id(self) -> bool:
+        """False when message_id was generated here (no retry can carry it)."""
+        return "message_id" in self.model_fields_set
+
 
 class MessageResponse(BaseModel):
     """Response from the chat V2 system."""
@@ -53,3 +61,41 @@ class MessageResponse(BaseModel):
         default=None,
         description="Current onboarding state if applicable",
     )
+    coalesced_into: Optional[str] = Field(
+        default=None,
+        description="Set when this message was answered together with a later one: "
+        "that message's ID, which carries the reply (reply_text is empty here)",
+    )
+
+
+class BatchMessageRequest(BaseModel):
+    """Request body for the /v2/chat/messages:batch endpoint."""
+
+    messages: list[MessageRequest] = Field(
+        ...,
+        min_length=1,
+        description="Messages to process; each thread's messages run in list order",
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Conversations processed at once (default and maximum: CHAT_BATCH_CONCURRENCY)",
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one message in a batch."""
+
+    thread_id: str = Field(..., description="Conversation session ID")
+    message_id: str = Field(..., description="Message ID")
+    status: int = Field(default=200, description="HTTP status the message would have got alone")
+    response: Optional[MessageResponse] = Field(default=None, description="Set on success")
+    error: Optional[str] = Field(default=None, description="Set on failure")
+
+
+class BatchMessageResponse(BaseModel):
+    """Response from the batch endpoint (results in request order)."""
+
+    results: list[BatchItemResult]
+    succeeded: int = Field(default=0)
+    failed: int = Field(default=0)
@@ -1,12 +1,30 @@
 """Business logic for Chat V2 service."""
 
+import asyncio
+from collections.abc import AsyncIterator, Awaitable
+from uuid import uuid4
+
 from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.graph.state import CompiledStateGraph
 
 from app.models import RiskLevel
-from app.shared.database import PatientRepository
+from app.shared.checkpoint import BoundedCheckpointer
+from app.shared.concurrency import (
+    QueuedMessage,
+    ThreadBusyError,
+    get_idempotency_cache,
+    get_thread_locks,
+    get_turn_coalescer,
+)
+from app.shared.config import get_settings
+from app.shared.database import get_patient_repository
+
+from .context import PATIENT_CONTEXT_KEY, PatientContext
+from .history import get_history_manager
+from .schemas import BatchItemResult, BatchMessageResponse, MessageRequest, MessageResponse
 
-from .schemas import MessageResponse
+# additional_kwargs key holding the client message ids a HumanMessage was built from
+MESSAGE_IDS_KEY = "message_ids"
 
 
 class ChatServiceV2:
@@ -14,7 +32,7 @@ class ChatServiceV2:
 
     def __init__(self, graph: CompiledStateGraph):
         self.graph = graph
-        self.patient_repo = PatientRepository()
+        self.patient_repo = get_patient_repository()
 
     async def process_message(
         self,
@@ -30,7 +48,8 @@ class ChatServiceV2:
 
         Args:
             thread_id: Conversation session ID (for checkpointing)
-            message_id: Message ID for tracing
+            message_id: Message ID for tracing (messages merged into a later
+                message's turn get an empty reply)
             phone: Patient phone number
             message: Message content
             user_id: Optional user ID for authenticated users
@@ -39,33 +58,171 @@ class ChatServiceV2:
         Returns:
             MessageResponse with the reply and metadata
         """
-        # Check if patient exists
-        patient_data = self.patient_repo.get_by_phone(phone)
-        is_new_patient = patient_data is None
+        # Messages of a thread are queued; a quick burst is answered in one turn
+        queued = QueuedMessage(message_id=message_id, content=message)
+        (result, is_new_patient), batch = await get_turn_coalescer("v2").submit(
+            thread_id,
+            queued,
+            lambda messages: self._run_turn(
+                thread_id, messages, phone, user_id, is_new_conversation
+            ),
+        )
+        latest_id = batch[-1].message_id
+        if latest_id != message_id:
+            # The reply goes out once, on the burst's latest message
+            return MessageResponse(
+                thread_id=thread_id,
+                message_id=message_id,
+                reply_text="",
+                actions=[],
+                agent_used="chat_v2",
+                is_new_patient=is_new_patient,
+                coalesced_into=latest_id,
+            )
 
-        # Create HumanMessage with assigned message_id
-        human_message = HumanMessage(content=message)
-        human_message.id = message_id
-
-        # Run the graph with context
-        result = await self.graph.ainvoke(
-            {
-                "messages": [human_message],
-                "phone_number": phone,
-                "is_new_patient": is_new_patient,
-                "is_new_conversation": is_new_conversation,
-                "patient_data": patient_data,
-                "user_id": user_id,
-                "conversation_id": thread_id,  # Pass thread_id as conversation_id for CMS
-            },
-            config={
-                "configurable": {"thread_id": thread_id},
-                "run_name": "Pausiva Chat V2",
-                "tags": ["whatsapp", "patient", f"phone:{phone}", "v2"],
-            },
+        return self._to_response(thread_id, message_id, result, is_new_patient)
+
+    async def respond(self, request: MessageRequest) -> MessageResponse:
+        """
+        Process a request at most once per message_id.
+
+        A retry of a message that is running or was answered recently gets
+        the original response instead of starting a new turn. Requests
+        without a client message_id are not remembered: their generated id
+        can't match a retry.
+        """
+
+        def compute() -> Awaitable[MessageResponse]:
+            return self.process_message(
+                thread_id=request.thread_id,
+                message_id=request.message_id,
+                phone=request.phone,
+                message=request.message,
+                user_id=request.user_id,
+                is_new_conversation=request.is_new_conversation,
+            )
+
+        if not request.has_client_message_id:
+            return await compute()
+        return await get_idempotency_cache().run(
+            f"v2:{request.message_id}", compute, MessageResponse
+        )
+
+    async def process_batch(
+        self, requests: list[MessageRequest], concurrency: int | None = None
+    ) -> BatchMessageResponse:
+        """
+        Process many messages, several conversations at a time.
+
+        A thread's messages are submitted together, in list order, so the
+        turn queue merges them like a burst instead of each waiting out the
+        coalesce window alone: the reply is on each turn's latest message and
+        the others get `coalesced_into`. Up to `concurrency` threads run at
+        once. A failing message is reported in its result and doesn't stop
+        the rest of the batch.
+
+        Args:
+            requests: Messages to process (e.g. a gateway replay or a backfill)
+            concurrency: Threads processed at once (defaults to, and capped at,
+                CHAT_BATCH_CONCURRENCY)
+
+        Returns:
+            BatchMessageResponse with one result per request, in request order
+        """
+        limit = get_settings().CHAT_BATCH_CONCURRENCY
+        semaphore = asyncio.Semaphore(min(concurrency or limit, limit))
+        results: list[BatchItemResult | None] = [None] * len(requests)
+
+        threads: dict[str, list[int]] = {}
+        for index, request in enumerate(requests):
+            threads.setdefault(request.thread_id, []).append(index)
+
+        async def run_thread(indexes: list[int]) -> None:
+            async with semaphore:
+                # gather starts the items in list order, which is queue order
+                items = await asyncio.gather(
+                    *(self._batch_item(requests[index]) for index in indexes)
+                )
+                for index, item in zip(indexes, items):
+                    results[index] = item
+
+        await asyncio.gather(*(run_thread(indexes) for indexes in threads.values()))
+
+        succeeded = sum(1 for result in results if result and result.error is None)
+        return BatchMessageResponse(
+            results=results,
+            succeeded=succeeded,
+            failed=len(requests) - succeeded,
         )
 
-        # Extract the response
+    async def stream_message(
+        self,
+        thread_id: str,
+        message_id: str,
+        phone: str,
+        message: str,
+        user_id: str | None = None,
+        is_new_conversation: bool = False,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Process a message, yielding progress events while the turn runs.
+
+        Streamed messages skip burst merging (each is its own turn) but still
+        hold the conversation's lock, so they never overlap another turn.
+
+        Yields:
+            (event, data) pairs:
+            - ("token", {"text"}): a piece of the reply as the model writes it
+            - ("tool_start", {"tool"}) / ("tool_end", {"tool"}): tool progress;
+              text streamed before a tool call is not part of the final reply
+            - ("done", MessageResponse fields): the same payload as /message
+        """
+        async with get_thread_locks().hold(thread_id):
+            queued = [QueuedMessage(message_id=message_id, content=message)]
+            graph_input, config, is_new_patient = await self._prepare_turn(
+                thread_id, queued, phone, user_id, is_new_conversation
+            )
+
+            result: dict | None = None
+            async for event in self.graph.astream_events(graph_input, config=config):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+                if kind == "on_chat_model_stream" and node == "agent":
+                    text = _chunk_text(event["data"]["chunk"].content)
+                    if text:
+                        yield "token", {"text": text}
+                elif kind == "on_tool_start":
+                    yield "tool_start", {"tool": event["name"]}
+                elif kind == "on_tool_end":
+                    yield "tool_end", {"tool": event["name"]}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    result = event["data"].get("output")
+
+            if not isinstance(result, dict):
+                result = (await self.graph.aget_state(config)).values
+
+            if isinstance(self.graph.checkpointer, BoundedCheckpointer):
+                self.graph.checkpointer.turn_completed(thread_id)
+
+        get_history_manager().schedule(self.graph, thread_id, result.get("messages", []))
+        response = self._to_response(thread_id, message_id, result, is_new_patient)
+        yield "done", response.model_dump(mode="json")
+
+    async def _batch_item(self, request: MessageRequest) -> BatchItemResult:
+        """Process one batch message, capturing its error instead of raising."""
+        result = BatchItemResult(thread_id=request.thread_id, message_id=request.message_id)
+        try:
+            result.response = await self.respond(request)
+        except ThreadBusyError as e:
+            result.status, result.error = 409, str(e)
+        except Exception as e:
+            result.status, result.error = 500, str(e)
+        return result
+
+    def _to_response(
+        self, thread_id: str, message_id: str, result: dict, is_new_patient: bool
+    ) -> MessageResponse:
+        """Build the API response from a turn's final graph state."""
         reply_text = ""
         for msg in reversed(result.get("messages", [])):
             if isinstance(msg, AIMessage):
@@ -86,3 +243,89 @@ class ChatServiceV2:
             is_new_patient=is_new_patient,
             onboarding_state=result.get("onboarding_state"),
         )
+
+    async def _run_turn(
+        self,
+        thread_id: str,
+        messages: list[QueuedMessage],
+        phone: str,
+        user_id: str | None,
+        is_new_conversation: bool,
+    ) -> tuple[dict, bool]:
+        """
+        Run the graph once for a batch of messages.
+
+        Returns:
+            The final graph state and whether the patient is new
+        """
+        # One turn per conversation at a time, across all workers
+        async with get_thread_locks().hold(thread_id):
+            graph_input, config, is_new_patient = await self._prepare_turn(
+                thread_id, messages, phone, user_id, is_new_conversation
+            )
+            result = await self.graph.ainvoke(graph_input, config=config)
+
+            # Drop this turn's tool-loop checkpoints in the background
+            if isinstance(self.graph.checkpointer, BoundedCheckpointer):
+                self.graph.checkpointer.turn_completed(thread_id)
+
+        # Fold older turns into the summary once the reply is on its way
+        get_history_manager().schedule(self.graph, thread_id, result.get("messages", []))
+        return result, is_new_patient
+
+    async def _prepare_turn(
+        self,
+        thread_id: str,
+        messages: list[QueuedMessage],
+        phone: str,
+        user_id: str | None,
+        is_new_conversation: bool,
+    ) -> tuple[dict, dict, bool]:
+        """
+        Build the graph input and config for a turn.
+
+        Returns:
+            The graph input, the run config and whether the patient is new
+        """
+        # Check if patient exists (shared with every tool call in this turn)
+        patient_context = PatientContext(self.patient_repo)
+        patient_data = await patient_context.get_patient(phone)
+        is_new_patient = patient_data is None
+
+        # One HumanMessage for the whole burst. The state id is generated (a redelivered
+        # client id must not replace an earlier message); client ids ride along.
+        human_message = HumanMessage(
+            content="\n".join(queued.content for queued in messages),
+            id=str(uuid4()),
+            additional_kwargs={MESSAGE_IDS_KEY: [queued.message_id for queued in messages]},
+        )
+
+        graph_input = {
+            "messages": [human_message],
+            "phone_number": phone,
+            "is_new_patient": is_new_patient,
+            "is_new_conversation": is_new_conversation,
+            "patient_data": patient_data,
+            "user_id": user_id,
+            "conversation_id": thread_id,  # Pass thread_id as conversation_id for CMS
+        }
+        config = {
+            "configurable": {
+                "thread_id": thread_id,
+                PATIENT_CONTEXT_KEY: patient_context,
+            },
+            "run_name": "Pausiva Chat V2",
+            "tags": ["whatsapp", "patient", f"phone:{phone}", "v2"],
+        }
+        return graph_input, config, is_new_patient
+
+
+def _chunk_text(content: str | list) -> str:
+    """Text of a streamed message chunk (providers may send content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content
+        if not isinstance(block, dict) or block.get("type") == "text"
+    )
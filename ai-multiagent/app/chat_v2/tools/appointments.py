@@ -4,20 +4,20 @@ from datetime import datetime, timedelta
 from typing import Optional
 from uuid import uuid4
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.shared.database import (
-    AppointmentRepository,
-    FollowingRepository,
-    PatientRepository,
-)
+from app.shared.database import Doctor, get_appointment_repository, get_doctor_directory
+
+from ..context import get_patient_context
 
 
 # Mockup available appointments (future dates from Dec 2025 onwards)
-def _get_mock_available_slots() -> list[dict]:
+def _get_mock_available_slots(doctors: list[Doctor]) -> list[dict]:
     """Generate mock available appointment slots for demo purposes.
 
-    In production, this would integrate with a calendar API.
+    Each doctor offers their consulting hours on weekdays. In production,
+    this would integrate with a calendar API.
     """
     base_date = datetime(2025, 12, 2)  # Monday Dec 2, 2025
     slots = []
@@ -29,47 +29,31 @@ def _get_mock_available_slots() -> list[dict]:
         if current_date.weekday() >= 5:
             continue
 
-        # Morning slots (9:00, 10:00, 11:00)
-        for hour in [9, 10, 11]:
-            slot_datetime = current_date.replace(hour=hour, minute=0, second=0)
-            slots.append(
-                {
-                    "id": str(uuid4()),
-                    "datetime": slot_datetime.isoformat(),
-                    "date": slot_datetime.strftime("%Y-%m-%d"),
-                    "time": slot_datetime.strftime("%H:%M"),
-                    "day_name": slot_datetime.strftime("%A"),
-                    "formatted": slot_datetime.strftime("%d de %B a las %H:%M"),
-                    "available": True,
-                    "specialist": "Dra. María García",
-                    "specialty": "Ginecología",
-                    "type": "consulta",
-                }
-            )
-
-        # Afternoon slots (15:00, 16:00, 17:00)
-        for hour in [15, 16, 17]:
-            slot_datetime = current_date.replace(hour=hour, minute=0, second=0)
-            slots.append(
-                {
-                    "id": str(uuid4()),
-                    "datetime": slot_datetime.isoformat(),
-                    "date": slot_datetime.strftime("%Y-%m-%d"),
-                    "time": slot_datetime.strftime("%H:%M"),
-                    "day_name": slot_datetime.strftime("%A"),
-                    "formatted": slot_datetime.strftime("%d de %B a las %H:%M"),
-                    "available": True,
-                    "specialist": "Dra. María García",
-                    "specialty": "Ginecología",
-                    "type": "consulta",
-                }
-            )
-
-    return slots[:20]  # Return first 20 slots
+        for doctor in doctors:
+            for hour in doctor.slot_hours:
+                slot_datetime = current_date.replace(hour=hour, minute=0, second=0)
+                slots.append(
+                    {
+                        "id": str(uuid4()),
+                        "datetime": slot_datetime.isoformat(),
+                        "date": slot_datetime.strftime("%Y-%m-%d"),
+                        "time": slot_datetime.strftime("%H:%M"),
+                        "day_name": slot_datetime.strftime("%A"),
+                        "formatted": slot_datetime.strftime("%d de %B a las %H:%M"),
+                        "available": True,
+                        "doctor_id": doctor.id,
+                        "specialist": doctor.name,
+                        "specialty": doctor.specialty,
+                        "type": "consulta",
+                    }
+                )
+
+    slots.sort(key=lambda slot: slot["datetime"])
+    return slots
 
 
 @tool
-def get_available_appointments(
+async def get_available_appointments(
     phone: str,
     specialist_type: Optional[str] = None,
     preferred_date: Optional[str] = None,
@@ -93,6 +77,7 @@ def get_available_appointments(
     - date: YYYY-MM-DD format
     - time: HH:MM format
     - formatted: human readable date/time in Spanish
+    - doctor_id: doctor to book with (pass it to schedule_meeting)
     - specialist: doctor name
     - specialty: doctor specialty
     - available: boolean (always true in this list)
@@ -110,17 +95,20 @@ def get_available_appointments(
         specialist_type: Filter by specialty (e.g., "ginecólogo", "nutricionista")
         preferred_date: Optional preferred date in YYYY-MM-DD format
     """
-    slots = _get_mock_available_slots()
+    # Specialty matching runs against the in-memory doctor directory
+    directory = get_doctor_directory()
+    await directory.ensure_loaded()
+    slots = _get_mock_available_slots(directory.by_specialty(specialist_type))
 
     # Filter by date if provided
     if preferred_date:
         slots = [s for s in slots if s["date"] == preferred_date]
 
-    return slots
+    return slots[:20]  # Return first 20 slots
 
 
 @tool
-def get_next_appointment(phone: str) -> Optional[dict]:
+async def get_next_appointment(phone: str, config: RunnableConfig) -> Optional[dict]:
     """Get ONLY the next upcoming appointment for a patient.
 
     WHEN TO USE THIS vs get_available_appointments:
@@ -133,7 +121,7 @@ def get_next_appointment(phone: str) -> Optional[dict]:
     - "Mi próxima consulta" → get_next_appointment(phone)
 
     RETURNS:
-    - Single appointment dict if found (scheduled_at, type, status, doctor info)
+    - Single appointment dict if found (id, date, time, type, status, doctor_name)
     - None if no upcoming appointments
 
     RESPONSE GUIDANCE based on result:
@@ -144,41 +132,40 @@ def get_next_appointment(phone: str) -> Optional[dict]:
     Args:
         phone: Patient phone number
     """
-    patient_repo = PatientRepository()
-    appointment_repo = AppointmentRepository()
+    appointment_repo = get_appointment_repository()
 
     # Look up patient
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return None
 
-    appointments = appointment_repo.get_by_patient(
+    appointments = await appointment_repo.get_summaries(
         patient_id=patient["id"],
         include_past=False,
         limit=1,
     )
-    return appointments[0] if appointments else None
-
-
-DEFAULT_DOCTOR_ID = "d4d03d47-b205-445e-ac54-dcc66b0b0e57"
+    return appointments[0].as_dict() if appointments else None
 
 
 @tool
-def schedule_meeting(
+async def schedule_meeting(
     phone: str,
     slot_date: str,
     slot_time: str,
+    config: RunnableConfig,
     conversation_id: Optional[str] = None,
     reason: Optional[str] = None,
     specialist_type: str = "ginecólogo",
+    doctor_id: Optional[str] = None,
 ) -> dict:
     """Schedule a meeting by creating an appointment AND a following record.
 
-    IMPORTANT: This tool performs TWO operations in order:
-    1. Creates an appointment record in the database (with conversation_id)
-    2. Creates a following record with type="business" (with conversation_id)
+    IMPORTANT: This tool creates TWO records atomically (both or neither):
+    1. An appointment record in the database (with conversation_id)
+    2. A following record with type="business" linked to it (with conversation_id)
 
     Both records store the conversation_id to map them back to this chat in the CMS.
+    If it returns status="error", nothing was booked: apologize and offer to try again.
 
     WHEN TO USE:
     - Patient has chosen a specific date/time from get_available_appointments
@@ -189,7 +176,8 @@ def schedule_meeting(
     1. Patient: "Quiero agendar una cita"
     2. Agent: calls get_available_appointments() → shows options
     3. Patient: "El lunes a las 10"
-    4. Agent: calls schedule_meeting(phone, "2025-12-02", "10:00", conversation_id, ...)
+    4. Agent: calls schedule_meeting(phone, "2025-12-02", "10:00", conversation_id,
+       doctor_id=<doctor_id of the chosen slot>, ...)
 
     DATE/TIME FORMAT:
     - slot_date: YYYY-MM-DD format (e.g., "2025-12-02")
@@ -211,21 +199,16 @@ def schedule_meeting(
         conversation_id: Conversation UUID for CMS mapping (from thread_id)
         reason: Optional reason for the appointment
         specialist_type: Type of specialist (default: "ginecólogo")
+        doctor_id: doctor_id of the chosen slot (if omitted, any doctor of specialist_type)
     """
-    patient_repo = PatientRepository()
-    appointment_repo = AppointmentRepository()
-    following_repo = FollowingRepository()
-
     # Look up patient
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return {
             "status": "error",
             "message": "No se encontró el paciente. Por favor, regístrate primero.",
         }
 
-    patient_id = patient["id"]
-
     # Parse the datetime
     try:
         scheduled_datetime = datetime.strptime(f"{slot_date} {slot_time}", "%Y-%m-%d %H:%M")
@@ -236,87 +219,61 @@ def schedule_meeting(
             "Usa YYYY-MM-DD para fecha y HH:MM para hora.",
         }
 
-    notes = reason or f"Cita agendada vía WhatsApp - {specialist_type}"
-
-    # =========================================================================
-    # STEP 1: Create the appointment FIRST (with conversation_id)
-    # =========================================================================
-    appointment = None
-    appointment_id = None
-    appointment_created_in_db = False
-
-    try:
-        # Try to create appointment in DB with default doctor
-        appointment = appointment_repo.create(
-            patient_id=patient_id,
-            doctor_id=DEFAULT_DOCTOR_ID,
-            scheduled_at=scheduled_datetime,
-            appointment_type="consulta",
-            notes=notes,
-            conversation_id=conversation_id,  # Map to conversation for CMS
-        )
-        if appointment:
-            appointment_id = appointment.get("id")
-            appointment_created_in_db = True
-    except Exception as e:
-        print(f"Error creating appointment in DB: {e}")
-
-    # If DB creation failed, create a mock appointment response (for UI display only)
-    if not appointment:
-        appointment_id = str(uuid4())
-        appointment = {
-            "id": appointment_id,
-            "patient_id": patient_id,
-            "doctor_id": DEFAULT_DOCTOR_ID,
-            "scheduled_at": scheduled_datetime.isoformat(),
-            "type": "consulta",
-            "status": "scheduled",
-            "notes": notes,
-            "conversation_id": conversation_id,
-            "created_at": datetime.now().isoformat(),
-            "_mock": True,  # Flag to indicate this is a mock response
+    directory = get_doctor_directory()
+    await directory.ensure_loaded()
+    doctor = directory.get(doctor_id) or directory.pick(specialist_type)
+    if not doctor:
+        return {
+            "status": "error",
+            "message": "No hay especialistas disponibles en este momento. "
+            "Por favor, intenta más tarde.",
         }
 
-    # =========================================================================
-    # STEP 2: Create the following AFTER the appointment (with conversation_id)
-    # =========================================================================
+    notes = reason or f"Cita agendada vía WhatsApp - {specialist_type}"
     formatted_date = scheduled_datetime.strftime("%d/%m/%Y a las %H:%M")
 
-    # Only link appointment_id if appointment was actually created in DB
-    # (foreign key constraint requires it to exist)
-    db_appointment_id = appointment_id if appointment_created_in_db else None
-
-    following = following_repo.create(
-        patient_id=patient_id,
-        following_type="business",
-        summary=f"Cita agendada: {formatted_date} - {specialist_type}",
-        severity_score=None,
-        is_urgent=False,
-        appointment_id=db_appointment_id,  # Only link if appointment exists in DB
+    # Appointment + business following are created atomically in one RPC
+    booking = await get_appointment_repository().book(
+        patient_id=patient["id"],
+        doctor_id=doctor.id,
+        scheduled_at=scheduled_datetime,
+        appointment_type="consulta",
+        notes=notes,
         conversation_id=conversation_id,  # Map to conversation for CMS
+        following_summary=f"Cita agendada: {formatted_date} - {doctor.name or specialist_type}",
     )
 
-    # Verify following was created
-    if not following:
-        print(f"Warning: Following record not created for appointment {appointment_id}")
+    if not booking:
+        return {
+            "status": "error",
+            "message": "No se pudo agendar la cita en este momento. Por favor, intenta de nuevo.",
+        }
+
+    with_doctor = f" con {doctor.name}" if doctor.name else ""
+    appointment = booking.get("appointment") or {}
+    following = booking.get("following")
 
     return {
         "status": "success",
         "appointment": appointment,
         "following": following,
-        "appointment_id": appointment_id,
-        "appointment_in_db": appointment_created_in_db,
+        "appointment_id": appointment.get("id"),
+        "doctor_name": doctor.name,
         "conversation_id": conversation_id,
         "following_created": following is not None,
         "message": (
-            f"Tu cita ha sido agendada para el {formatted_date}. "
+            f"Tu cita ha sido agendada para el {formatted_date}{with_doctor}. "
             "Te enviaremos un recordatorio antes de la consulta."
         ),
     }
 
 
 @tool
-def get_appointment_info(phone: str, appointment_id: str) -> Optional[dict]:
+async def get_appointment_info(
+    phone: str,
+    appointment_id: str,
+    config: RunnableConfig,
+) -> Optional[dict]:
     """Get detailed information about a specific appointment by ID.
 
     WHEN TO USE:
@@ -342,21 +299,21 @@ def get_appointment_info(phone: str, appointment_id: str) -> Optional[dict]:
         phone: Patient phone number (for validation that appointment belongs to them)
         appointment_id: UUID of the specific appointment
     """
-    patient_repo = PatientRepository()
-    appointment_repo = AppointmentRepository()
+    appointment_repo = get_appointment_repository()
 
     # Look up patient
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return None
 
-    return appointment_repo.get_by_id(appointment_id, patient_id=patient["id"])
+    return await appointment_repo.get_by_id(appointment_id, patient_id=patient["id"])
 
 
 @tool
-def cancel_appointment_request(
+async def cancel_appointment_request(
     phone: str,
     appointment_id: str,
+    config: RunnableConfig,
     reason: Optional[str] = None,
 ) -> dict:
     """Request cancellation of an existing appointment.
@@ -389,8 +346,7 @@ def cancel_appointment_request(
         appointment_id: UUID of the appointment to cancel (get from get_next_appointment)
         reason: Brief reason for cancellation (optional but helpful)
     """
-    patient_repo = PatientRepository()
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
 
     return {
         "status": "cancellation_requested",
@@ -2,17 +2,21 @@
 
 from typing import Literal, Optional
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.shared.database import FollowingRepository, PatientRepository
+from app.shared.database import get_following_repository
+
+from ..context import get_patient_context
 
 FollowingType = Literal["emotional", "symptoms", "medications", "business", "other"]
 
 
 @tool
-def create_following(
+async def create_following(
     phone: str,
     following_type: FollowingType,
+    config: RunnableConfig,
     summary: Optional[str] = None,
     severity_score: Optional[int] = None,
     is_urgent: bool = False,
@@ -68,17 +72,16 @@ def create_following(
         appointment_id: Link to related appointment UUID if applicable
         conversation_id: Conversation UUID for CMS mapping (from thread_id)
     """
-    patient_repo = PatientRepository()
-    following_repo = FollowingRepository()
+    following_repo = get_following_repository()
 
     # Look up patient by phone
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return None
 
     patient_id = patient["id"]
 
-    return following_repo.create(
+    return await following_repo.create(
         patient_id=patient_id,
         following_type=following_type,
         summary=summary,
@@ -86,12 +89,14 @@ def create_following(
         is_urgent=is_urgent,
         appointment_id=appointment_id,
         conversation_id=conversation_id,
+        deferred=True,
     )
 
 
 @tool
-def get_followings(
+async def get_followings(
     phone: str,
+    config: RunnableConfig,
     following_type: Optional[FollowingType] = None,
     limit: int = 10,
 ) -> list[dict]:
@@ -126,25 +131,25 @@ def get_followings(
         following_type: Filter to specific type, or None for all types
         limit: Max records to return (default 10, most recent first)
     """
-    patient_repo = PatientRepository()
-    following_repo = FollowingRepository()
+    following_repo = get_following_repository()
 
     # Look up patient by phone
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return []
 
     patient_id = patient["id"]
 
-    return following_repo.get_by_patient(
+    followings = await following_repo.get_summaries(
         patient_id=patient_id,
         limit=limit,
         following_type=following_type,
     )
+    return [following.as_dict() for following in followings]
 
 
 @tool
-def get_urgent_followings(phone: str) -> list[dict]:
+async def get_urgent_followings(phone: str, config: RunnableConfig) -> list[dict]:
     """Get any URGENT following records that may need immediate attention.
 
     WHEN TO USE:
@@ -169,17 +174,17 @@ def get_urgent_followings(phone: str) -> list[dict]:
     Args:
         phone: Patient phone number
     """
-    patient_repo = PatientRepository()
-    following_repo = FollowingRepository()
+    following_repo = get_following_repository()
 
     # Look up patient by phone
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return []
 
     patient_id = patient["id"]
 
-    return following_repo.get_urgent_by_patient(patient_id)
+    followings = await following_repo.get_summaries(patient_id=patient_id, urgent_only=True)
+    return [following.as_dict() for following in followings]
 
 
 # Export all tools
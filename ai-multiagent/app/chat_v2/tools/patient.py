@@ -2,13 +2,16 @@
 
 from typing import Optional
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.shared.database import PatientRepository
+from app.shared.database import OnboardingStatus, get_patient_repository
+
+from ..context import get_patient_context
 
 
 @tool
-def get_patient_by_phone(phone: str) -> Optional[dict]:
+async def get_patient_by_phone(phone: str, config: RunnableConfig) -> Optional[dict]:
     """Look up a patient by their phone number to determine if they exist in the system.
 
     WHEN TO USE:
@@ -33,13 +36,13 @@ def get_patient_by_phone(phone: str) -> Optional[dict]:
     Args:
         phone: Patient phone number exactly as provided in context (e.g., "+51999999999")
     """
-    repo = PatientRepository()
-    return repo.get_by_phone(phone)
+    return await get_patient_context(config).get_patient(phone)
 
 
 @tool
-def update_patient_info(
+async def update_patient_info(
     phone: str,
+    config: RunnableConfig,
     name: str = "",
     email: str = "",
     birth_date: str = "",
@@ -77,10 +80,10 @@ def update_patient_info(
         birth_date: Patient birth date in YYYY-MM-DD format (optional)
         clinical_profile: Clinical profile data dict to merge (optional, advanced use)
     """
-    repo = PatientRepository()
+    context = get_patient_context(config)
 
     # First check if patient exists
-    existing = repo.get_by_phone(phone)
+    existing = await context.get_patient(phone)
     if not existing:
         # Patient should have been created by wa-agent-gateway
         print(
@@ -102,13 +105,16 @@ def update_patient_info(
         # Nothing to update, return current data
         return existing
 
-    return repo.create_or_update(phone, data)
+    updated = await get_patient_repository().create_or_update(phone, data)
+    context.refresh(phone, updated)
+    return updated
 
 
 @tool
-def update_onboarding_state(
+async def update_onboarding_state(
     phone: str,
     new_state: str,
+    config: RunnableConfig,
     additional_data: Optional[dict] = None,
 ) -> Optional[dict]:
     """Update the onboarding state for a patient to track progress through FLUJO 1.
@@ -132,6 +138,8 @@ def update_onboarding_state(
     TOOL COMBINATION - After updating state, typically also call:
     - create_following(phone, "business", summary="Onboarding: [description of step]")
 
+    RETURNS: id, name, onboarding_state and the rest of clinical_profile (None if not found)
+
     Args:
         phone: Patient phone number
         new_state: One of: "new", "collecting_info", "scheduling_appointment", "completed"
@@ -140,20 +148,20 @@ def update_onboarding_state(
             - {"collected_name": true}
             - {"first_consultation_scheduled": true}
     """
-    repo = PatientRepository()
+    context = get_patient_context(config)
 
-    # Get current patient to merge clinical profile
-    patient = repo.get_by_phone(phone)
+    patient = await context.get_patient(phone)
     if not patient:
         return None
 
-    current_profile = patient.get("clinical_profile", {}) or {}
-    current_profile["onboarding_state"] = new_state
-
+    # Merged server-side, so concurrent updates to other keys aren't lost
+    patch: dict = {"onboarding_state": new_state}
     if additional_data:
-        current_profile.update(additional_data)
+        patch.update(additional_data)
 
-    return repo.create_or_update(phone, {"clinical_profile": current_profile})
+    updated = await get_patient_repository().merge_clinical_profile(patient["id"], patch)
+    context.refresh(phone, updated)
+    return OnboardingStatus.from_patient(updated).as_dict() if updated else None
 
 
 # Export all tools
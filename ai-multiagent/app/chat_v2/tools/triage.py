@@ -2,9 +2,12 @@
 
 from typing import Literal, Optional
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.shared.database import FollowingRepository, PatientRepository
+from app.shared.database import get_following_repository
+
+from ..context import get_patient_context
 
 # Risk assessment keywords
 HIGH_RISK_KEYWORDS = [
@@ -77,7 +80,7 @@ def _quick_assess(message: str) -> tuple[RiskLevel, int]:
 
 
 @tool
-def assess_symptoms(
+async def assess_symptoms(
     phone: str,
     symptom_description: str,
 ) -> dict:
@@ -161,9 +164,10 @@ def assess_symptoms(
 
 
 @tool
-def record_symptom_report(
+async def record_symptom_report(
     phone: str,
     symptom_description: str,
+    config: RunnableConfig,
     risk_level: RiskLevel = "none",
     risk_score: int = 0,
 ) -> Optional[dict]:
@@ -196,25 +200,25 @@ def record_symptom_report(
         risk_level: From assess_symptoms result - "none", "low", "medium", "high"
         risk_score: From assess_symptoms result - 0-10
     """
-    patient_repo = PatientRepository()
-    following_repo = FollowingRepository()
+    following_repo = get_following_repository()
 
     # Look up patient
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return None
 
-    return following_repo.create(
+    return await following_repo.create(
         patient_id=patient["id"],
         following_type="symptoms",
         summary=symptom_description[:500],
         severity_score=risk_score,
         is_urgent=risk_level == "high",
+        deferred=True,
     )
 
 
 @tool
-def get_symptom_history(phone: str, limit: int = 10) -> list[dict]:
+async def get_symptom_history(phone: str, config: RunnableConfig, limit: int = 10) -> list[dict]:
     """Get patient's history of symptom reports for context and continuity.
 
     WHEN TO USE:
@@ -243,19 +247,19 @@ def get_symptom_history(phone: str, limit: int = 10) -> list[dict]:
         phone: Patient phone number
         limit: Max records to return (default 10, most recent first)
     """
-    patient_repo = PatientRepository()
-    following_repo = FollowingRepository()
+    following_repo = get_following_repository()
 
     # Look up patient
-    patient = patient_repo.get_by_phone(phone)
+    patient = await get_patient_context(config).get_patient(phone)
     if not patient:
         return []
 
-    return following_repo.get_by_patient(
+    followings = await following_repo.get_summaries(
         patient_id=patient["id"],
         limit=limit,
         following_type="symptoms",
     )
+    return [following.as_dict() for following in followings]
 
 
 # Export all tools
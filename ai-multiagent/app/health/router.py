@@ -1,7 +1,20 @@
 """Health check router."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from app.chat_v2.history import get_history_manager
+from app.shared.concurrency import (
+    get_idempotency_cache,
+    get_thread_locks,
+    get_turn_coalescer,
+)
+from app.shared.database import (
+    get_doctor_directory,
+    get_patient_cache,
+    get_write_behind_queue,
+)
+from app.shared.llm import get_model_registry, get_usage_tracker
+
 router = APIRouter(tags=["Health"])
 
 
@@ -22,3 +35,48 @@ async def health_check() -> HealthResponse:
     """
     return HealthResponse(status="ok", service="pausiva-api")
 
+
+class StatsResponse(BaseModel):
+    """In-process cache and resource counters."""
+
+    patient_cache: dict
+    doctor_directory: dict
+    write_behind: dict
+    checkpointers: list[dict]
+    thread_locks: dict
+    turn_queues: dict
+    idempotency: dict
+    models: dict
+    llm_usage: dict
+    history: dict
+
+
+@router.get("/health/stats", response_model=StatsResponse)
+async def stats(request: Request) -> StatsResponse:
+    """
+    Runtime counters for this worker process.
+
+    Internal only, like the rest of this service: it has no auth and relies on
+    the container publishing no ports (the gateway is the public entry point
+    and does not proxy it). Counters include thread counts and cache sizes, so
+    don't route it through a public proxy.
+
+    Returns:
+        StatsResponse with cache, doctor directory, write-behind queue and
+        checkpointer counters (threads, expiries, memory footprint), thread locks,
+        turn queues, idempotency cache, model registry (build and warm-up timings)
+        token usage (prompt-cache hit rate) and history summarization
+    """
+    checkpointers = getattr(request.app.state, "checkpointers", [])
+    return StatsResponse(
+        patient_cache=get_patient_cache().stats(),
+        doctor_directory=get_doctor_directory().stats(),
+        write_behind=get_write_behind_queue().stats(),
+        checkpointers=[checkpointer.stats() for checkpointer in checkpointers],
+        thread_locks=get_thread_locks().stats(),
+        turn_queues={name: get_turn_coalescer(name).stats() for name in ("v1", "v2")},
+        idempotency=get_idempotency_cache().stats(),
+        models=get_model_registry().stats(),
+        llm_usage=get_usage_tracker().stats(),
+        history=get_history_manager().stats(),
+    )
@@ -1,16 +1,34 @@
 """Application lifecycle management."""
 
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import TypedDict
 
 from fastapi import FastAPI
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph.state import CompiledStateGraph
 
 from app.chat.orchestrator import graph_builder
 from app.chat_v2.agent import compile_graph as compile_v2_graph
+from app.chat_v2.history import get_history_manager
+from app.chat_v2.pruning import ToolResultArchive
+from app.shared.checkpoint import (
+    BoundedCheckpointer,
+    bounded_checkpointer,
+    open_archive_store,
+    open_checkpoint_store,
+)
+from app.shared.concurrency import get_idempotency_cache, get_thread_locks
 from app.shared.config import get_settings
+from app.shared.database import (
+    SupabaseClient,
+    get_doctor_directory,
+    get_local_database,
+    get_postgres_database,
+    get_write_behind_queue,
+    uses_local_backend,
+    uses_postgres_backend,
+)
+from app.shared.llm import close_llm_http_clients, get_model_registry
 
 
 class LifespanState(TypedDict):
@@ -18,6 +36,7 @@ class LifespanState(TypedDict):
 
     chat_graph: CompiledStateGraph
     chat_v2_graph: CompiledStateGraph
+    checkpointers: list[BoundedCheckpointer]
 
 
 @asynccontextmanager
@@ -38,25 +57,103 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[LifespanState, None]:
     else:
         print("○ LangSmith tracing disabled (set LANGCHAIN_TRACING_V2=true and LANGCHAIN_API_KEY)")
 
-    # Create checkpointers for conversation memory
-    # Using MemorySaver for development - in production use PostgresSaver
-    # from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-    checkpointer_v1 = MemorySaver()
-    checkpointer_v2 = MemorySaver()
+    # Open the database up front so the first request is warm
+    if uses_local_backend():
+        local_db = get_local_database()
+        print(f"✓ Local database backend ({local_db.path}): {local_db.count('patients')} patients")
+    elif uses_postgres_backend():
+        if await get_postgres_database().get_pool():
+            print("✓ Postgres pool ready (asyncpg, direct connection)")
+        else:
+            print("⚠️ Postgres backend selected but not available (DATABASE_URL / asyncpg)")
+    elif await SupabaseClient.get_async_client():
+        print("✓ Supabase async client ready (shared HTTP pool)")
+    else:
+        print("○ Supabase not configured - repositories will return empty results")
+
+    # Doctors are resolved in memory instead of joined into appointment queries
+    doctor_directory = get_doctor_directory()
+    await doctor_directory.start()
+    print(f"✓ Doctor directory loaded ({len(doctor_directory.all())} doctors)")
+
+    # Background writer for followings / timeline events
+    write_behind = get_write_behind_queue()
+    write_behind.start()
+
+    # Checkpoint store for conversation memory, shared by both graphs with
+    # per-graph thread namespaces, TTL expiry and a thread cap
+    exit_stack = AsyncExitStack()
+    checkpoint_store = await exit_stack.enter_async_context(open_checkpoint_store())
+    checkpointer_v1 = bounded_checkpointer(checkpoint_store, namespace="v1")
+    checkpointer_v2 = bounded_checkpointer(checkpoint_store, namespace="v2")
+    checkpointers = [checkpointer_v1, checkpointer_v2]
+    for checkpointer in checkpointers:
+        await checkpointer.start()
+    print(
+        f"✓ Checkpointer ready ({checkpointer_v1.backend}, "
+        f"{checkpointer_v1.threads + checkpointer_v2.threads} stored threads)"
+    )
+
+    # Turns of a conversation must not interleave across worker processes
+    thread_locks = get_thread_locks()
+    if thread_locks.distributed:
+        print("✓ Thread locks shared through Redis")
+    elif settings.THREAD_LOCK_BACKEND == "redis":
+        print("⚠️ Redis thread locks selected but not available (REDIS_URL / redis package)")
+    if settings.WEB_CONCURRENCY > 1 and (
+        checkpointer_v1.backend == "memory" or not thread_locks.distributed
+    ):
+        print(
+            f"⚠️ {settings.WEB_CONCURRENCY} workers need a shared CHECKPOINT_BACKEND "
+            "and THREAD_LOCK_BACKEND=redis, or conversations will diverge between workers"
+        )
+
+    # Raw tool results pruned from v2 state are archived next to the checkpoints
+    archive_store = await exit_stack.enter_async_context(open_archive_store())
+    history_manager = get_history_manager()
+    if archive_store is not None:
+        history_manager.archive = ToolResultArchive(archive_store, namespace="v2")
+        print("✓ Tool result archive ready")
+    elif history_manager.prune_rules is not None:
+        print("○ Tool results are pruned without an archive (memory checkpoint backend)")
 
     # Compile V1 graph (multi-agent orchestrator)
     chat_graph = graph_builder.compile(checkpointer=checkpointer_v1)
-    print("✓ Chat V1 graph compiled with checkpointer (MemorySaver)")
+    print("✓ Chat V1 graph compiled with checkpointer")
 
     # Compile V2 graph (single agent with tools)
     chat_v2_graph = compile_v2_graph(checkpointer=checkpointer_v2)
-    print("✓ Chat V2 graph compiled with checkpointer (MemorySaver)")
+    print("✓ Chat V2 graph compiled with checkpointer")
+
+    # Tool-bound models were built while compiling (the summarizer is built here);
+    # open their connections now
+    if history_manager.token_budget > 0:
+        history_manager.summary_model()
+    model_registry = get_model_registry()
+    if settings.LLM_WARMUP_TIMEOUT > 0:
+        await model_registry.warm(timeout=settings.LLM_WARMUP_TIMEOUT)
+    print(f"✓ Model registry ready ({len(model_registry.stats()['models'])} models)")
 
     # Explicitly set on app.state for dependencies to access via request.app.state
     app.state.chat_graph = chat_graph
     app.state.chat_v2_graph = chat_v2_graph
+    app.state.checkpointers = checkpointers
 
-    yield LifespanState(chat_graph=chat_graph, chat_v2_graph=chat_v2_graph)
+    yield LifespanState(
+        chat_graph=chat_graph, chat_v2_graph=chat_v2_graph, checkpointers=checkpointers
+    )
 
     # Shutdown
     print("Shutting down Pausiva API")
+    await doctor_directory.stop()
+    await history_manager.stop()
+    for checkpointer in checkpointers:
+        await checkpointer.stop()
+    await exit_stack.aclose()
+    await thread_locks.close()
+    await get_idempotency_cache().close()
+    await close_llm_http_clients()
+    await write_behind.stop()
+    print(f"✓ Write-behind queue flushed ({write_behind.written} rows written)")
+    await SupabaseClient.close()
+    await get_postgres_database().close()
@@ -28,6 +28,8 @@ class AgentResponse(BaseModel):
     appointments: list[dict] = Field(default_factory=list)
     follow_up_questions: list[str] = Field(default_factory=list)
     agent_used: Optional[str] = None
+    # Message ID that carries the reply when this message joined a later one's turn
+    coalesced_into: Optional[str] = None
 
     @classmethod
     def error_response(
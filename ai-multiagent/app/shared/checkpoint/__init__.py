@@ -0,0 +1,11 @@
+"""Conversation checkpoint storage module."""
+
+from .bounded import BoundedCheckpointer
+from .savers import bounded_checkpointer, open_archive_store, open_checkpoint_store
+
+__all__ = [
+    "BoundedCheckpointer",
+    "bounded_checkpointer",
+    "open_archive_store",
+    "open_checkpoint_store",
+]
@@ -0,0 +1,482 @@
+"""Checkpointer wrapper with per-thread TTL, a thread cap and a background sweeper."""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import datetime
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from .compaction import checkpoint_time, delete_checkpoints, latest_checkpoint_ids, select_stale
+
+
+class BoundedCheckpointer(BaseCheckpointSaver):
+    """
+    Wraps a checkpoint saver so the threads it holds stay bounded.
+
+    Every read or write of a thread refreshes its last-access time. A
+    background task (`start()` / `stop()`, lifespan.py) deletes threads idle
+    for more than `ttl_seconds` and, beyond `max_threads`, the least recently
+    used ones; going over the cap wakes it early. On durable stores the index
+    is rebuilt from the stored checkpoints on startup, and a thread's latest
+    checkpoint is re-read before it is expired, so a thread another worker
+    kept alive is not deleted.
+
+    With `keep_latest` set, `turn_completed()` queues the thread for
+    compaction: the same task then deletes that turn's intermediate
+    checkpoints and all but the latest `keep_latest` turns (see
+    compaction.py), so a long-lived thread's history stays bounded.
+
+    Several graphs can share one saver: `namespace` prefixes the stored
+    thread ids ("v1:<thread_id>") and is stripped from returned configs.
+    """
+
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        ttl_seconds: float,
+        max_threads: int,
+        sweep_interval: float,
+        namespace: str = "",
+        backend: str = "memory",
+        store_path: str | None = None,
+        keep_latest: int = 0,
+    ):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.sweep_interval = sweep_interval
+        self.namespace = namespace
+        self.backend = backend
+        self.store_path = store_path
+        self.keep_latest = keep_latest
+        # Stored thread id -> last access (time.monotonic), least recent first
+        self._threads: OrderedDict[str, float] = OrderedDict()
+        # Stored thread id -> latest root checkpoint id written by this process
+        self._latest: dict[str, str] = {}
+        # Stored thread id -> newest checkpoint id to consider when compacting
+        self._to_compact: dict[str, str] = {}
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.sweeps = 0
+        self.expired = 0
+        self.evicted = 0
+        self.compactions = 0
+        self.compacted = 0
+        self.failures = 0
+        # False once the saver turned out not to support deleting single checkpoints
+        self.compaction_supported: bool | None = None
+
+    @property
+    def threads(self) -> int:
+        """Threads currently tracked."""
+        return len(self._threads)
+
+    async def start(self) -> None:
+        """Index the stored threads and start the sweeper (no-op if running)."""
+        if self._task and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        try:
+            await self.seed()
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Checkpoint index rebuild failed ({self.namespace or self.backend}): {e}")
+        self._task = asyncio.create_task(self._run(), name=f"checkpoint-sweeper-{self.namespace}")
+
+    async def stop(self) -> None:
+        """Stop the sweeper."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def thread_ids(self) -> list[str]:
+        """Tracked thread ids (without the namespace), least recently used first."""
+        prefix = len(self.namespace) + 1 if self.namespace else 0
+        return [stored_id[prefix:] for stored_id in self._threads]
+
+    def turn_completed(self, thread_id: str) -> None:
+        """Queue a thread for compaction now that its turn has finished."""
+        stored_id = self._stored_id(thread_id)
+        if self.keep_latest <= 0 or stored_id not in self._latest:
+            return
+        self._to_compact[stored_id] = self._latest[stored_id]
+        if self._wake is not None:
+            self._wake.set()
+
+    async def acompact(self, thread_id: str, keep: int | None = None) -> int:
+        """
+        Compact a thread's history now.
+
+        Args:
+            thread_id: Thread to compact
+            keep: Turns to keep (defaults to `keep_latest`, at least 1)
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        return await self._compact(self._stored_id(thread_id), keep or self.keep_latest)
+
+    async def seed(self) -> None:
+        """
+        Rebuild the thread index from the checkpoints already stored.
+
+        Reads only each thread's newest checkpoint id (its write time is in
+        the id), not the checkpoints themselves.
+        """
+        last_seen: dict[str, float] = {}
+        latest = await latest_checkpoint_ids(self.saver)
+        if latest is not None:
+            for stored_id, checkpoint_id in latest.items():
+                if self._owns(stored_id):
+                    last_seen[stored_id] = _monotonic_from(checkpoint_time(checkpoint_id))
+        else:
+            async for checkpoint_tuple in self.saver.alist(None):
+                stored_id = checkpoint_tuple.config["configurable"]["thread_id"]
+                if not self._owns(stored_id):
+                    continue
+                seen = _monotonic_from_ts(checkpoint_tuple.checkpoint.get("ts"))
+                last_seen[stored_id] = max(seen, last_seen.get(stored_id, seen))
+        # Threads used since startup stay most recent; the oldest seeded goes first
+        for stored_id, seen in sorted(last_seen.items(), key=lambda item: item[1], reverse=True):
+            if stored_id not in self._threads:
+                self._threads[stored_id] = seen
+                self._threads.move_to_end(stored_id, last=False)
+
+    async def sweep(self) -> int:
+        """
+        Delete expired threads, then the least recently used beyond the cap.
+
+        Returns:
+            Number of threads deleted
+        """
+        now = time.monotonic()
+        victims: list[tuple[str, bool]] = []
+        remaining = len(self._threads)
+        for stored_id, seen in self._threads.items():
+            is_expired = now - seen > self.ttl_seconds
+            if not is_expired and remaining <= self.max_threads:
+                break
+            victims.append((stored_id, is_expired))
+            remaining -= 1
+
+        deleted = 0
+        for stored_id, is_expired in victims:
+            if is_expired and await self._touched_elsewhere(stored_id, now):
+                continue
+            if await self._delete(stored_id):
+                deleted += 1
+                if is_expired:
+                    self.expired += 1
+                else:
+                    self.evicted += 1
+        self.sweeps += 1
+        return deleted
+
+    def stats(self) -> dict:
+        """Counters and memory footprint for monitoring."""
+        return {
+            "backend": self.backend,
+            "namespace": self.namespace,
+            "threads": self.threads,
+            "max_threads": self.max_threads,
+            "ttl_seconds": self.ttl_seconds,
+            "sweeps": self.sweeps,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "keep_latest": self.keep_latest,
+            "compactions": self.compactions,
+            "compacted": self.compacted,
+            "compaction_supported": self.compaction_supported,
+            "failures": self.failures,
+            "store_bytes": self._store_bytes(),
+            "process_rss_bytes": _process_rss_bytes(),
+        }
+
+    # BaseCheckpointSaver interface (delegated to the wrapped saver)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        config = self._touch(config)
+        return self._tuple_out(self.saver.get_tuple(config))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        config = self._touch(config)
+        return self._tuple_out(await self.saver.aget_tuple(config))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        for checkpoint_tuple in self.saver.list(
+            self._config_in(config), filter=filter, before=self._config_in(before), limit=limit
+        ):
+            if self._owns(checkpoint_tuple.config["configurable"]["thread_id"]):
+                yield self._tuple_out(checkpoint_tuple)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for checkpoint_tuple in self.saver.alist(
+            self._config_in(config), filter=filter, before=self._config_in(before), limit=limit
+        ):
+            if self._owns(checkpoint_tuple.config["configurable"]["thread_id"]):
+                yield self._tuple_out(checkpoint_tuple)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        config = self._touch(config)
+        return self._written(self.saver.put(config, checkpoint, metadata, new_versions))
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        config = self._touch(config)
+        return self._written(await self.saver.aput(config, checkpoint, metadata, new_versions))
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.saver.put_writes(self._touch(config), writes, task_id, task_path)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self.saver.aput_writes(self._touch(config), writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        stored_id = self._stored_id(thread_id)
+        self._forget(stored_id)
+        self.saver.delete_thread(stored_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        stored_id = self._stored_id(thread_id)
+        self._forget(stored_id)
+        await self.saver.adelete_thread(stored_id)
+
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.saver.get_next_version(current, channel)
+
+    # Internals
+
+    def _stored_id(self, thread_id: str) -> str:
+        return f"{self.namespace}:{thread_id}" if self.namespace else str(thread_id)
+
+    def _owns(self, stored_id: str) -> bool:
+        return not self.namespace or str(stored_id).startswith(f"{self.namespace}:")
+
+    def _config_in(self, config: Optional[RunnableConfig]) -> Optional[RunnableConfig]:
+        if not config or not self.namespace:
+            return config
+        configurable = config.get("configurable", {})
+        thread_id = configurable.get("thread_id")
+        if thread_id is None:
+            return config
+        return {**config, "configurable": {**configurable, "thread_id": self._stored_id(thread_id)}}
+
+    def _config_out(self, config: Optional[RunnableConfig]) -> Optional[RunnableConfig]:
+        if not config or not self.namespace:
+            return config
+        configurable = config.get("configurable", {})
+        stored_id = configurable.get("thread_id")
+        if stored_id is None or not self._owns(stored_id):
+            return config
+        thread_id = stored_id[len(self.namespace) + 1 :]
+        return {**config, "configurable": {**configurable, "thread_id": thread_id}}
+
+    def _tuple_out(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None or not self.namespace:
+            return checkpoint_tuple
+        return checkpoint_tuple._replace(
+            config=self._config_out(checkpoint_tuple.config),
+            parent_config=self._config_out(checkpoint_tuple.parent_config),
+        )
+
+    def _touch(self, config: RunnableConfig) -> RunnableConfig:
+        """Translate the config to the stored thread id and mark the thread as used."""
+        config = self._config_in(config)
+        stored_id = config.get("configurable", {}).get("thread_id")
+        if stored_id is not None:
+            self._threads[stored_id] = time.monotonic()
+            self._threads.move_to_end(stored_id)
+            if len(self._threads) > self.max_threads and self._wake is not None:
+                self._wake.set()
+        return config
+
+    def _written(self, config: RunnableConfig) -> RunnableConfig:
+        """Remember the checkpoint just written (root namespace) and return the caller's config."""
+        configurable = config.get("configurable", {})
+        if not configurable.get("checkpoint_ns") and configurable.get("checkpoint_id"):
+            self._latest[configurable["thread_id"]] = configurable["checkpoint_id"]
+        return self._config_out(config)
+
+    def _forget(self, stored_id: str) -> None:
+        self._threads.pop(stored_id, None)
+        self._latest.pop(stored_id, None)
+        self._to_compact.pop(stored_id, None)
+
+    async def _compact(self, stored_id: str, keep: int, upto: str | None = None) -> int:
+        """Delete intermediate and old checkpoints up to checkpoint `upto` (default: all)."""
+        history = [
+            checkpoint_tuple
+            async for checkpoint_tuple in self.saver.alist(
+                {"configurable": {"thread_id": stored_id, "checkpoint_ns": ""}}
+            )
+            if upto is None or checkpoint_tuple.config["configurable"]["checkpoint_id"] <= upto
+        ]
+        stale = select_stale(history, keep)
+        if not stale:
+            return 0
+        if not await delete_checkpoints(self.saver, stored_id, stale):
+            if self.compaction_supported is None:
+                print(
+                    f"⚠️ {type(self.saver).__name__} can't delete single checkpoints: "
+                    "checkpoint compaction is disabled"
+                )
+            self.compaction_supported = False
+            return 0
+        self.compaction_supported = True
+        self.compactions += 1
+        self.compacted += len(stale)
+        return len(stale)
+
+    async def _compact_pending(self) -> None:
+        while self._to_compact:
+            stored_id, upto = self._to_compact.popitem()
+            try:
+                await self._compact(stored_id, self.keep_latest, upto)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Failed to compact checkpoint thread {stored_id}: {e}")
+
+    async def _touched_elsewhere(self, stored_id: str, now: float) -> bool:
+        """Re-read the latest checkpoint; True (and re-indexed) if it is newer than the TTL."""
+        if isinstance(self.saver, InMemorySaver):
+            return False
+        try:
+            latest = await self.saver.aget_tuple({"configurable": {"thread_id": stored_id}})
+        except Exception:
+            return False
+        if latest is None:
+            return False
+        seen = _monotonic_from_ts(latest.checkpoint.get("ts"))
+        if now - seen > self.ttl_seconds:
+            return False
+        if stored_id in self._threads:
+            self._threads[stored_id] = max(seen, self._threads[stored_id])
+            self._threads.move_to_end(stored_id)
+        return True
+
+    async def _delete(self, stored_id: str) -> bool:
+        self._forget(stored_id)
+        try:
+            await self.saver.adelete_thread(stored_id)
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Failed to delete checkpoint thread {stored_id}: {e}")
+            return False
+        return True
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.sweep_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self._compact_pending()
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Checkpoint sweep failed: {e}")
+
+    def _store_bytes(self) -> int | None:
+        """Size of the underlying store, when it can be measured in-process."""
+        if isinstance(self.saver, InMemorySaver):
+            return _bytes_in((self.saver.storage, self.saver.writes, self.saver.blobs))
+        if self.store_path and self.store_path != ":memory:":
+            try:
+                return os.path.getsize(self.store_path)
+            except OSError:
+                return None
+        return None
+
+
+def _monotonic_from_ts(ts: str | None) -> float:
+    """Convert a checkpoint's wall-clock timestamp to the time.monotonic() scale."""
+    try:
+        return _monotonic_from(datetime.fromisoformat(ts) if ts else None)
+    except ValueError:
+        return time.monotonic()
+
+
+def _monotonic_from(written: datetime | None) -> float:
+    """Convert a wall-clock time to the time.monotonic() scale (now if unknown)."""
+    now = time.monotonic()
+    if written is None:
+        return now
+    age = datetime.now().astimezone().timestamp() - written.timestamp()
+    return now - max(age, 0.0)
+
+
+def _bytes_in(value: Any) -> int:
+    """Total serialized payload held in nested dicts/tuples (InMemorySaver storage)."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_bytes_in(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_bytes_in(item) for item in value)
+    return 0
+
+
+def _process_rss_bytes() -> int | None:
+    """Resident memory of this worker process (Linux), None elsewhere."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
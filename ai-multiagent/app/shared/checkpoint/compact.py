@@ -0,0 +1,75 @@
+"""Offline compaction of stored conversation checkpoints.
+
+Deletes intermediate (tool-loop) checkpoints and keeps only the latest turns
+of every thread in the configured durable store, e.g. after enabling
+compaction on an existing database or to reclaim space from old threads:
+
+    CHECKPOINT_BACKEND=sqlite uv run python -m app.shared.checkpoint.compact --keep 5
+
+    CHECKPOINT_BACKEND=postgres DATABASE_URL=postgresql://... \\
+        uv run python -m app.shared.checkpoint.compact --namespace v2 --thread <thread_id>
+
+    CHECKPOINT_BACKEND=redis CHECKPOINT_REDIS_URL=redis://... \\
+        uv run python -m app.shared.checkpoint.compact
+
+Run it while the API is stopped or idle: a thread compacted mid-turn loses the
+checkpoints that turn is building on.
+"""
+
+import argparse
+import asyncio
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.shared.config import get_settings
+
+from .savers import bounded_checkpointer, open_checkpoint_store
+
+
+async def run(namespaces: list[str], keep: int, thread_id: str | None) -> None:
+    """Compact every thread (or one thread) in the given namespaces."""
+    async with open_checkpoint_store() as store:
+        if isinstance(store, MemorySaver):
+            print(f"❌ Backend '{get_settings().CHECKPOINT_BACKEND}' has nothing stored offline")
+            return
+
+        for namespace in namespaces:
+            checkpointer = bounded_checkpointer(store, namespace=namespace)
+            if thread_id:
+                thread_ids = [thread_id]
+            else:
+                await checkpointer.seed()
+                thread_ids = checkpointer.thread_ids()
+
+            deleted = 0
+            for current in thread_ids:
+                deleted += await checkpointer.acompact(current, keep=keep)
+                if checkpointer.compaction_supported is False:
+                    return
+            print(
+                f"✓ {namespace}: {deleted} checkpoints deleted "
+                f"({checkpointer.compactions} of {len(thread_ids)} threads compacted)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=get_settings().CHECKPOINT_KEEP_LATEST or 1,
+        help="Turns kept per thread (default: CHECKPOINT_KEEP_LATEST)",
+    )
+    parser.add_argument(
+        "--namespace",
+        choices=["v1", "v2"],
+        action="append",
+        help="Graph to compact (repeatable, default: both)",
+    )
+    parser.add_argument("--thread", help="Compact a single thread id")
+    args = parser.parse_args()
+    asyncio.run(run(args.namespace or ["v1", "v2"], args.keep, args.thread))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Checkpoint history compaction: keep a thread's latest turns, drop tool-loop steps.
+
+LangGraph writes a checkpoint per super-step, so a turn with agent/tool loops
+leaves an input checkpoint and several intermediate ones behind its final
+state. Only the final checkpoint of each turn is needed to continue the
+conversation; the rest (and all but the latest N turns) can be deleted.
+
+The savers only expose whole-thread operations, so single-checkpoint deletes
+and the thread listing go to each backend's storage directly.
+"""
+
+import uuid
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+
+try:
+    from langgraph.checkpoint.redis.key_registry import CheckpointKeyRegistry
+    from langgraph.checkpoint.redis.util import to_storage_safe_id, to_storage_safe_str
+    from redisvl.query import FilterQuery
+    from redisvl.query.filter import Tag
+except ImportError:
+    CheckpointKeyRegistry = None  # type: ignore
+    to_storage_safe_id = to_storage_safe_str = None  # type: ignore
+    FilterQuery = None  # type: ignore
+    Tag = None  # type: ignore
+
+# SQLite's default limit on bound parameters is 999
+_SQLITE_CHUNK = 500
+
+# 100 ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def select_stale(history: Sequence[CheckpointTuple], keep: int) -> list[str]:
+    """
+    Checkpoint ids to delete from one thread's (root namespace) history.
+
+    A checkpoint is an intermediate step when the next one is a "loop" step
+    written directly on top of it. Every other checkpoint ends a turn (it is
+    followed by the next turn's input, by a manual update, or was left behind
+    by an earlier compaction); of those, only the latest `keep` are kept.
+    The newest checkpoint is never selected.
+
+    Args:
+        history: Checkpoints of a single thread, in any order
+        keep: Turn-final checkpoints to keep (at least 1)
+
+    Returns:
+        Checkpoint ids to delete
+    """
+    ordered = sorted(history, key=_checkpoint_id)
+    stale: list[str] = []
+    finals: list[str] = []
+    for current, following in zip(ordered, [*ordered[1:], None]):
+        is_step = (
+            following is not None
+            and following.metadata.get("source") == "loop"
+            and following.parent_config is not None
+            and _checkpoint_id(following.parent_config) == _checkpoint_id(current)
+        )
+        (stale if is_step else finals).append(_checkpoint_id(current))
+    stale.extend(finals[: -max(keep, 1)])
+    return stale
+
+
+async def delete_checkpoints(
+    saver: BaseCheckpointSaver, thread_id: str, checkpoint_ids: Sequence[str]
+) -> bool:
+    """
+    Delete checkpoints (and their pending writes) from a thread's root namespace.
+
+    Channel blobs no longer referenced by a remaining checkpoint are deleted
+    too. Supports the in-memory, SQLite, Postgres and Redis savers.
+
+    Returns:
+        False if the saver doesn't support deleting single checkpoints
+    """
+    if not checkpoint_ids:
+        return True
+    if isinstance(saver, InMemorySaver):
+        _delete_in_memory(saver, thread_id, checkpoint_ids)
+        return True
+
+    module = type(saver).__module__
+    if module.startswith("langgraph.checkpoint.sqlite"):
+        await _delete_sqlite(saver, thread_id, checkpoint_ids)
+        return True
+    if module.startswith("langgraph.checkpoint.postgres"):
+        await _delete_postgres(saver, thread_id, checkpoint_ids)
+        return True
+    if module.startswith("langgraph.checkpoint.redis"):
+        await _delete_redis(saver, thread_id, checkpoint_ids)
+        return True
+    return False
+
+
+async def latest_checkpoint_ids(saver: BaseCheckpointSaver) -> dict[str, str] | None:
+    """
+    Newest root-namespace checkpoint id of every stored thread.
+
+    One grouped query (a key scan on Redis) that reads no checkpoint payloads,
+    so it stays cheap however long the stored histories are.
+
+    Returns:
+        Stored thread id -> newest checkpoint id, or None if the saver isn't
+        supported (callers fall back to listing every checkpoint)
+    """
+    if isinstance(saver, InMemorySaver):
+        return {
+            thread_id: max(namespaces[""])
+            for thread_id, namespaces in saver.storage.items()
+            if namespaces.get("")
+        }
+
+    module = type(saver).__module__
+    if module.startswith("langgraph.checkpoint.sqlite"):
+        async with saver.lock:
+            cursor = await saver.conn.execute(
+                "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints "
+                "WHERE checkpoint_ns = '' GROUP BY thread_id"
+            )
+            return {
+                thread_id: checkpoint_id for thread_id, checkpoint_id in await cursor.fetchall()
+            }
+    if module.startswith("langgraph.checkpoint.postgres"):
+        async with saver.conn.connection() as conn:
+            cursor = await conn.execute(
+                "select thread_id, max(checkpoint_id) as checkpoint_id from checkpoints "
+                "where checkpoint_ns = '' group by thread_id"
+            )
+            return {row["thread_id"]: row["checkpoint_id"] for row in await cursor.fetchall()}
+    if module.startswith("langgraph.checkpoint.redis"):
+        return await _latest_redis(saver)
+    return None
+
+
+def checkpoint_time(checkpoint_id: str) -> datetime | None:
+    """When a checkpoint was written, from its id (LangGraph uses time-ordered UUIDv6)."""
+    try:
+        value = uuid.UUID(checkpoint_id)
+    except ValueError:
+        return None
+    if value.version != 6:
+        return None
+    timestamp = ((value.int >> 80) << 12) | ((value.int >> 64) & 0x0FFF)
+    return datetime.fromtimestamp((timestamp - _UUID_EPOCH_OFFSET) / 1e7, UTC)
+
+
+def _checkpoint_id(value: CheckpointTuple | dict) -> str:
+    config = value.config if isinstance(value, CheckpointTuple) else value
+    return config["configurable"]["checkpoint_id"]
+
+
+def _delete_in_memory(saver: InMemorySaver, thread_id: str, checkpoint_ids: Sequence[str]) -> None:
+    checkpoints = saver.storage[thread_id][""]
+    for checkpoint_id in checkpoint_ids:
+        checkpoints.pop(checkpoint_id, None)
+        saver.writes.pop((thread_id, "", checkpoint_id), None)
+
+    # Channel values live in blobs keyed by (thread, ns, channel, version)
+    referenced: set[tuple[str, object]] = set()
+    for saved_checkpoint, _, _ in checkpoints.values():
+        referenced.update(saver.serde.loads_typed(saved_checkpoint)["channel_versions"].items())
+    unreferenced = [
+        key
+        for key in saver.blobs
+        if key[0] == thread_id and key[1] == "" and (key[2], key[3]) not in referenced
+    ]
+    for key in unreferenced:
+        del saver.blobs[key]
+
+
+async def _delete_sqlite(
+    saver: BaseCheckpointSaver, thread_id: str, checkpoint_ids: Sequence[str]
+) -> None:
+    # The SQLite saver stores channel values inline, there are no blobs to collect
+    async with saver.lock:
+        for start in range(0, len(checkpoint_ids), _SQLITE_CHUNK):
+            chunk = list(checkpoint_ids[start : start + _SQLITE_CHUNK])
+            placeholders = ",".join("?" * len(chunk))
+            for table in ("writes", "checkpoints"):
+                await saver.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = '' "
+                    f"AND checkpoint_id IN ({placeholders})",
+                    (thread_id, *chunk),
+                )
+        await saver.conn.commit()
+
+
+_POSTGRES_DELETE_BLOBS = """
+delete from checkpoint_blobs b
+where b.thread_id = %s and b.checkpoint_ns = ''
+  and not exists (
+    select 1 from checkpoints c
+    where c.thread_id = b.thread_id and c.checkpoint_ns = b.checkpoint_ns
+      and c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+  )
+"""
+
+
+async def _delete_postgres(
+    saver: BaseCheckpointSaver, thread_id: str, checkpoint_ids: Sequence[str]
+) -> None:
+    ids = list(checkpoint_ids)
+    pool = saver.conn  # open_checkpoint_store() always gives the saver a pool
+    async with pool.connection() as conn, conn.transaction():
+        for table in ("checkpoint_writes", "checkpoints"):
+            await conn.execute(
+                f"delete from {table} "
+                "where thread_id = %s and checkpoint_ns = '' and checkpoint_id = any(%s)",
+                (thread_id, ids),
+            )
+        await conn.execute(_POSTGRES_DELETE_BLOBS, (thread_id,))
+
+
+# The Redis saver keeps a pointer to each thread's latest checkpoint key
+_REDIS_LATEST_PREFIX = "checkpoint_latest:"
+_REDIS_CHUNK = 500
+
+
+async def _delete_redis(
+    saver: BaseCheckpointSaver, thread_id: str, checkpoint_ids: Sequence[str]
+) -> None:
+    # Channel values are stored inline in the checkpoint documents, so the
+    # checkpoint keys, their write keys and write registries are all there is
+    keys: list[str] = []
+    for checkpoint_id in checkpoint_ids:
+        keys.append(saver._make_redis_checkpoint_key(thread_id, "", checkpoint_id))
+        keys.append(CheckpointKeyRegistry.make_write_keys_zset_key(thread_id, "", checkpoint_id))
+
+    for start in range(0, len(checkpoint_ids), _REDIS_CHUNK):
+        chunk = list(checkpoint_ids[start : start + _REDIS_CHUNK])
+        query = FilterQuery(
+            filter_expression=(Tag("thread_id") == to_storage_safe_id(thread_id))
+            & (Tag("checkpoint_ns") == to_storage_safe_str(""))
+            & (Tag("checkpoint_id") == chunk),
+            return_fields=["checkpoint_id", "task_id", "idx"],
+            num_results=10000,
+        )
+        writes = await saver.checkpoint_writes_index.search(query)
+        keys.extend(
+            saver._make_redis_checkpoint_writes_key(
+                thread_id, "", doc.checkpoint_id, doc.task_id, doc.idx
+            )
+            for doc in writes.docs
+        )
+
+    if saver.cluster_mode:
+        # Keys of one thread can live on different cluster slots
+        for key in keys:
+            await saver._redis.delete(key)
+        return
+    pipeline = saver._redis.pipeline()
+    for key in keys:
+        pipeline.delete(key)
+    await pipeline.execute()
+
+
+async def _latest_redis(saver: BaseCheckpointSaver) -> dict[str, str]:
+    redis = saver._redis
+    suffix = f":{to_storage_safe_str('')}"
+    pointers = [
+        key.decode() if isinstance(key, bytes) else key
+        async for key in redis.scan_iter(match=f"{_REDIS_LATEST_PREFIX}*{suffix}", count=1000)
+    ]
+    latest: dict[str, str] = {}
+    for start in range(0, len(pointers), _REDIS_CHUNK):
+        chunk = pointers[start : start + _REDIS_CHUNK]
+        for pointer, checkpoint_key in zip(chunk, await redis.mget(chunk)):
+            if checkpoint_key is None:
+                continue
+            if isinstance(checkpoint_key, bytes):
+                checkpoint_key = checkpoint_key.decode()
+            # "checkpoint_latest:<thread>:__empty__" -> "checkpoint:<thread>:__empty__:<id>"
+            thread_id = pointer[len(_REDIS_LATEST_PREFIX) : -len(suffix)]
+            latest[thread_id] = checkpoint_key.rsplit(":", 1)[-1]
+    return latest
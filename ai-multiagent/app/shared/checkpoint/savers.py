@@ -0,0 +1,151 @@
+"""Checkpoint store for the configured backend (memory, SQLite, Postgres or Redis)."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.base import BaseStore
+
+from app.shared.config import get_settings
+
+from .bounded import BoundedCheckpointer
+
+try:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from langgraph.store.sqlite.aio import AsyncSqliteStore
+
+    SQLITE_SAVER_AVAILABLE = True
+except ImportError:
+    SQLITE_SAVER_AVAILABLE = False
+    AsyncSqliteSaver = None  # type: ignore
+    AsyncSqliteStore = None  # type: ignore
+
+try:
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+    from langgraph.store.postgres.aio import AsyncPostgresStore
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    POSTGRES_SAVER_AVAILABLE = True
+except ImportError:
+    POSTGRES_SAVER_AVAILABLE = False
+    AsyncPostgresSaver = None  # type: ignore
+    AsyncPostgresStore = None  # type: ignore
+
+try:
+    from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+    from langgraph.store.redis.aio import AsyncRedisStore
+
+    REDIS_SAVER_AVAILABLE = True
+except ImportError:
+    REDIS_SAVER_AVAILABLE = False
+    AsyncRedisSaver = None  # type: ignore
+    AsyncRedisStore = None  # type: ignore
+
+
+@asynccontextmanager
+async def open_checkpoint_store() -> AsyncIterator[BaseCheckpointSaver]:
+    """
+    Open the checkpoint saver for CHECKPOINT_BACKEND, closing it on exit.
+
+    One store is shared by both chat graphs (see BoundedCheckpointer.namespace).
+    Falls back to MemorySaver when the backend's optional dependency or
+    connection settings are missing, like the repositories do.
+    """
+    settings = get_settings()
+    backend = settings.CHECKPOINT_BACKEND
+
+    if backend == "sqlite" and SQLITE_SAVER_AVAILABLE:
+        async with AsyncSqliteSaver.from_conn_string(settings.CHECKPOINT_SQLITE_PATH) as saver:
+            await saver.setup()
+            yield saver
+        return
+
+    dsn = settings.CHECKPOINT_DATABASE_URL or settings.DATABASE_URL
+    if backend == "postgres" and POSTGRES_SAVER_AVAILABLE and dsn:
+        async with AsyncConnectionPool(
+            dsn,
+            max_size=settings.CHECKPOINT_POOL_MAX_SIZE,
+            # prepare_threshold=None: safe behind PgBouncer/Supavisor
+            kwargs={"autocommit": True, "prepare_threshold": None, "row_factory": dict_row},
+            open=False,
+        ) as pool:
+            saver = AsyncPostgresSaver(pool)
+            await saver.setup()
+            yield saver
+        return
+
+    if backend == "redis" and REDIS_SAVER_AVAILABLE and settings.CHECKPOINT_REDIS_URL:
+        async with AsyncRedisSaver.from_conn_string(
+            redis_url=settings.CHECKPOINT_REDIS_URL,
+            # Native key expiry backs up the sweeper across restarts
+            ttl={"default_ttl": settings.CHECKPOINT_TTL_SECONDS / 60, "refresh_on_read": True},
+        ) as saver:
+            await saver.asetup()
+            yield saver
+        return
+
+    if backend != "memory":
+        print(
+            f"⚠️ Checkpoint backend '{backend}' not available "
+            f"(install the checkpoint-{backend} extra / set its URL) - using MemorySaver"
+        )
+    yield MemorySaver()
+
+
+@asynccontextmanager
+async def open_archive_store() -> AsyncIterator[BaseStore | None]:
+    """
+    Open a key-value store next to the checkpoints, closing it on exit.
+
+    Holds data that must outlive checkpoint compaction and expiry (e.g. raw
+    tool results pruned from conversation state). Uses the same backend and
+    connection settings as CHECKPOINT_BACKEND; yields None for the memory
+    backend (or a missing dependency), where nothing outlives the process.
+    """
+    settings = get_settings()
+    backend = settings.CHECKPOINT_BACKEND
+
+    if backend == "sqlite" and SQLITE_SAVER_AVAILABLE:
+        async with AsyncSqliteStore.from_conn_string(settings.CHECKPOINT_SQLITE_PATH) as store:
+            await store.setup()
+            yield store
+        return
+
+    dsn = settings.CHECKPOINT_DATABASE_URL or settings.DATABASE_URL
+    if backend == "postgres" and POSTGRES_SAVER_AVAILABLE and dsn:
+        async with AsyncConnectionPool(
+            dsn,
+            max_size=2,
+            kwargs={"autocommit": True, "prepare_threshold": None, "row_factory": dict_row},
+            open=False,
+        ) as pool:
+            store = AsyncPostgresStore(pool)
+            await store.setup()
+            yield store
+        return
+
+    if backend == "redis" and REDIS_SAVER_AVAILABLE and settings.CHECKPOINT_REDIS_URL:
+        async with AsyncRedisStore.from_conn_string(settings.CHECKPOINT_REDIS_URL) as store:
+            await store.setup()
+            yield store
+        return
+
+    yield None
+
+
+def bounded_checkpointer(saver: BaseCheckpointSaver, namespace: str) -> BoundedCheckpointer:
+    """Wrap a store with the configured TTL, thread cap, sweep and compaction settings."""
+    settings = get_settings()
+    backend = settings.CHECKPOINT_BACKEND if not isinstance(saver, MemorySaver) else "memory"
+    return BoundedCheckpointer(
+        saver,
+        ttl_seconds=settings.CHECKPOINT_TTL_SECONDS,
+        max_threads=settings.CHECKPOINT_MAX_THREADS,
+        sweep_interval=settings.CHECKPOINT_SWEEP_INTERVAL,
+        namespace=namespace,
+        backend=backend,
+        store_path=settings.CHECKPOINT_SQLITE_PATH if backend == "sqlite" else None,
+        keep_latest=settings.CHECKPOINT_KEEP_LATEST,
+    )
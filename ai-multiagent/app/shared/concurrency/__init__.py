@@ -0,0 +1,16 @@
+"""Cross-request and cross-worker coordination module."""
+
+from .coalesce import QueuedMessage, TurnCoalescer, get_turn_coalescer
+from .idempotency import IdempotencyCache, get_idempotency_cache
+from .thread_lock import ThreadBusyError, ThreadLocks, get_thread_locks
+
+__all__ = [
+    "IdempotencyCache",
+    "get_idempotency_cache",
+    "QueuedMessage",
+    "TurnCoalescer",
+    "get_turn_coalescer",
+    "ThreadBusyError",
+    "ThreadLocks",
+    "get_thread_locks",
+]
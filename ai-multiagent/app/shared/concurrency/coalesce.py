@@ -0,0 +1,149 @@
+"""Per-thread turn queue that merges message bursts into a single turn."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from app.shared.config import get_settings
+
+# Runs one turn for a batch of messages (oldest first)
+type TurnRunner = Callable[[list["QueuedMessage"]], Awaitable[Any]]
+
+
+@dataclass(slots=True, frozen=True)
+class QueuedMessage:
+    """A patient message waiting for its conversation's next turn."""
+
+    message_id: str
+    content: str
+
+
+def _new_future() -> asyncio.Future:
+    return asyncio.get_running_loop().create_future()
+
+
+@dataclass(slots=True)
+class _Batch:
+    run: TurnRunner
+    first_arrival: float
+    last_arrival: float = 0.0
+    messages: list[QueuedMessage] = field(default_factory=list)
+    future: asyncio.Future = field(default_factory=_new_future)
+    arrived: asyncio.Event = field(default_factory=asyncio.Event)
+    closed: bool = False
+
+
+@dataclass(slots=True)
+class _ThreadQueue:
+    batches: deque[_Batch] = field(default_factory=deque)
+    task: asyncio.Task | None = None
+
+
+class TurnCoalescer:
+    """
+    Serializes turns per thread and merges messages sent in quick succession.
+
+    The first message of a thread opens a batch; messages arriving within
+    `window` seconds of the previous one join it, up to `max_wait` seconds
+    after the first or `max_messages` messages. The batch then runs as one
+    turn (the first submitter's runner) while later messages queue into the
+    next batch, so one conversation never has two turns in flight in this
+    process. Every submitter of a batch gets the same result; the reply
+    belongs to the batch's latest message. With `window=0` messages are
+    only serialized, never merged.
+    """
+
+    def __init__(self, window: float, max_wait: float, max_messages: int):
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.max_messages = max(max_messages, 1)
+        self._threads: dict[str, _ThreadQueue] = {}
+        self.messages = 0
+        self.turns = 0
+
+    async def submit(
+        self, thread_id: str, message: QueuedMessage, run: TurnRunner
+    ) -> tuple[Any, list[QueuedMessage]]:
+        """
+        Queue a message for its thread's next turn and wait for that turn.
+
+        Args:
+            thread_id: Conversation the message belongs to
+            message: The incoming message
+            run: Runs a turn for a batch of messages (used if this message opens one)
+
+        Returns:
+            The turn's result and the batch it ran with (oldest first)
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        queue = self._threads.setdefault(thread_id, _ThreadQueue())
+        batch = queue.batches[-1] if queue.batches else None
+        if batch is None or batch.closed or len(batch.messages) >= self.max_messages:
+            batch = _Batch(run=run, first_arrival=now)
+            queue.batches.append(batch)
+        batch.messages.append(message)
+        batch.last_arrival = now
+        batch.arrived.set()
+        self.messages += 1
+
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._drain(thread_id, queue), name="turn-queue")
+
+        # A disconnected client must not cancel the turn for the rest of the batch
+        result = await asyncio.shield(batch.future)
+        return result, list(batch.messages)
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "window": self.window,
+            "active_threads": len(self._threads),
+            "messages": self.messages,
+            "turns": self.turns,
+            "merged": self.messages - self.turns,
+        }
+
+    async def _drain(self, thread_id: str, queue: _ThreadQueue) -> None:
+        try:
+            while queue.batches:
+                batch = queue.batches[0]
+                await self._collect(batch)
+                batch.closed = True
+                self.turns += 1
+                try:
+                    batch.future.set_result(await batch.run(list(batch.messages)))
+                except Exception as e:
+                    batch.future.set_exception(e)
+                queue.batches.popleft()
+        finally:
+            if self._threads.get(thread_id) is queue and not queue.batches:
+                del self._threads[thread_id]
+
+    async def _collect(self, batch: _Batch) -> None:
+        """Wait until the batch is quiet for `window` seconds, full, or `max_wait` old."""
+        loop = asyncio.get_running_loop()
+        while len(batch.messages) < self.max_messages:
+            close_at = min(batch.last_arrival + self.window, batch.first_arrival + self.max_wait)
+            remaining = close_at - loop.time()
+            if remaining <= 0:
+                return
+            batch.arrived.clear()
+            try:
+                await asyncio.wait_for(batch.arrived.wait(), timeout=remaining)
+            except TimeoutError:
+                pass
+
+
+@lru_cache
+def get_turn_coalescer(name: str) -> TurnCoalescer:
+    """Get the process-wide turn queue for a chat service ("v1", "v2")."""
+    settings = get_settings()
+    return TurnCoalescer(
+        window=settings.CHAT_COALESCE_WINDOW,
+        max_wait=settings.CHAT_COALESCE_MAX_WAIT,
+        max_messages=settings.CHAT_COALESCE_MAX_MESSAGES,
+    )
@@ -0,0 +1,235 @@
+"""Idempotent request handling keyed by message_id."""
+
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.shared.config import get_settings
+
+from .redis_scripts import EXTEND_SCRIPT, REDIS_AVAILABLE, RELEASE_SCRIPT, aioredis
+
+# Returned by _redis_call when Redis fails (None is a valid reply)
+_FAILED = object()
+
+
+class IdempotencyCache:
+    """
+    Remembers responses by key (message_id) so a retried message isn't reprocessed.
+
+    A retry that arrives while the original is still running attaches to the
+    same computation; one that arrives later gets the stored response for
+    `ttl_seconds` (LRU-bounded by `max_entries`). The computation runs as its
+    own task, so the original client giving up doesn't cancel it for the
+    retry. Failures are not stored: the next retry runs again.
+
+    With a Redis URL, responses are also shared across workers: the first
+    worker claims the key, and a retry landing on another worker waits for
+    that response (up to `wait_timeout`) instead of running a second turn.
+    The claim holds a random token and is renewed while the turn runs, so a
+    turn longer than `wait_timeout` doesn't let another worker claim the key.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        redis_url: str | None = None,
+        wait_timeout: float = 60.0,
+        key_prefix: str = "pausiva:idempotency:",
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis_url = redis_url if REDIS_AVAILABLE and redis_url else None
+        self.wait_timeout = wait_timeout
+        self.key_prefix = key_prefix
+        self._completed: OrderedDict[str, tuple[float, BaseModel]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._redis: Optional["aioredis.Redis"] = None
+        self.hits = 0
+        self.attached = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def distributed(self) -> bool:
+        """True when responses are shared across processes through Redis."""
+        return self.redis_url is not None
+
+    async def run[M: BaseModel](
+        self, key: str, compute: Callable[[], Awaitable[M]], model: type[M]
+    ) -> M:
+        """
+        Return the response for `key`, computing it at most once.
+
+        Args:
+            key: Idempotency key (e.g. "v2:<message_id>")
+            compute: Produces the response if it isn't stored or in flight
+            model: Response model (to load responses shared by other workers)
+        """
+        if self.ttl_seconds <= 0:
+            return await compute()
+
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached  # type: ignore[return-value]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, compute, model), name="idempotent")
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.attached += 1
+        return await asyncio.shield(task)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool (app shutdown)."""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "distributed": self.distributed,
+            "size": len(self._completed),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "attached": self.attached,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+    def _get(self, key: str) -> Optional[BaseModel]:
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if time.monotonic() >= expires_at:
+            del self._completed[key]
+            return None
+        self._completed.move_to_end(key)
+        return response
+
+    def _set(self, key: str, response: BaseModel) -> None:
+        self._completed[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    async def _compute[M: BaseModel](
+        self, key: str, compute: Callable[[], Awaitable[M]], model: type[M]
+    ) -> M:
+        token = None
+        if self.distributed:
+            shared, token = await self._claim_or_wait(key, model)
+            if shared is not None:
+                self.hits += 1
+                self._set(key, shared)
+                return shared
+
+        self.misses += 1
+        renewer = (
+            asyncio.create_task(self._renew_claim(key, token), name="idempotency-renew")
+            if token
+            else None
+        )
+        try:
+            response = await compute()
+        except BaseException:
+            if token:
+                await self._release_claim(key, token)
+            raise
+        finally:
+            if renewer:
+                renewer.cancel()
+        self._set(key, response)
+        if token:
+            stored = response.model_dump_json()
+            ttl_ms = int(self.ttl_seconds * 1000)
+            await self._redis_call("set", self._done_key(key), stored, px=ttl_ms)
+            await self._release_claim(key, token)
+        return response
+
+    async def _claim_or_wait[M: BaseModel](
+        self, key: str, model: type[M]
+    ) -> tuple[Optional[M], str | None]:
+        """
+        Get another worker's response, or claim the key to compute it here.
+
+        Returns:
+            (shared response, None) if another worker produced it,
+            (None, claim token) if this worker claimed the key, (None, None)
+            if Redis failed or the other worker took longer than `wait_timeout`
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        claim_ms = int(self.wait_timeout * 1000)
+        token = secrets.token_hex(16)
+        delay = 0.05
+        while True:
+            stored = await self._redis_call("get", self._done_key(key))
+            if stored is _FAILED:
+                return None, None
+            if stored is not None:
+                return model.model_validate_json(stored), None
+            claimed = await self._redis_call(
+                "set", self._pending_key(key), token, nx=True, px=claim_ms
+            )
+            if claimed is _FAILED:
+                return None, None
+            if claimed:
+                return None, token
+            if loop.time() + delay > deadline:
+                return None, None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _renew_claim(self, key: str, token: str) -> None:
+        """Keep extending the claim while this worker computes the response."""
+        claim_ms = int(self.wait_timeout * 1000)
+        while True:
+            await asyncio.sleep(self.wait_timeout / 3)
+            await self._redis_call(
+                "eval", EXTEND_SCRIPT, 1, self._pending_key(key), token, claim_ms
+            )
+
+    async def _release_claim(self, key: str, token: str) -> None:
+        """Drop the claim, unless it expired and another worker holds it now."""
+        await self._redis_call("eval", RELEASE_SCRIPT, 1, self._pending_key(key), token)
+
+    async def _redis_call(self, command: str, *args, **kwargs):
+        """Run a Redis command; on failure count it and return _FAILED."""
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(self.redis_url)
+        try:
+            return await getattr(self._redis, command)(*args, **kwargs)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Idempotency store unavailable ({command}): {e}")
+            return _FAILED
+
+    def _done_key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def _pending_key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}:pending"
+
+
+@lru_cache
+def get_idempotency_cache() -> IdempotencyCache:
+    """Get the process-wide idempotency cache."""
+    settings = get_settings()
+    return IdempotencyCache(
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+        redis_url=settings.REDIS_URL if settings.IDEMPOTENCY_BACKEND == "redis" else None,
+        wait_timeout=settings.THREAD_LOCK_TIMEOUT,
+    )
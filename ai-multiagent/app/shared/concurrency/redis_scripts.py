@@ -0,0 +1,24 @@
+"""Redis client import and token-guarded scripts shared by locks and claims."""
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    aioredis = None  # type: ignore
+
+# Only the holder (matching token) may extend or release a key.
+# KEYS[1]: the lock/claim key, ARGV[1]: the holder's token, ARGV[2]: new TTL in ms
+EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
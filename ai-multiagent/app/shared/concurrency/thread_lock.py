@@ -0,0 +1,171 @@
+"""Per-conversation locks so two workers never run turns of one thread at once."""
+
+import asyncio
+import secrets
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from app.shared.config import get_settings
+
+from .redis_scripts import EXTEND_SCRIPT, REDIS_AVAILABLE, RELEASE_SCRIPT, aioredis
+
+
+class ThreadBusyError(Exception):
+    """Raised when a conversation's lock isn't acquired within the timeout."""
+
+
+@dataclass(slots=True)
+class _LocalLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class ThreadLocks:
+    """
+    Serializes turns per thread_id, within this process and across workers.
+
+    Turns of one conversation always queue on an in-process lock first. With
+    a Redis URL (THREAD_LOCK_BACKEND=redis) the holder also takes a Redis lock
+    (SET NX with a random token and `ttl` expiry, renewed while the turn runs),
+    so workers and replicas sharing a checkpoint store never interleave turns
+    of the same conversation. Waiting longer than `timeout` raises
+    ThreadBusyError. If Redis fails mid-way the turn proceeds with only the
+    local lock rather than failing the reply.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None,
+        ttl: float,
+        timeout: float,
+        key_prefix: str = "pausiva:thread-lock:",
+    ):
+        self.redis_url = redis_url if REDIS_AVAILABLE and redis_url else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self._locals: dict[str, _LocalLock] = {}
+        self._redis: Optional["aioredis.Redis"] = None
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def distributed(self) -> bool:
+        """True when locks are shared across processes through Redis."""
+        return self.redis_url is not None
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str) -> AsyncIterator[None]:
+        """Hold the lock for a thread for the duration of the block."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        local = self._locals.setdefault(thread_id, _LocalLock())
+        local.users += 1
+        try:
+            if local.lock.locked():
+                self.contended += 1
+            try:
+                await asyncio.wait_for(local.lock.acquire(), timeout=self.timeout)
+            except TimeoutError:
+                self.timeouts += 1
+                raise ThreadBusyError(f"Conversation {thread_id} is busy") from None
+            try:
+                token = None
+                if self.distributed:
+                    token = await self._acquire_remote(thread_id, deadline)
+                renewer = (
+                    asyncio.create_task(self._renew(thread_id, token), name="thread-lock-renew")
+                    if token
+                    else None
+                )
+                self.acquired += 1
+                try:
+                    yield
+                finally:
+                    if renewer:
+                        renewer.cancel()
+                    if token:
+                        await self._release_remote(thread_id, token)
+            finally:
+                local.lock.release()
+        finally:
+            local.users -= 1
+            if local.users == 0:
+                self._locals.pop(thread_id, None)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool (app shutdown)."""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "distributed": self.distributed,
+            "held": sum(1 for local in self._locals.values() if local.lock.locked()),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
+
+    def _client(self) -> "aioredis.Redis":
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    async def _acquire_remote(self, thread_id: str, deadline: float) -> str | None:
+        """Take the Redis lock, polling with backoff until the deadline."""
+        loop = asyncio.get_running_loop()
+        key = self.key_prefix + thread_id
+        token = secrets.token_hex(16)
+        delay = 0.02
+        while True:
+            try:
+                if await self._client().set(key, token, nx=True, px=int(self.ttl * 1000)):
+                    return token
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Thread lock unavailable for {thread_id}, continuing unlocked: {e}")
+                return None
+            if loop.time() + delay > deadline:
+                self.timeouts += 1
+                raise ThreadBusyError(f"Conversation {thread_id} is busy on another worker")
+            self.contended += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _renew(self, thread_id: str, token: str) -> None:
+        key = self.key_prefix + thread_id
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await self._client().eval(EXTEND_SCRIPT, 1, key, token, int(self.ttl * 1000))
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Failed to renew thread lock for {thread_id}: {e}")
+
+    async def _release_remote(self, thread_id: str, token: str) -> None:
+        try:
+            await self._client().eval(RELEASE_SCRIPT, 1, self.key_prefix + thread_id, token)
+        except Exception as e:
+            # The lock expires on its own after `ttl`
+            self.errors += 1
+            print(f"⚠️ Failed to release thread lock for {thread_id}: {e}")
+
+
+@lru_cache
+def get_thread_locks() -> ThreadLocks:
+    """Get the process-wide thread locks."""
+    settings = get_settings()
+    return ThreadLocks(
+        redis_url=settings.REDIS_URL if settings.THREAD_LOCK_BACKEND == "redis" else None,
+        ttl=settings.THREAD_LOCK_TTL_SECONDS,
+        timeout=settings.THREAD_LOCK_TIMEOUT,
+    )
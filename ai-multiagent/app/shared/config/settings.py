@@ -10,6 +10,10 @@ from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 type Environment = Literal["local", "staging", "production"]
+type DatabaseBackend = Literal["supabase", "postgres", "local"]
+type CheckpointBackend = Literal["memory", "sqlite", "postgres", "redis"]
+type ThreadLockBackend = Literal["local", "redis"]
+type IdempotencyBackend = Literal["local", "redis"]
 
 
 class Settings(BaseSettings):
@@ -25,12 +29,37 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: Environment = "local"
 
+    # Worker processes (read by the Docker CMD; >1 needs a shared checkpoint
+    # backend and THREAD_LOCK_BACKEND=redis)
+    WEB_CONCURRENCY: int = Field(default=1, description="Uvicorn worker processes")
+
     # Google AI (Gemini)
     GOOGLE_API_KEY: str = Field(default="", description="Google AI API Key for Gemini")
 
     # OpenAI
     OPENAI_API_KEY: str = Field(default="", description="OpenAI API Key")
 
+    # Model provider HTTP pool (shared by every OpenAI model and temperature)
+    LLM_HTTP2: bool = Field(default=True, description="Use HTTP/2 for model provider requests")
+    LLM_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Maximum open connections in the shared model provider pool",
+    )
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20,
+        description="Idle keep-alive connections kept open in the shared pool",
+    )
+    LLM_KEEPALIVE_EXPIRY: float = Field(
+        default=60.0,
+        description="Seconds an idle pooled connection is kept alive",
+    )
+
+    # Startup warm-up of model provider connections (0 disables it)
+    LLM_WARMUP_TIMEOUT: float = Field(
+        default=5.0,
+        description="Seconds to wait for each provider warm-up request",
+    )
+
     # LangSmith Tracing (https://smith.langchain.com)
     # Set LANGCHAIN_TRACING_V2=true to enable tracing
     LANGCHAIN_TRACING_V2: bool = Field(
@@ -50,11 +79,212 @@ class Settings(BaseSettings):
         description="LangSmith API endpoint",
     )
 
+    # Database backend: "supabase" (PostgREST), "postgres" (direct asyncpg pool)
+    # or "local" (SQLite, for offline development and load testing)
+    DATABASE_BACKEND: DatabaseBackend = Field(
+        default="supabase",
+        description="Repository backend: supabase, postgres or local",
+    )
+    LOCAL_DATABASE_PATH: str = Field(
+        default=":memory:",
+        description="SQLite file for the local backend (:memory: keeps it in-process)",
+    )
+    LOCAL_DATABASE_SEED_PATIENTS: int = Field(
+        default=0,
+        description="Synthetic patients generated when the local database is empty",
+    )
+    LOCAL_DATABASE_SEED: int = Field(default=42, description="Random seed for synthetic data")
+
+    # Direct Postgres (DATABASE_BACKEND=postgres, requires the asyncpg extra)
+    DATABASE_URL: str = Field(default="", description="Postgres DSN for the asyncpg backend")
+    POSTGRES_POOL_MIN_SIZE: int = Field(default=2, description="Connections opened at startup")
+    POSTGRES_POOL_MAX_SIZE: int = Field(default=10, description="Maximum pooled connections")
+    POSTGRES_COMMAND_TIMEOUT: float = Field(default=5.0, description="Query timeout (s)")
+    POSTGRES_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        description="Prepared statements cached per connection (0 behind PgBouncer)",
+    )
+
+    # Conversation checkpoints (LangGraph memory, shared by both chat graphs)
+    CHECKPOINT_BACKEND: CheckpointBackend = Field(
+        default="memory",
+        description="Checkpoint store: memory, sqlite, postgres or redis",
+    )
+    CHECKPOINT_SQLITE_PATH: str = Field(
+        default="checkpoints.sqlite",
+        description="SQLite file for the sqlite checkpoint backend",
+    )
+    CHECKPOINT_DATABASE_URL: str = Field(
+        default="",
+        description="Postgres DSN for the postgres checkpoint backend (defaults to DATABASE_URL)",
+    )
+    CHECKPOINT_POOL_MAX_SIZE: int = Field(default=10, description="Max checkpoint connections")
+    CHECKPOINT_REDIS_URL: str = Field(
+        default="redis://localhost:6379",
+        description="Redis URL for the redis checkpoint backend (needs RedisJSON/RediSearch)",
+    )
+    CHECKPOINT_TTL_SECONDS: float = Field(
+        default=7 * 24 * 3600.0,
+        description="Seconds a conversation is kept after its last message",
+    )
+    CHECKPOINT_MAX_THREADS: int = Field(
+        default=10000,
+        description="Max conversations kept per graph (least recently used are deleted)",
+    )
+    CHECKPOINT_SWEEP_INTERVAL: float = Field(
+        default=300.0,
+        description="Seconds between expiry sweeps",
+    )
+    CHECKPOINT_KEEP_LATEST: int = Field(
+        default=20,
+        description="Turns of checkpoint history kept per thread after each turn (0 disables)",
+    )
+
+    # Per-conversation locks (serialize turns of a thread across workers)
+    THREAD_LOCK_BACKEND: ThreadLockBackend = Field(
+        default="local",
+        description="local (in-process) or redis (shared by workers/replicas)",
+    )
+    REDIS_URL: str = Field(
+        default="redis://localhost:6379",
+        description="Redis URL for the redis thread lock backend",
+    )
+    THREAD_LOCK_TTL_SECONDS: float = Field(
+        default=30.0,
+        description="Lock expiry if a worker dies mid-turn (renewed while the turn runs)",
+    )
+    THREAD_LOCK_TIMEOUT: float = Field(
+        default=60.0,
+        description="Seconds a turn waits for its conversation's lock before giving up",
+    )
+
+    # Idempotency: responses remembered by message_id so gateway retries are free
+    IDEMPOTENCY_BACKEND: IdempotencyBackend = Field(
+        default="local",
+        description="local (per worker) or redis (shared through REDIS_URL)",
+    )
+    IDEMPOTENCY_TTL_SECONDS: float = Field(
+        default=900.0,
+        description="Seconds a response is replayed for a retried message_id (0 disables)",
+    )
+    IDEMPOTENCY_MAX_ENTRIES: int = Field(
+        default=10000,
+        description="Max remembered responses per worker (LRU eviction beyond this)",
+    )
+
     # Supabase
     SUPABASE_URL: str = Field(default="", description="Supabase project URL")
     SUPABASE_SERVICE_KEY: str = Field(default="", description="Supabase service role key")
     SUPABASE_ANON_KEY: str = Field(default="", description="Supabase anonymous key")
 
+    # Supabase async HTTP pool (shared by all repositories)
+    SUPABASE_HTTP2: bool = Field(default=True, description="Use HTTP/2 for PostgREST requests")
+    SUPABASE_MAX_CONNECTIONS: int = Field(
+        default=20,
+        description="Maximum open connections in the shared PostgREST pool",
+    )
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=10,
+        description="Idle keep-alive connections kept open in the shared pool",
+    )
+    SUPABASE_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0,
+        description="Seconds an idle pooled connection is kept alive",
+    )
+    SUPABASE_TIMEOUT: float = Field(default=10.0, description="PostgREST request timeout (s)")
+
+    # Patient cache (in-process, shared across requests)
+    PATIENT_CACHE_ENABLED: bool = Field(default=True, description="Cache patient lookups")
+    PATIENT_CACHE_MAX_ENTRIES: int = Field(
+        default=5000,
+        description="Max cached patients (LRU eviction beyond this)",
+    )
+    PATIENT_CACHE_TTL_SECONDS: float = Field(
+        default=300.0,
+        description="Seconds a cached patient is served before refetching",
+    )
+    PATIENT_NEGATIVE_CACHE_TTL_SECONDS: float = Field(
+        default=30.0,
+        description="Seconds an unknown phone is remembered as having no patient",
+    )
+    PATIENT_CACHE_MULTI_WORKER_TTL_SECONDS: float = Field(
+        default=5.0,
+        description="TTL cap when WEB_CONCURRENCY > 1 (other workers' updates aren't seen)",
+    )
+
+    # Chat V1 patient context (patient, plans, appointments, symptoms per turn)
+    CHAT_CONTEXT_TIMEOUT: float = Field(
+        default=1.5,
+        description="Seconds to assemble patient context before using partial results",
+    )
+
+    # Message bursts: messages of a thread arriving within the window are
+    # answered in one turn (0 only serializes turns)
+    CHAT_COALESCE_WINDOW: float = Field(
+        default=1.0,
+        description="Seconds to wait for another message before starting the turn",
+    )
+    CHAT_COALESCE_MAX_WAIT: float = Field(
+        default=4.0,
+        description="Max seconds a burst is held open after its first message",
+    )
+    CHAT_COALESCE_MAX_MESSAGES: int = Field(default=10, description="Max messages per turn")
+
+    # Conversation history (v2): older turns are folded into a rolling summary
+    CHAT_HISTORY_KEEP_TURNS: int = Field(
+        default=6,
+        description="Turns kept verbatim when the history is summarized",
+    )
+    CHAT_HISTORY_TOKEN_BUDGET: int = Field(
+        default=6000,
+        description="Approximate history tokens that trigger summarization (0 disables it)",
+    )
+
+    # Tool results (v2): stale results are stubbed or truncated in state, raw
+    # payloads are archived next to the checkpoints
+    CHAT_TOOL_RESULT_PRUNING: bool = Field(default=True, description="Prune stale tool results")
+    CHAT_TOOL_RESULT_KEEP_TURNS: int = Field(
+        default=1,
+        description="Latest turns whose tool results stay verbatim",
+    )
+    CHAT_TOOL_RESULT_RULES: dict[str, str] = Field(
+        default_factory=dict,
+        description='Per-tool overrides: "keep", "stub" or a max length (JSON object)',
+    )
+
+    # Batch endpoint (gateway replays, backfills)
+    CHAT_BATCH_CONCURRENCY: int = Field(
+        default=8,
+        description="Conversations processed at once per batch",
+    )
+    CHAT_BATCH_MAX_MESSAGES: int = Field(default=500, description="Max messages per batch")
+
+    # Doctor directory (in-process, refreshed in the background)
+    DOCTOR_DIRECTORY_REFRESH_SECONDS: float = Field(
+        default=300.0,
+        description="Seconds between reloads of the doctor directory",
+    )
+
+    # Write-behind queue (followings, timeline events)
+    WRITE_BEHIND_ENABLED: bool = Field(
+        default=True,
+        description="Queue non-critical inserts and write them in background batches",
+    )
+    WRITE_BEHIND_FLUSH_INTERVAL: float = Field(
+        default=0.5,
+        description="Max seconds a queued row waits before its batch is written",
+    )
+    WRITE_BEHIND_MAX_BATCH_SIZE: int = Field(default=50, description="Max rows per batch")
+    WRITE_BEHIND_MAX_RETRIES: int = Field(default=3, description="Retries per failed batch")
+    WRITE_BEHIND_RETRY_BACKOFF: float = Field(
+        default=0.5,
+        description="Base backoff in seconds (doubles on every retry)",
+    )
+    WRITE_BEHIND_MAX_PENDING: int = Field(
+        default=5000,
+        description="Queue bound; when full, inserts are written inline",
+    )
+
     @computed_field
     @property
     def supabase_configured(self) -> bool:
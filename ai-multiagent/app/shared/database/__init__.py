@@ -1,20 +1,82 @@
 """Database integration module."""
-from .client import SupabaseClient, get_supabase_client
+
+from .backends import (
+    get_appointment_repository,
+    get_doctor_repository,
+    get_following_repository,
+    get_patient_repository,
+    get_plan_repository,
+    get_timeline_repository,
+    uses_local_backend,
+    uses_postgres_backend,
+)
+from .cache import PatientCache, get_patient_cache
+from .client import SupabaseClient, get_async_supabase_client, get_supabase_client
+from .doctors import Doctor, DoctorDirectory, get_doctor_directory
+from .local import LocalDatabase, get_local_database, synthetic_phone
+from .postgres import PostgresDatabase, get_postgres_database
+from .protocols import (
+    AppointmentRepositoryProtocol,
+    DoctorRepositoryProtocol,
+    FollowingRepositoryProtocol,
+    PatientRepositoryProtocol,
+    PlanRepositoryProtocol,
+    TimelineRepositoryProtocol,
+)
+from .records import (
+    AppointmentSummary,
+    FollowingSummary,
+    OnboardingStatus,
+    PatientIdentity,
+)
 from .repositories import (
     AppointmentRepository,
+    DoctorRepository,
     FollowingRepository,
     PatientRepository,
     PlanRepository,
     TimelineRepository,
 )
+from .write_behind import WriteBehindQueue, get_write_behind_queue
 
 __all__ = [
     "SupabaseClient",
     "get_supabase_client",
+    "get_async_supabase_client",
+    "PatientCache",
+    "get_patient_cache",
+    "Doctor",
+    "DoctorDirectory",
+    "get_doctor_directory",
+    "PatientIdentity",
+    "OnboardingStatus",
+    "AppointmentSummary",
+    "FollowingSummary",
     "PatientRepository",
     "FollowingRepository",
     "AppointmentRepository",
+    "DoctorRepository",
     "TimelineRepository",
     "PlanRepository",
+    "PatientRepositoryProtocol",
+    "FollowingRepositoryProtocol",
+    "AppointmentRepositoryProtocol",
+    "DoctorRepositoryProtocol",
+    "TimelineRepositoryProtocol",
+    "PlanRepositoryProtocol",
+    "get_patient_repository",
+    "get_following_repository",
+    "get_appointment_repository",
+    "get_doctor_repository",
+    "get_timeline_repository",
+    "get_plan_repository",
+    "uses_local_backend",
+    "uses_postgres_backend",
+    "LocalDatabase",
+    "get_local_database",
+    "synthetic_phone",
+    "PostgresDatabase",
+    "get_postgres_database",
+    "WriteBehindQueue",
+    "get_write_behind_queue",
 ]
-
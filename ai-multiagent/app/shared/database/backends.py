@@ -0,0 +1,102 @@
+"""Repository factories for the configured database backend."""
+
+from app.shared.config import get_settings
+
+from .local import (
+    LocalAppointmentRepository,
+    LocalDoctorRepository,
+    LocalFollowingRepository,
+    LocalPatientRepository,
+    LocalPlanRepository,
+    LocalTimelineRepository,
+    get_local_database,
+)
+from .postgres import (
+    PostgresAppointmentRepository,
+    PostgresDoctorRepository,
+    PostgresFollowingRepository,
+    PostgresPatientRepository,
+    PostgresPlanRepository,
+    PostgresTimelineRepository,
+    get_postgres_database,
+)
+from .protocols import (
+    AppointmentRepositoryProtocol,
+    DoctorRepositoryProtocol,
+    FollowingRepositoryProtocol,
+    PatientRepositoryProtocol,
+    PlanRepositoryProtocol,
+    TimelineRepositoryProtocol,
+)
+from .repositories import (
+    AppointmentRepository,
+    DoctorRepository,
+    FollowingRepository,
+    PatientRepository,
+    PlanRepository,
+    TimelineRepository,
+)
+
+
+def uses_local_backend() -> bool:
+    """True when DATABASE_BACKEND=local (SQLite instead of Supabase)."""
+    return get_settings().DATABASE_BACKEND == "local"
+
+
+def uses_postgres_backend() -> bool:
+    """True when DATABASE_BACKEND=postgres (asyncpg instead of PostgREST)."""
+    return get_settings().DATABASE_BACKEND == "postgres"
+
+
+def get_patient_repository() -> PatientRepositoryProtocol:
+    """Get a patient repository for the configured backend."""
+    if uses_local_backend():
+        return LocalPatientRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresPatientRepository(get_postgres_database())
+    return PatientRepository()
+
+
+def get_following_repository() -> FollowingRepositoryProtocol:
+    """Get a following repository for the configured backend."""
+    if uses_local_backend():
+        return LocalFollowingRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresFollowingRepository(get_postgres_database())
+    return FollowingRepository()
+
+
+def get_appointment_repository() -> AppointmentRepositoryProtocol:
+    """Get an appointment repository for the configured backend."""
+    if uses_local_backend():
+        return LocalAppointmentRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresAppointmentRepository(get_postgres_database())
+    return AppointmentRepository()
+
+
+def get_doctor_repository() -> DoctorRepositoryProtocol:
+    """Get a doctor repository for the configured backend."""
+    if uses_local_backend():
+        return LocalDoctorRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresDoctorRepository(get_postgres_database())
+    return DoctorRepository()
+
+
+def get_timeline_repository() -> TimelineRepositoryProtocol:
+    """Get a timeline repository for the configured backend."""
+    if uses_local_backend():
+        return LocalTimelineRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresTimelineRepository(get_postgres_database())
+    return TimelineRepository()
+
+
+def get_plan_repository() -> PlanRepositoryProtocol:
+    """Get a plan repository for the configured backend."""
+    if uses_local_backend():
+        return LocalPlanRepository(get_local_database())
+    if uses_postgres_backend():
+        return PostgresPlanRepository(get_postgres_database())
+    return PlanRepository()
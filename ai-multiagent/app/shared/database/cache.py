@@ -0,0 +1,231 @@
+"""In-process caches for hot repository reads."""
+
+import copy
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from app.shared.config import get_settings
+
+
+class PatientCache:
+    """
+    Bounded TTL + LRU cache of formatted patient records.
+
+    Records are stored once by patient id, with a secondary index from
+    normalized phone to id, so a lookup by either key hits the same entry and
+    an invalidation by id also drops the phone mapping.
+
+    Phones with no patient are remembered separately for a shorter TTL
+    (negative cache) so unknown WhatsApp numbers don't hit the database on
+    every tool call until the gateway creates them.
+
+    None of the methods await, so each call is atomic with respect to other
+    asyncio tasks on the event loop. Records are deep-copied on the way in and
+    out so callers can't mutate the cached copy.
+
+    A database read can overlap a write: take `generation` before the read
+    and pass it as `read_at` when caching the result. Every write-through or
+    invalidation bumps the generation of the keys it touches, and a read
+    result older than its keys' last change is not cached, so it can't
+    overwrite a newer record or resurrect an invalidated one.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        # patient_id -> (expires_at, record, indexed phone)
+        self._entries: OrderedDict[str, tuple[float, dict, str | None]] = OrderedDict()
+        self._phone_index: dict[str, str] = {}
+        # normalized phone -> expires_at, for phones known to have no patient
+        self._missing: OrderedDict[str, float] = OrderedDict()
+        # patient id / phone -> generation of its last write or invalidation;
+        # keys evicted from this LRU count as changed at `_changed_floor`
+        self._generation = 0
+        self._changed: OrderedDict[str, int] = OrderedDict()
+        self._changed_floor = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_reads = 0
+
+    @property
+    def generation(self) -> int:
+        """Current generation (take it before a database read, see `set`)."""
+        return self._generation
+
+    def get_by_id(self, patient_id: str) -> Optional[dict]:
+        """Get a cached patient by id (None on miss or expiry)."""
+        entry = self._entries.get(patient_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, record, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(patient_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(patient_id)
+        self.hits += 1
+        return copy.deepcopy(record)
+
+    def get_by_phone(self, phone: str) -> Optional[dict]:
+        """Get a cached patient by normalized phone (None on miss or expiry)."""
+        patient_id = self._phone_index.get(phone)
+        if patient_id is None:
+            self.misses += 1
+            return None
+        return self.get_by_id(patient_id)
+
+    def is_missing(self, phone: str) -> bool:
+        """Check whether a phone was recently looked up and had no patient."""
+        expires_at = self._missing.get(phone)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._missing[phone]
+            return False
+        self.negative_hits += 1
+        return True
+
+    def set_missing(self, phone: str, read_at: int | None = None) -> None:
+        """Remember that a phone has no patient (for negative_ttl_seconds).
+
+        Args:
+            phone: Normalized phone
+            read_at: `generation` taken before the lookup (skipped if stale)
+        """
+        if self.negative_ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        if read_at is not None and self._is_stale(read_at, phone):
+            self.stale_reads += 1
+            return
+        self._missing[phone] = time.monotonic() + self.negative_ttl_seconds
+        self._missing.move_to_end(phone)
+        while len(self._missing) > self.max_entries:
+            self._missing.popitem(last=False)
+
+    def set(self, record: dict, phone: str | None = None, read_at: int | None = None) -> None:
+        """Store (or replace) a formatted patient record.
+
+        Args:
+            record: Formatted patient record (must contain "id")
+            phone: Normalized phone to index it under (defaults to record["phone"])
+            read_at: `generation` taken before the read that returned the
+                record; None for a write-through of data just written
+        """
+        patient_id = record.get("id")
+        if not patient_id or self.max_entries <= 0:
+            return
+
+        phone = phone or record.get("phone")
+        if read_at is None:
+            self._touch(patient_id, phone)
+        elif self._is_stale(read_at, patient_id, phone):
+            self.stale_reads += 1
+            return
+
+        # Drop a stale phone mapping if the phone changed
+        self._remove(patient_id)
+
+        self._entries[patient_id] = (
+            time.monotonic() + self.ttl_seconds,
+            copy.deepcopy(record),
+            phone,
+        )
+        if phone:
+            self._phone_index[phone] = patient_id
+            self._missing.pop(phone, None)
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def invalidate(self, patient_id: str | None = None, phone: str | None = None) -> None:
+        """Drop a patient by id and/or phone."""
+        if phone and not patient_id:
+            patient_id = self._phone_index.get(phone)
+        self._touch(patient_id, phone)
+        if patient_id:
+            self._remove(patient_id)
+        if phone:
+            self._phone_index.pop(phone, None)
+            self._missing.pop(phone, None)
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        self._entries.clear()
+        self._phone_index.clear()
+        self._missing.clear()
+        # Reads in flight now must not repopulate the cache
+        self._generation += 1
+        self._changed.clear()
+        self._changed_floor = self._generation
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "negative_size": len(self._missing),
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "negative_hits": self.negative_hits,
+            "stale_reads": self.stale_reads,
+        }
+
+    def _touch(self, *keys: str | None) -> None:
+        """Record a write or invalidation of `keys` (patient ids / phones)."""
+        self._generation += 1
+        for key in keys:
+            if key:
+                self._changed[key] = self._generation
+                self._changed.move_to_end(key)
+        while len(self._changed) > self.max_entries:
+            _, self._changed_floor = self._changed.popitem(last=False)
+
+    def _is_stale(self, read_at: int, *keys: str | None) -> bool:
+        """True if any of `keys` changed after generation `read_at`."""
+        return any(self._changed.get(key, self._changed_floor) > read_at for key in keys if key)
+
+    def _remove(self, patient_id: str) -> None:
+        entry = self._entries.pop(patient_id, None)
+        if entry is None:
+            return
+        phone = entry[2]
+        if phone and self._phone_index.get(phone) == patient_id:
+            del self._phone_index[phone]
+
+
+@lru_cache
+def get_patient_cache() -> PatientCache:
+    """Get the process-wide patient cache."""
+    settings = get_settings()
+    max_entries = settings.PATIENT_CACHE_MAX_ENTRIES if settings.PATIENT_CACHE_ENABLED else 0
+    ttl_seconds = settings.PATIENT_CACHE_TTL_SECONDS
+    negative_ttl_seconds = settings.PATIENT_NEGATIVE_CACHE_TTL_SECONDS
+    if settings.WEB_CONCURRENCY > 1:
+        # Invalidations only reach this worker's cache, so an update handled
+        # by another worker is visible here once the (short) TTL runs out
+        cap = settings.PATIENT_CACHE_MULTI_WORKER_TTL_SECONDS
+        ttl_seconds = min(ttl_seconds, cap)
+        negative_ttl_seconds = min(negative_ttl_seconds, cap)
+    return PatientCache(
+        max_entries=max_entries,
+        ttl_seconds=ttl_seconds,
+        negative_ttl_seconds=negative_ttl_seconds,
+    )
@@ -1,29 +1,43 @@
 """Supabase client configuration and initialization."""
 
+import asyncio
 from typing import TYPE_CHECKING, Optional
 
+import httpx
+
 from app.models.base import AI_SCHEMA
 
 try:
-    from supabase import Client, create_client
+    from supabase import AsyncClient, AsyncClientOptions, Client, acreate_client, create_client
 
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
     Client = None  # type: ignore
+    AsyncClient = None  # type: ignore
 
 from app.shared.config import get_settings
 
 if TYPE_CHECKING:
-    from supabase import Client
+    from supabase import AsyncClient, Client
 
 
 class SupabaseClient:
-    """Singleton wrapper for Supabase client with schema support."""
+    """Singleton wrapper for Supabase client with schema support.
+
+    Exposes both the legacy sync client and an async client. The async client
+    shares a single pooled ``httpx.AsyncClient`` (HTTP/2 + keep-alive) so every
+    repository call reuses warm connections instead of blocking the event loop.
+    """
 
     _instance: Optional["Client"] = None
     _initialized: bool = False
 
+    _async_instance: Optional["AsyncClient"] = None
+    _async_initialized: bool = False
+    _http_client: httpx.AsyncClient | None = None
+    _async_lock: asyncio.Lock | None = None
+
     @classmethod
     def get_client(cls) -> Optional["Client"]:
         """
@@ -60,6 +74,72 @@ class SupabaseClient:
             print(f"Warning: Could not initialize Supabase client: {e}")
             cls._instance = None
 
+    @classmethod
+    async def get_async_client(cls) -> Optional["AsyncClient"]:
+        """
+        Returns the async Supabase client instance.
+
+        Initialized lazily on first use (guarded by a lock so concurrent
+        requests don't race to build it).
+
+        Returns:
+            Async Supabase client instance or None if not configured.
+        """
+        if not SUPABASE_AVAILABLE:
+            return None
+
+        if not cls._async_initialized:
+            if cls._async_lock is None:
+                cls._async_lock = asyncio.Lock()
+            async with cls._async_lock:
+                if not cls._async_initialized:
+                    await cls._initialize_async()
+
+        return cls._async_instance
+
+    @classmethod
+    async def _initialize_async(cls) -> None:
+        """Initialize the async Supabase client on top of the shared HTTP pool."""
+        cls._async_initialized = True
+
+        settings = get_settings()
+
+        if not settings.supabase_configured:
+            cls._async_instance = None
+            return
+
+        try:
+            cls._http_client = httpx.AsyncClient(
+                http2=settings.SUPABASE_HTTP2,
+                timeout=settings.SUPABASE_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+                ),
+            )
+            cls._async_instance = await acreate_client(
+                settings.SUPABASE_URL,
+                settings.supabase_key,
+                options=AsyncClientOptions(
+                    httpx_client=cls._http_client,
+                    postgrest_client_timeout=settings.SUPABASE_TIMEOUT,
+                ),
+            )
+        except Exception as e:
+            print(f"Warning: Could not initialize async Supabase client: {e}")
+            cls._async_instance = None
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared HTTP pool (call on application shutdown)."""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+        cls._http_client = None
+        cls._async_instance = None
+        cls._async_initialized = False
+
     @classmethod
     def is_available(cls) -> bool:
         """Check if Supabase is properly configured and available."""
@@ -70,6 +150,10 @@ class SupabaseClient:
         """Reset the client (useful for testing)."""
         cls._instance = None
         cls._initialized = False
+        cls._async_instance = None
+        cls._async_initialized = False
+        cls._http_client = None
+        cls._async_lock = None
 
 
 def get_supabase_client() -> Optional["Client"]:
@@ -85,6 +169,16 @@ def get_supabase_client() -> Optional["Client"]:
     return SupabaseClient.get_client()
 
 
+async def get_async_supabase_client() -> Optional["AsyncClient"]:
+    """
+    Convenience function to get the async Supabase client.
+
+    Query builders are the same as the sync client, but ``execute()`` must be awaited:
+        await client.table("users").select("*").execute()
+    """
+    return await SupabaseClient.get_async_client()
+
+
 class AISchemaClient:
     """
     Helper class for working with AI multiagent schema tables.
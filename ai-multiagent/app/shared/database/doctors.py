@@ -0,0 +1,180 @@
+"""In-memory doctor directory, preloaded and refreshed in the background."""
+
+import asyncio
+import time
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from app.shared.config import get_settings
+
+# Consulting hours used to offer slots until calendar integration exists
+DEFAULT_SLOT_HOURS = (9, 10, 11, 15, 16, 17)
+
+
+@dataclass(slots=True, frozen=True)
+class Doctor:
+    """A doctor as the agent needs it: who, what specialty, when they consult."""
+
+    id: str
+    name: str | None
+    specialty: str | None
+    cmp: str | None = None
+    slot_hours: tuple[int, ...] = DEFAULT_SLOT_HOURS
+
+
+class DoctorDirectory:
+    """
+    Process-wide id → Doctor map.
+
+    There are few doctors and they rarely change, so the whole table is
+    loaded once and refreshed every `refresh_interval` seconds by a
+    background task (lifespan.py). Appointment queries no longer embed
+    doctors(users(full_name)); names and specialties resolve from here.
+    Lookups are synchronous; call `ensure_loaded()` before using them
+    outside the app lifespan (e.g. LangGraph Studio).
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._doctors: dict[str, Doctor] = {}
+        self._loaded_at: float | None = None
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def stale(self) -> bool:
+        """True if never loaded or older than the refresh interval."""
+        return self._loaded_at is None or (
+            time.monotonic() - self._loaded_at > self.refresh_interval
+        )
+
+    async def ensure_loaded(self) -> None:
+        """Load the directory if it was never loaded (or is stale with no refresher)."""
+        if not self._needs_load():
+            return
+        async with self._get_lock():
+            # Another task may have loaded it while we waited for the lock
+            if self._needs_load():
+                await self._load()
+
+    async def refresh(self) -> bool:
+        """Reload every doctor; on failure the previous snapshot is kept."""
+        async with self._get_lock():
+            return await self._load()
+
+    async def start(self) -> None:
+        """Preload and start the periodic refresher (no-op if running)."""
+        if self._task and not self._task.done():
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run(), name="doctor-directory")
+
+    async def stop(self) -> None:
+        """Stop the periodic refresher."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get(self, doctor_id: str | None) -> Optional[Doctor]:
+        """Get a doctor by id."""
+        return self._doctors.get(doctor_id) if doctor_id else None
+
+    def name_of(self, doctor_id: str | None) -> str | None:
+        """Get a doctor's display name by id."""
+        doctor = self.get(doctor_id)
+        return doctor.name if doctor else None
+
+    def all(self) -> list[Doctor]:
+        """Every doctor, sorted by name."""
+        return sorted(self._doctors.values(), key=lambda doctor: doctor.name or "")
+
+    def by_specialty(self, specialty: str | None) -> list[Doctor]:
+        """
+        Doctors whose specialty matches a free-text query.
+
+        Matching ignores case and accents and compares word stems, so
+        "ginecólogo", "ginecóloga" and "Ginecología" all match. An empty
+        query returns every doctor.
+        """
+        if not specialty:
+            return self.all()
+        stem = _normalize(specialty)[:5]
+        return [doctor for doctor in self.all() if stem in _normalize(doctor.specialty or "")]
+
+    def pick(self, specialty: str | None = None) -> Optional[Doctor]:
+        """The doctor to book with: first match for the specialty, else anyone."""
+        doctors = self.by_specialty(specialty) or self.all()
+        return doctors[0] if doctors else None
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "size": len(self._doctors),
+            "refresh_interval": self.refresh_interval,
+            "age_seconds": (
+                round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+            ),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+    def _needs_load(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        refresher_running = self._task is not None and not self._task.done()
+        return self.stale and not refresher_running
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _load(self) -> bool:
+        # backends imports repositories, which import this module
+        from .backends import get_doctor_repository
+
+        rows = await get_doctor_repository().list_all()
+        if rows is None:
+            self.failures += 1
+            return False
+
+        self._doctors = {
+            row["id"]: Doctor(
+                id=row["id"],
+                name=row.get("name"),
+                specialty=row.get("specialty"),
+                cmp=row.get("cmp"),
+            )
+            for row in rows
+        }
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Doctor directory refresh failed: {e}")
+
+
+def _normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache
+def get_doctor_directory() -> DoctorDirectory:
+    """Get the process-wide doctor directory."""
+    return DoctorDirectory(refresh_interval=get_settings().DOCTOR_DIRECTORY_REFRESH_SECONDS)
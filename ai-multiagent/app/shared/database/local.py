@@ -0,0 +1,858 @@
+"""SQLite-backed repositories for offline development and load testing.
+
+Selected with DATABASE_BACKEND=local. Mirrors the Supabase tables the agent
+uses in a single sqlite3 connection (in memory by default, or a file via
+LOCAL_DATABASE_PATH) and returns the same record shapes as the Supabase
+repositories, so tools and services run unchanged without the network.
+"""
+
+import json
+import random
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from app.shared.config import get_settings
+
+from .doctors import get_doctor_directory
+from .records import AppointmentSummary, FollowingSummary, PatientIdentity
+from .repositories import AppointmentRepository, PatientRepository, normalize_phone
+
+# Subset of platform/supabase/migrations used by the repositories.
+# Timestamps are ISO strings, JSON columns are TEXT, booleans are 0/1.
+_SCHEMA = """
+create table if not exists users (
+  id text primary key,
+  created_at text not null,
+  updated_at text not null,
+  full_name text not null,
+  email text not null,
+  phone text unique,
+  birth_date text,
+  picture_url text
+);
+
+create table if not exists patients (
+  id text primary key,
+  dni text not null,
+  clinical_profile_json text
+);
+
+create table if not exists doctors (
+  id text primary key,
+  dni text,
+  cmp text not null,
+  specialty text not null
+);
+
+create table if not exists appointments (
+  id text primary key,
+  patient_id text not null,
+  doctor_id text not null,
+  type text not null,
+  status text not null default 'scheduled',
+  scheduled_at text not null,
+  notes text,
+  created_at text not null,
+  updated_at text not null,
+  conversation_id text
+);
+create index if not exists appointments_patient_scheduled_idx
+  on appointments (patient_id, scheduled_at);
+
+create table if not exists followings (
+  id text primary key,
+  patient_id text not null,
+  appointment_id text,
+  type text not null,
+  channel text not null default 'whatsapp',
+  contacted_at text not null,
+  message_count integer not null default 0,
+  transcript_url text,
+  summary text,
+  severity_score integer,
+  is_urgent integer not null default 0,
+  created_at text not null,
+  conversation_id text
+);
+create index if not exists followings_patient_contacted_idx
+  on followings (patient_id, contacted_at);
+
+create table if not exists plans (
+  id text primary key,
+  appointment_id text not null,
+  start_date text,
+  end_date text,
+  plan text,
+  created_at text not null,
+  updated_at text not null
+);
+create index if not exists plans_appointment_idx on plans (appointment_id);
+
+create table if not exists patient_timeline_events (
+  id text primary key,
+  patient_id text not null,
+  occurred_at text not null,
+  event_type text not null,
+  source_table text not null,
+  source_id text not null,
+  summary text,
+  payload text
+);
+create index if not exists timeline_patient_occurred_idx
+  on patient_timeline_events (patient_id, occurred_at);
+"""
+
+_JSON_COLUMNS = frozenset({"clinical_profile_json", "plan", "payload"})
+_BOOL_COLUMNS = frozenset({"is_urgent"})
+
+_PATIENT_SQL = """
+select u.id, u.phone, u.full_name, u.email, u.birth_date, u.created_at, u.updated_at,
+       p.id as patient_id, p.dni, p.clinical_profile_json
+from users u
+left join patients p on p.id = u.id
+"""
+
+_APPOINTMENT_SQL = "select * from appointments a"
+
+
+def synthetic_phone(index: int) -> str:
+    """Phone number of the index-th seeded patient (e.g. for load-test scripts)."""
+    return f"+519{index:08d}"
+
+
+class LocalDatabase:
+    """
+    A sqlite3 connection holding the local copy of the schema.
+
+    All repository calls run on the event loop thread and are short, so the
+    connection is used synchronously (autocommit, explicit transactions for
+    multi-row writes).
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("pragma journal_mode = wal")
+        self.conn.executescript(_SCHEMA)
+
+    def query(self, sql: str, params: tuple | list = ()) -> list[dict]:
+        """Run a SELECT and decode JSON/boolean columns."""
+        return [_decode_row(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def query_one(self, sql: str, params: tuple | list = ()) -> Optional[dict]:
+        """Run a SELECT expected to return at most one row."""
+        row = self.conn.execute(sql, params).fetchone()
+        return _decode_row(row) if row else None
+
+    def execute(self, sql: str, params: tuple | list = ()) -> int:
+        """Run a write statement and return the number of affected rows."""
+        return self.conn.execute(sql, params).rowcount
+
+    def insert(self, table: str, row: dict) -> dict:
+        """Insert one row and return it."""
+        self.insert_many(table, [row])
+        return row
+
+    def insert_many(self, table: str, rows: list[dict]) -> None:
+        """Insert rows sharing the same columns in one executemany."""
+        if not rows:
+            return
+        columns = list(rows[0])
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"insert into {table} ({', '.join(columns)}) values ({placeholders})"
+        self.conn.executemany(sql, [[_encode(c, row.get(c)) for c in columns] for row in rows])
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes so they commit (or roll back) together."""
+        self.conn.execute("begin")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("rollback")
+            raise
+        self.conn.execute("commit")
+
+    def count(self, table: str) -> int:
+        """Number of rows in a table."""
+        return self.conn.execute(f"select count(*) from {table}").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.conn.close()
+
+    def seed(self, patients: int, seed: int = 42) -> int:
+        """
+        Insert synthetic patients with realistic per-patient history.
+
+        Each patient gets a profile at a random onboarding stage, 0-3
+        appointments (past and upcoming), 0-8 followings with matching
+        timeline events, and a plan for some past consultations. Phones are
+        synthetic_phone(n..n+patients-1) for n existing patients, so repeated
+        calls add more patients; the same seed yields the same data.
+
+        Args:
+            patients: Number of patients to create
+            seed: Random seed
+
+        Returns:
+            Number of patients created
+        """
+        start = self.count("patients")
+        rng = random.Random(seed + start)
+        now = datetime.now()
+
+        def new_id() -> str:
+            return str(UUID(int=rng.getrandbits(128), version=4))
+
+        users: list[dict] = []
+        patient_rows: list[dict] = []
+        doctor_rows: list[dict] = []
+        appointments: list[dict] = []
+        followings: list[dict] = []
+        plans: list[dict] = []
+        events: list[dict] = []
+
+        doctor_ids = [row["id"] for row in self.query("select id from doctors")]
+        if not doctor_ids:
+            for i, specialty in enumerate(_SEED_SPECIALTIES):
+                doctor_id = new_id()
+                doctor_ids.append(doctor_id)
+                users.append(
+                    {
+                        "id": doctor_id,
+                        "created_at": now.isoformat(),
+                        "updated_at": now.isoformat(),
+                        "full_name": f"Dra. {rng.choice(_SEED_FIRST_NAMES)} "
+                        f"{rng.choice(_SEED_LAST_NAMES)}",
+                        "email": f"doctor{i}@seed.local",
+                        "phone": None,
+                        "birth_date": None,
+                    }
+                )
+                doctor_rows.append(
+                    {"id": doctor_id, "dni": None, "cmp": f"CMP{10000 + i}", "specialty": specialty}
+                )
+
+        for i in range(start, start + patients):
+            patient_id = new_id()
+            created = now - timedelta(days=rng.randint(1, 365))
+            state = rng.choices(_SEED_ONBOARDING_STATES, weights=(1, 2, 2, 6))[0]
+            profile: dict[str, Any] = {"onboarding_state": state}
+            if state != "new":
+                profile["initial_needs"] = rng.choice(_SEED_SYMPTOMS)
+
+            users.append(
+                {
+                    "id": patient_id,
+                    "created_at": created.isoformat(),
+                    "updated_at": created.isoformat(),
+                    "full_name": f"{rng.choice(_SEED_FIRST_NAMES)} {rng.choice(_SEED_LAST_NAMES)}",
+                    "email": f"paciente{i}@seed.local",
+                    "phone": synthetic_phone(i),
+                    "birth_date": date(rng.randint(1964, 1985), rng.randint(1, 12), 1).isoformat(),
+                }
+            )
+            patient_rows.append(
+                {"id": patient_id, "dni": f"{40000000 + i}", "clinical_profile_json": profile}
+            )
+
+            for _ in range(rng.randint(0, 3)):
+                scheduled = now + timedelta(days=rng.randint(-120, 45), hours=rng.randint(8, 17))
+                scheduled = scheduled.replace(minute=0, second=0, microsecond=0)
+                past = scheduled < now
+                appointment = {
+                    "id": new_id(),
+                    "patient_id": patient_id,
+                    "doctor_id": rng.choice(doctor_ids),
+                    "type": rng.choice(("pre_consulta", "consulta")),
+                    "status": rng.choice(("completed", "no_show")) if past else "scheduled",
+                    "scheduled_at": scheduled.isoformat(),
+                    "notes": None,
+                    "created_at": created.isoformat(),
+                    "updated_at": created.isoformat(),
+                }
+                appointments.append(appointment)
+                if past and appointment["status"] == "completed" and rng.random() < 0.5:
+                    plans.append(
+                        {
+                            "id": new_id(),
+                            "appointment_id": appointment["id"],
+                            "start_date": scheduled.date().isoformat(),
+                            "end_date": (scheduled + timedelta(days=90)).date().isoformat(),
+                            "plan": {"medications": [rng.choice(_SEED_MEDICATIONS)]},
+                            "created_at": scheduled.isoformat(),
+                            "updated_at": scheduled.isoformat(),
+                        }
+                    )
+
+            for _ in range(rng.randint(0, 8)):
+                contacted = now - timedelta(days=rng.randint(0, 90), minutes=rng.randint(0, 1440))
+                severity = rng.randint(0, 10)
+                following = {
+                    "id": new_id(),
+                    "patient_id": patient_id,
+                    "appointment_id": None,
+                    "type": rng.choice(_SEED_FOLLOWING_TYPES),
+                    "channel": "whatsapp",
+                    "contacted_at": contacted.isoformat(),
+                    "message_count": rng.randint(1, 12),
+                    "summary": rng.choice(_SEED_SYMPTOMS),
+                    "severity_score": severity,
+                    "is_urgent": severity >= 8,
+                    "created_at": contacted.isoformat(),
+                }
+                followings.append(following)
+                events.append(
+                    {
+                        "id": new_id(),
+                        "patient_id": patient_id,
+                        "occurred_at": following["contacted_at"],
+                        "event_type": "followup",
+                        "source_table": "followings",
+                        "source_id": following["id"],
+                        "summary": following["summary"],
+                        "payload": None,
+                    }
+                )
+
+        with self.transaction():
+            self.insert_many("users", users)
+            self.insert_many("patients", patient_rows)
+            self.insert_many("doctors", doctor_rows)
+            self.insert_many("appointments", appointments)
+            self.insert_many("followings", followings)
+            self.insert_many("plans", plans)
+            self.insert_many("patient_timeline_events", events)
+        return patients
+
+
+class LocalPatientRepository:
+    """PatientRepository over LocalDatabase (no cache: reads are in-process)."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def get_by_phone(self, phone: str) -> Optional[dict]:
+        """Get patient by phone number."""
+        row = self.db.query_one(f"{_PATIENT_SQL} where u.phone = ?", (normalize_phone(phone),))
+        return _format_patient(row) if row else None
+
+    async def get_by_id(self, patient_id: str) -> Optional[dict]:
+        """Get patient by ID."""
+        row = self.db.query_one(f"{_PATIENT_SQL} where p.id = ?", (patient_id,))
+        return _format_patient(row) if row else None
+
+    async def get_identity(self, phone: str) -> Optional[PatientIdentity]:
+        """Get just id, phone and name for a phone number."""
+        row = self.db.query_one(
+            "select id, phone, full_name from users where phone = ?", (normalize_phone(phone),)
+        )
+        return PatientIdentity.from_row(row) if row else None
+
+    async def create_or_update(self, phone: str, data: dict) -> Optional[dict]:
+        """Update an existing patient by phone number (never creates users)."""
+        existing = await self.get_by_phone(phone)
+        if not existing:
+            print(f"⚠️ No user found for phone {phone}. Check wa-agent-gateway.")
+            return None
+
+        patient_id = existing["id"]
+        user_updates: dict[str, Any] = {"updated_at": datetime.now().isoformat()}
+        if data.get("name"):
+            user_updates["full_name"] = data["name"]
+        if data.get("birth_date"):
+            user_updates["birth_date"] = data["birth_date"]
+
+        assignments = ", ".join(f"{column} = ?" for column in user_updates)
+        self.db.execute(
+            f"update users set {assignments} where id = ?", [*user_updates.values(), patient_id]
+        )
+        if data.get("clinical_profile"):
+            return await self.merge_clinical_profile(patient_id, data["clinical_profile"])
+        return await self.get_by_id(patient_id)
+
+    async def create_patient_record(self, user_id: str, data: dict) -> Optional[dict]:
+        """Create a patient record for an existing user."""
+        existing = await self.get_by_id(user_id)
+        if existing:
+            return existing
+
+        self.db.insert(
+            "patients",
+            {
+                "id": user_id,
+                "dni": data.get("dni", f"TEMP-{user_id[:8]}"),
+                "clinical_profile_json": data.get("clinical_profile", {"onboarding_state": "new"}),
+            },
+        )
+        return await self.get_by_id(user_id)
+
+    async def merge_clinical_profile(self, patient_id: str, patch: dict) -> Optional[dict]:
+        """Merge top-level keys into the clinical profile (same as jsonb ||)."""
+        with self.db.transaction():
+            row = self.db.query_one(
+                "select clinical_profile_json from patients where id = ?", (patient_id,)
+            )
+            if row is None:
+                return None
+            profile = {**(row["clinical_profile_json"] or {}), **patch}
+            self.db.execute(
+                "update patients set clinical_profile_json = ? where id = ?",
+                (json.dumps(profile), patient_id),
+            )
+        return await self.get_by_id(patient_id)
+
+    async def update_clinical_profile(self, patient_id: str, profile: dict) -> None:
+        """Replace the clinical profile JSON."""
+        self.db.execute(
+            "update patients set clinical_profile_json = ? where id = ?",
+            (json.dumps(profile), patient_id),
+        )
+
+
+class LocalFollowingRepository:
+    """FollowingRepository over LocalDatabase (deferred writes are written inline)."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def create(
+        self,
+        patient_id: str,
+        following_type: str,
+        summary: str | None = None,
+        severity_score: int | None = None,
+        is_urgent: bool = False,
+        message_count: int = 1,
+        appointment_id: str | None = None,
+        transcript_url: str | None = None,
+        conversation_id: str | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]:
+        """Create a new following record."""
+        return self.db.insert(
+            "followings",
+            _following_row(
+                patient_id,
+                following_type,
+                summary=summary,
+                severity_score=severity_score,
+                is_urgent=is_urgent,
+                message_count=message_count,
+                appointment_id=appointment_id,
+                transcript_url=transcript_url,
+                conversation_id=conversation_id,
+            ),
+        )
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+    ) -> list[dict]:
+        """Get recent followings for a patient."""
+        return self._select("*", patient_id, limit, following_type)
+
+    async def get_urgent_by_patient(self, patient_id: str) -> list[dict]:
+        """Get urgent followings for a patient."""
+        return self._select("*", patient_id, None, None, urgent_only=True)
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+        urgent_only: bool = False,
+    ) -> list[FollowingSummary]:
+        """Get recent followings for a patient as slim summaries."""
+        rows = self._select("*", patient_id, limit, following_type, urgent_only)
+        return [FollowingSummary.from_row(row) for row in rows]
+
+    async def update_message_count(self, following_id: str, count: int) -> None:
+        """Update message count for a following."""
+        self.db.execute(
+            "update followings set message_count = ? where id = ?", (count, following_id)
+        )
+
+    def _select(
+        self,
+        columns: str,
+        patient_id: str,
+        limit: int | None,
+        following_type: str | None,
+        urgent_only: bool = False,
+    ) -> list[dict]:
+        sql = f"select {columns} from followings where patient_id = ?"
+        params: list[Any] = [patient_id]
+        if following_type:
+            sql += " and type = ?"
+            params.append(following_type)
+        if urgent_only:
+            sql += " and is_urgent = 1"
+        sql += " order by contacted_at desc"
+        if limit is not None:
+            sql += " limit ?"
+            params.append(limit)
+        return self.db.query(sql, params)
+
+
+class LocalAppointmentRepository:
+    """AppointmentRepository over LocalDatabase."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        upcoming_only: bool = False,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[dict]:
+        """Get appointments for a patient."""
+        rows = await self._select(patient_id, status, upcoming_only or not include_past, limit)
+        return [AppointmentRepository._format_appointment(row) for row in rows]
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[AppointmentSummary]:
+        """Get appointments for a patient as slim summaries."""
+        rows = await self._select(patient_id, status, not include_past, limit)
+        directory = get_doctor_directory()
+        return [
+            AppointmentSummary.from_row(row, doctor_name=directory.name_of(row["doctor_id"]))
+            for row in rows
+        ]
+
+    async def get_by_id(self, appointment_id: str, patient_id: str | None = None) -> Optional[dict]:
+        """Get a specific appointment by ID."""
+        sql = f"{_APPOINTMENT_SQL} where a.id = ?"
+        params = [appointment_id]
+        if patient_id:
+            sql += " and a.patient_id = ?"
+            params.append(patient_id)
+        row = self.db.query_one(sql, params)
+        if not row:
+            return None
+        await get_doctor_directory().ensure_loaded()
+        return AppointmentRepository._format_appointment(row)
+
+    async def get_upcoming(self, patient_id: str, limit: int = 5) -> list[dict]:
+        """Get upcoming appointments."""
+        appointments = await self.get_by_patient(patient_id, status="scheduled", upcoming_only=True)
+        return appointments[:limit]
+
+    async def create(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+    ) -> Optional[dict]:
+        """Create a new appointment."""
+        return self.db.insert(
+            "appointments",
+            _appointment_row(
+                patient_id, doctor_id, scheduled_at, appointment_type, notes, conversation_id
+            ),
+        )
+
+    async def book(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+        following_summary: str | None = None,
+    ) -> Optional[dict]:
+        """Atomically create an appointment and its "business" following."""
+        appointment = _appointment_row(
+            patient_id, doctor_id, scheduled_at, appointment_type, notes, conversation_id
+        )
+        following = _following_row(
+            patient_id,
+            "business",
+            summary=following_summary,
+            appointment_id=appointment["id"],
+            conversation_id=conversation_id,
+        )
+        with self.db.transaction():
+            self.db.insert("appointments", appointment)
+            self.db.insert("followings", following)
+        return {"appointment": appointment, "following": following}
+
+    async def update_status(
+        self, appointment_id: str, status: str, notes: str | None = None
+    ) -> None:
+        """Update appointment status."""
+        now = datetime.now().isoformat()
+        if notes:
+            self.db.execute(
+                "update appointments set status = ?, notes = ?, updated_at = ? where id = ?",
+                (status, notes, now, appointment_id),
+            )
+        else:
+            self.db.execute(
+                "update appointments set status = ?, updated_at = ? where id = ?",
+                (status, now, appointment_id),
+            )
+
+    async def _select(
+        self, patient_id: str, status: str | None, upcoming_only: bool, limit: int
+    ) -> list[dict]:
+        await get_doctor_directory().ensure_loaded()
+        sql = f"{_APPOINTMENT_SQL} where a.patient_id = ?"
+        params: list[Any] = [patient_id]
+        if status:
+            sql += " and a.status = ?"
+            params.append(status)
+        if upcoming_only:
+            sql += " and a.scheduled_at >= ?"
+            params.append(datetime.now().isoformat())
+        sql += " order by a.scheduled_at limit ?"
+        params.append(limit)
+        return self.db.query(sql, params)
+
+
+class LocalDoctorRepository:
+    """DoctorRepository over LocalDatabase."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def list_all(self) -> Optional[list[dict]]:
+        """Get every doctor as {id, name, specialty, cmp}."""
+        return self.db.query(
+            "select d.id, u.full_name as name, d.specialty, d.cmp "
+            "from doctors d left join users u on u.id = d.id"
+        )
+
+
+class LocalTimelineRepository:
+    """TimelineRepository over LocalDatabase."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def add_event(
+        self,
+        patient_id: str,
+        event_type: str,
+        source_table: str,
+        source_id: str,
+        occurred_at: datetime | None = None,
+        summary: str | None = None,
+        payload: dict | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]:
+        """Add an event to the patient timeline."""
+        return self.db.insert(
+            "patient_timeline_events",
+            {
+                "id": str(uuid4()),
+                "patient_id": patient_id,
+                "occurred_at": (occurred_at or datetime.now()).isoformat(),
+                "event_type": event_type,
+                "source_table": source_table,
+                "source_id": source_id,
+                "summary": summary,
+                "payload": payload,
+            },
+        )
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 20,
+        event_type: str | None = None,
+    ) -> list[dict]:
+        """Get timeline events for a patient."""
+        sql = "select * from patient_timeline_events where patient_id = ?"
+        params: list[Any] = [patient_id]
+        if event_type:
+            sql += " and event_type = ?"
+            params.append(event_type)
+        sql += " order by occurred_at desc limit ?"
+        params.append(limit)
+        return self.db.query(sql, params)
+
+
+class LocalPlanRepository:
+    """PlanRepository over LocalDatabase."""
+
+    def __init__(self, db: LocalDatabase):
+        self.db = db
+
+    async def get_active_by_patient(self, patient_id: str) -> list[dict]:
+        """Get active plans for a patient."""
+        plans_by_patient = await self.get_active_by_patients([patient_id])
+        return plans_by_patient.get(patient_id, [])
+
+    async def get_active_by_patients(self, patient_ids: list[str]) -> dict[str, list[dict]]:
+        """Get active plans for many patients in a single query."""
+        if not patient_ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in patient_ids)
+        rows = self.db.query(
+            "select pl.*, a.patient_id as _patient_id from plans pl "
+            "join appointments a on a.id = pl.appointment_id "
+            f"where a.patient_id in ({placeholders}) "
+            "and (pl.end_date is null or pl.end_date >= ?)",
+            [*patient_ids, date.today().isoformat()],
+        )
+
+        plans_by_patient: dict[str, list[dict]] = {}
+        for row in rows:
+            plans_by_patient.setdefault(row.pop("_patient_id"), []).append(row)
+        return plans_by_patient
+
+    async def create(
+        self,
+        appointment_id: str,
+        plan_data: dict,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Optional[dict]:
+        """Create a new plan."""
+        now = datetime.now().isoformat()
+        return self.db.insert(
+            "plans",
+            {
+                "id": str(uuid4()),
+                "appointment_id": appointment_id,
+                "plan": plan_data,
+                "start_date": (start_date or date.today()).isoformat(),
+                "end_date": end_date.isoformat() if end_date else None,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+
+
+@lru_cache
+def get_local_database() -> LocalDatabase:
+    """Get the process-wide local database, seeding it on first use if configured."""
+    settings = get_settings()
+    db = LocalDatabase(settings.LOCAL_DATABASE_PATH)
+    if settings.LOCAL_DATABASE_SEED_PATIENTS > 0 and db.count("patients") == 0:
+        db.seed(settings.LOCAL_DATABASE_SEED_PATIENTS, seed=settings.LOCAL_DATABASE_SEED)
+    return db
+
+
+def _encode(column: str, value: Any) -> Any:
+    if column in _JSON_COLUMNS and value is not None:
+        return json.dumps(value)
+    return value
+
+
+def _decode_row(row: sqlite3.Row) -> dict:
+    data = dict(row)
+    for column in _JSON_COLUMNS.intersection(data):
+        if data[column] is not None:
+            data[column] = json.loads(data[column])
+    for column in _BOOL_COLUMNS.intersection(data):
+        data[column] = bool(data[column])
+    return data
+
+
+def _format_patient(row: dict) -> dict:
+    """Reshape a users/patients join row like the PostgREST embed and format it."""
+    patient = (
+        {"dni": row.pop("dni"), "clinical_profile_json": row.pop("clinical_profile_json")}
+        if row.pop("patient_id")
+        else None
+    )
+    return PatientRepository._format_patient({**row, "patients": patient})
+
+
+def _appointment_row(
+    patient_id: str,
+    doctor_id: str,
+    scheduled_at: datetime,
+    appointment_type: str,
+    notes: str | None,
+    conversation_id: str | None,
+) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "id": str(uuid4()),
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "type": appointment_type,
+        "status": "scheduled",
+        "scheduled_at": scheduled_at.isoformat(),
+        "notes": notes,
+        "created_at": now,
+        "updated_at": now,
+        "conversation_id": conversation_id,
+    }
+
+
+def _following_row(
+    patient_id: str,
+    following_type: str,
+    summary: str | None = None,
+    severity_score: int | None = None,
+    is_urgent: bool = False,
+    message_count: int = 1,
+    appointment_id: str | None = None,
+    transcript_url: str | None = None,
+    conversation_id: str | None = None,
+) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "id": str(uuid4()),
+        "patient_id": patient_id,
+        "appointment_id": appointment_id,
+        "type": following_type,
+        "channel": "whatsapp",
+        "contacted_at": now,
+        "message_count": message_count,
+        "transcript_url": transcript_url,
+        "summary": summary,
+        "severity_score": severity_score,
+        "is_urgent": is_urgent,
+        "created_at": now,
+        "conversation_id": conversation_id,
+    }
+
+
+# Seed vocabulary
+_SEED_SPECIALTIES = ("ginecología", "endocrinología", "nutrición")
+_SEED_ONBOARDING_STATES = ("new", "collecting_info", "scheduling_appointment", "completed")
+_SEED_FOLLOWING_TYPES = ("emotional", "symptoms", "medications", "business", "other")
+_SEED_FIRST_NAMES = (
+    "María", "Rosa", "Carmen", "Ana", "Lucía", "Patricia", "Elena", "Silvia", "Teresa", "Julia",
+)  # fmt: skip
+_SEED_LAST_NAMES = (
+    "García", "Rodríguez", "Quispe", "Flores", "Sánchez", "Ramírez", "Torres", "Vargas", "Rojas",
+)  # fmt: skip
+_SEED_SYMPTOMS = (
+    "bochornos nocturnos",
+    "insomnio y cansancio",
+    "cambios de humor",
+    "dolor articular",
+    "sequedad vaginal",
+    "ansiedad",
+    "palpitaciones",
+    "aumento de peso",
+)
+_SEED_MEDICATIONS = ("estradiol 1mg", "progesterona 100mg", "calcio + vitamina D", "magnesio")
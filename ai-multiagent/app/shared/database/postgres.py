@@ -0,0 +1,682 @@
+"""Direct Postgres repositories over an asyncpg pool (DATABASE_BACKEND=postgres).
+
+Skips PostgREST: queries go straight to Postgres over a pooled connection,
+and asyncpg prepares and caches each statement per connection, so a hot
+lookup is one round trip with binary encoding. The SQL is fixed per method
+(optional filters are nullable parameters) to keep the statement cache hit.
+
+Returns the same record shapes as the Supabase repositories (UUIDs and
+timestamps as strings, embeds as nested dicts) and uses the same patient
+cache. Requires the optional `asyncpg` dependency and DATABASE_URL.
+"""
+
+import asyncio
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import UUID
+
+from app.shared.config import get_settings
+
+from .cache import get_patient_cache
+from .doctors import get_doctor_directory
+from .records import AppointmentSummary, FollowingSummary, PatientIdentity
+from .repositories import AppointmentRepository, PatientRepository, normalize_phone
+
+try:
+    import asyncpg
+
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    asyncpg = None  # type: ignore
+
+_PATIENT_SQL = """
+select u.id, u.phone, u.full_name, u.email, u.birth_date, u.created_at, u.updated_at,
+       case when p.id is null then null
+            else jsonb_build_object('dni', p.dni, 'clinical_profile_json', p.clinical_profile_json)
+       end as patients
+from public.users u
+left join public.patients p on p.id = u.id
+"""
+
+# Doctor names come from the DoctorDirectory instead of a join
+_APPOINTMENT_SQL = """
+select a.id, a.patient_id, a.doctor_id, a.type, a.status, a.scheduled_at, a.notes, a.created_at
+from public.appointments a
+"""
+
+_APPOINTMENTS_BY_PATIENT_SQL = f"""
+{_APPOINTMENT_SQL}
+where a.patient_id = $1
+  and ($2::appointment_status is null or a.status = $2)
+  and (not $3::boolean or a.scheduled_at >= now())
+order by a.scheduled_at
+limit $4
+"""
+
+_FOLLOWINGS_BY_PATIENT_SQL = """
+select * from public.followings
+where patient_id = $1
+  and ($2::followings_type is null or type = $2)
+  and (not $3::boolean or is_urgent)
+order by contacted_at desc
+limit $4
+"""
+
+
+class PostgresDatabase:
+    """Lazily created asyncpg pool shared by the Postgres repositories."""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._pool: Optional["asyncpg.Pool"] = None
+        self._lock = asyncio.Lock()
+
+    async def get_pool(self) -> Optional["asyncpg.Pool"]:
+        """Get the pool, creating it on first use (None if not configured)."""
+        if self._pool is not None:
+            return self._pool
+        if not ASYNCPG_AVAILABLE or not self.dsn:
+            return None
+
+        async with self._lock:
+            if self._pool is None:
+                settings = get_settings()
+                try:
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=settings.POSTGRES_POOL_MIN_SIZE,
+                        max_size=settings.POSTGRES_POOL_MAX_SIZE,
+                        command_timeout=settings.POSTGRES_COMMAND_TIMEOUT,
+                        # Must be 0 behind PgBouncer/Supavisor in transaction mode
+                        statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+                        init=_init_connection,
+                    )
+                except Exception as e:
+                    print(f"❌ Failed to connect to Postgres: {e}")
+                    return None
+        return self._pool
+
+    async def fetch(self, sql: str, *args: Any) -> list[dict]:
+        """Run a query and return rows as plain dicts."""
+        pool = await self.get_pool()
+        if pool is None:
+            return []
+        return [_to_dict(record) for record in await pool.fetch(sql, *args)]
+
+    async def fetchrow(self, sql: str, *args: Any) -> Optional[dict]:
+        """Run a query expected to return at most one row."""
+        pool = await self.get_pool()
+        if pool is None:
+            return None
+        record = await pool.fetchrow(sql, *args)
+        return _to_dict(record) if record else None
+
+    async def fetchval(self, sql: str, *args: Any) -> Any:
+        """Run a query and return the first column of the first row."""
+        pool = await self.get_pool()
+        if pool is None:
+            return None
+        return await pool.fetchval(sql, *args)
+
+    async def execute(self, sql: str, *args: Any) -> None:
+        """Run a write statement."""
+        pool = await self.get_pool()
+        if pool is None:
+            return
+        await pool.execute(sql, *args)
+
+    async def close(self) -> None:
+        """Close the pool (app shutdown)."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class PostgresPatientRepository:
+    """PatientRepository over asyncpg, sharing the process-wide patient cache."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+        self.cache = get_patient_cache()
+
+    async def get_by_phone(self, phone: str) -> Optional[dict]:
+        """Get patient by phone number."""
+        normalized = normalize_phone(phone)
+
+        if self.cache.is_missing(normalized):
+            return None
+
+        cached = self.cache.get_by_phone(normalized)
+        if cached:
+            return cached
+        read_at = self.cache.generation
+
+        try:
+            row = await self.db.fetchrow(f"{_PATIENT_SQL} where u.phone = $1", normalized)
+            if row:
+                patient = PatientRepository._format_patient(row)
+                self.cache.set(patient, phone=normalized, read_at=read_at)
+                return patient
+
+            self.cache.set_missing(normalized, read_at=read_at)
+            return None
+        except Exception as e:
+            print(f"Error getting patient by phone {phone}: {e}")
+            return None
+
+    async def get_by_id(self, patient_id: str) -> Optional[dict]:
+        """Get patient by ID."""
+        cached = self.cache.get_by_id(patient_id)
+        if cached:
+            return cached
+        read_at = self.cache.generation
+
+        try:
+            row = await self.db.fetchrow(f"{_PATIENT_SQL} where p.id = $1", patient_id)
+            if row:
+                patient = PatientRepository._format_patient(row)
+                self._cache_patient(patient, read_at=read_at)
+                return patient
+            return None
+        except Exception:
+            return None
+
+    async def get_identity(self, phone: str) -> Optional[PatientIdentity]:
+        """Get just id, phone and name for a phone number."""
+        normalized = normalize_phone(phone)
+
+        if self.cache.is_missing(normalized):
+            return None
+
+        cached = self.cache.get_by_phone(normalized)
+        if cached:
+            return PatientIdentity(id=cached["id"], phone=cached["phone"], name=cached["name"])
+        read_at = self.cache.generation
+
+        try:
+            row = await self.db.fetchrow(
+                "select id, phone, full_name from public.users where phone = $1", normalized
+            )
+            if row:
+                return PatientIdentity.from_row(row)
+
+            self.cache.set_missing(normalized, read_at=read_at)
+            return None
+        except Exception as e:
+            print(f"Error getting patient identity for {phone}: {e}")
+            return None
+
+    async def create_or_update(self, phone: str, data: dict) -> Optional[dict]:
+        """Update an existing patient by phone number (never creates users)."""
+        try:
+            existing = await self.get_by_phone(phone)
+            if not existing:
+                print(f"⚠️ No user found for phone {phone}. Check wa-agent-gateway.")
+                return None
+
+            patient_id = existing["id"]
+            if data.get("name"):
+                print(f"📝 Updating user {patient_id} full_name to: {data['name']}")
+            await self.db.execute(
+                "update public.users set updated_at = now(), "
+                "full_name = coalesce($2, full_name), "
+                "birth_date = coalesce($3::date, birth_date) "
+                "where id = $1",
+                patient_id,
+                data.get("name") or None,
+                date.fromisoformat(data["birth_date"]) if data.get("birth_date") else None,
+            )
+
+            if data.get("clinical_profile"):
+                return await self.merge_clinical_profile(patient_id, data["clinical_profile"])
+
+            self.cache.invalidate(patient_id=patient_id)
+            return await self.get_by_id(patient_id)
+        except Exception as e:
+            print(f"Error updating patient: {e}")
+            return None
+
+    async def create_patient_record(self, user_id: str, data: dict) -> Optional[dict]:
+        """Create a patient record for an existing user."""
+        try:
+            existing = await self.get_by_id(user_id)
+            if existing:
+                return existing
+
+            await self.db.execute(
+                "insert into public.patients (id, dni, clinical_profile_json) values ($1, $2, $3)",
+                user_id,
+                data.get("dni", f"TEMP-{user_id[:8]}"),
+                data.get("clinical_profile", {"onboarding_state": "new"}),
+            )
+            self.cache.invalidate(patient_id=user_id)
+            return await self.get_by_id(user_id)
+        except Exception as e:
+            print(f"Error creating patient record: {e}")
+            return None
+
+    async def merge_clinical_profile(self, patient_id: str, patch: dict) -> Optional[dict]:
+        """Merge top-level keys into the clinical profile (merge_clinical_profile RPC)."""
+        try:
+            row = await self.db.fetchrow(
+                "with merged as (select * from public.merge_clinical_profile($1, $2)) "
+                "select u.id, u.phone, u.full_name, u.email, u.birth_date, u.created_at, "
+                "u.updated_at, jsonb_build_object('dni', m.dni, "
+                "'clinical_profile_json', m.clinical_profile_json) as patients "
+                "from merged m join public.users u on u.id = m.id",
+                patient_id,
+                patch,
+            )
+            if row:
+                patient = PatientRepository._format_patient(row)
+                self._cache_patient(patient)
+                return patient
+
+            print(f"⚠️ No rows updated for patient {patient_id} - patient may not exist")
+            self.cache.invalidate(patient_id=patient_id)
+            return None
+        except Exception as e:
+            print(f"❌ Error merging clinical profile for {patient_id}: {e}")
+            self.cache.invalidate(patient_id=patient_id)
+            return None
+
+    async def update_clinical_profile(self, patient_id: str, profile: dict) -> None:
+        """Replace the clinical profile JSON."""
+        try:
+            await self.db.execute(
+                "update public.patients set clinical_profile_json = $2 where id = $1",
+                patient_id,
+                profile,
+            )
+        except Exception as e:
+            print(f"Error updating clinical profile: {e}")
+        finally:
+            self.cache.invalidate(patient_id=patient_id)
+
+    def _cache_patient(self, patient: dict, read_at: int | None = None) -> None:
+        phone = patient.get("phone")
+        self.cache.set(patient, phone=normalize_phone(phone) if phone else None, read_at=read_at)
+
+
+class PostgresFollowingRepository:
+    """FollowingRepository over asyncpg (inserts are cheap, so deferred writes go inline)."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+
+    async def create(
+        self,
+        patient_id: str,
+        following_type: str,
+        summary: str | None = None,
+        severity_score: int | None = None,
+        is_urgent: bool = False,
+        message_count: int = 1,
+        appointment_id: str | None = None,
+        transcript_url: str | None = None,
+        conversation_id: str | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]:
+        """Create a new following record."""
+        try:
+            return await self.db.fetchrow(
+                "insert into public.followings (patient_id, type, channel, contacted_at, "
+                "message_count, summary, severity_score, is_urgent, appointment_id, "
+                "transcript_url, conversation_id) "
+                "values ($1, $2, 'whatsapp', now(), $3, $4, $5, $6, $7, $8, $9) returning *",
+                patient_id,
+                following_type,
+                message_count,
+                summary,
+                severity_score,
+                is_urgent,
+                appointment_id,
+                transcript_url,
+                conversation_id,
+            )
+        except Exception as e:
+            print(f"Error creating following: {e}")
+            return None
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+    ) -> list[dict]:
+        """Get recent followings for a patient."""
+        try:
+            return await self.db.fetch(
+                _FOLLOWINGS_BY_PATIENT_SQL, patient_id, following_type, False, limit
+            )
+        except Exception:
+            return []
+
+    async def get_urgent_by_patient(self, patient_id: str) -> list[dict]:
+        """Get urgent followings for a patient."""
+        try:
+            return await self.db.fetch(_FOLLOWINGS_BY_PATIENT_SQL, patient_id, None, True, None)
+        except Exception:
+            return []
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+        urgent_only: bool = False,
+    ) -> list[FollowingSummary]:
+        """Get recent followings for a patient as slim summaries."""
+        try:
+            rows = await self.db.fetch(
+                _FOLLOWINGS_BY_PATIENT_SQL, patient_id, following_type, urgent_only, limit
+            )
+            return [FollowingSummary.from_row(row) for row in rows]
+        except Exception:
+            return []
+
+    async def update_message_count(self, following_id: str, count: int) -> None:
+        """Update message count for a following."""
+        try:
+            await self.db.execute(
+                "update public.followings set message_count = $2 where id = $1",
+                following_id,
+                count,
+            )
+        except Exception:
+            pass
+
+
+class PostgresAppointmentRepository:
+    """AppointmentRepository over asyncpg."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        upcoming_only: bool = False,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[dict]:
+        """Get appointments for a patient."""
+        try:
+            rows = await self.db.fetch(
+                _APPOINTMENTS_BY_PATIENT_SQL,
+                patient_id,
+                status,
+                upcoming_only or not include_past,
+                limit,
+            )
+            await get_doctor_directory().ensure_loaded()
+            return [AppointmentRepository._format_appointment(row) for row in rows]
+        except Exception:
+            return []
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[AppointmentSummary]:
+        """Get appointments for a patient as slim summaries."""
+        try:
+            rows = await self.db.fetch(
+                _APPOINTMENTS_BY_PATIENT_SQL, patient_id, status, not include_past, limit
+            )
+            directory = get_doctor_directory()
+            await directory.ensure_loaded()
+            return [
+                AppointmentSummary.from_row(row, doctor_name=directory.name_of(row["doctor_id"]))
+                for row in rows
+            ]
+        except Exception:
+            return []
+
+    async def get_by_id(self, appointment_id: str, patient_id: str | None = None) -> Optional[dict]:
+        """Get a specific appointment by ID."""
+        try:
+            row = await self.db.fetchrow(
+                f"{_APPOINTMENT_SQL} where a.id = $1 and ($2::uuid is null or a.patient_id = $2)",
+                appointment_id,
+                patient_id,
+            )
+            if not row:
+                return None
+            await get_doctor_directory().ensure_loaded()
+            return AppointmentRepository._format_appointment(row)
+        except Exception:
+            return None
+
+    async def get_upcoming(self, patient_id: str, limit: int = 5) -> list[dict]:
+        """Get upcoming appointments."""
+        return await self.get_by_patient(
+            patient_id, status="scheduled", upcoming_only=True, limit=limit
+        )
+
+    async def create(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+    ) -> Optional[dict]:
+        """Create a new appointment."""
+        try:
+            return await self.db.fetchrow(
+                "insert into public.appointments "
+                "(patient_id, doctor_id, type, status, scheduled_at, notes, conversation_id) "
+                "values ($1, $2, $3, 'scheduled', $4, $5, $6) returning *",
+                patient_id,
+                doctor_id,
+                appointment_type,
+                scheduled_at,
+                notes,
+                conversation_id,
+            )
+        except Exception as e:
+            print(f"Error creating appointment: {e}")
+            return None
+
+    async def book(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+        following_summary: str | None = None,
+    ) -> Optional[dict]:
+        """Atomically create an appointment and its "business" following."""
+        try:
+            return await self.db.fetchval(
+                "select public.book_appointment($1, $2, $3, $4, $5, $6, $7)",
+                patient_id,
+                doctor_id,
+                scheduled_at,
+                appointment_type,
+                notes,
+                conversation_id,
+                following_summary,
+            )
+        except Exception as e:
+            print(f"Error booking appointment: {e}")
+            return None
+
+    async def update_status(
+        self, appointment_id: str, status: str, notes: str | None = None
+    ) -> None:
+        """Update appointment status."""
+        try:
+            await self.db.execute(
+                "update public.appointments set status = $2, notes = coalesce($3, notes), "
+                "updated_at = now() where id = $1",
+                appointment_id,
+                status,
+                notes,
+            )
+        except Exception:
+            pass
+
+
+class PostgresDoctorRepository:
+    """DoctorRepository over asyncpg."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+
+    async def list_all(self) -> Optional[list[dict]]:
+        """Get every doctor as {id, name, specialty, cmp} (None if the query failed)."""
+        if await self.db.get_pool() is None:
+            return None
+        try:
+            return await self.db.fetch(
+                "select d.id, u.full_name as name, d.specialty, d.cmp "
+                "from public.doctors d left join public.users u on u.id = d.id"
+            )
+        except Exception as e:
+            print(f"Error loading doctors: {e}")
+            return None
+
+
+class PostgresTimelineRepository:
+    """TimelineRepository over asyncpg."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+
+    async def add_event(
+        self,
+        patient_id: str,
+        event_type: str,
+        source_table: str,
+        source_id: str,
+        occurred_at: datetime | None = None,
+        summary: str | None = None,
+        payload: dict | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]:
+        """Add an event to the patient timeline."""
+        try:
+            return await self.db.fetchrow(
+                "insert into public.patient_timeline_events "
+                "(patient_id, occurred_at, event_type, source_table, source_id, summary, payload) "
+                "values ($1, coalesce($2, now()), $3, $4, $5, $6, $7) returning *",
+                patient_id,
+                occurred_at,
+                event_type,
+                source_table,
+                source_id,
+                summary,
+                payload,
+            )
+        except Exception as e:
+            print(f"Error adding timeline event: {e}")
+            return None
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 20,
+        event_type: str | None = None,
+    ) -> list[dict]:
+        """Get timeline events for a patient."""
+        try:
+            return await self.db.fetch(
+                "select * from public.patient_timeline_events "
+                "where patient_id = $1 and ($2::timeline_event_type is null or event_type = $2) "
+                "order by occurred_at desc limit $3",
+                patient_id,
+                event_type,
+                limit,
+            )
+        except Exception:
+            return []
+
+
+class PostgresPlanRepository:
+    """PlanRepository over asyncpg."""
+
+    def __init__(self, db: PostgresDatabase):
+        self.db = db
+
+    async def get_active_by_patient(self, patient_id: str) -> list[dict]:
+        """Get active plans for a patient."""
+        plans_by_patient = await self.get_active_by_patients([patient_id])
+        return plans_by_patient.get(patient_id, [])
+
+    async def get_active_by_patients(self, patient_ids: list[str]) -> dict[str, list[dict]]:
+        """Get active plans for many patients in a single query."""
+        if not patient_ids:
+            return {}
+
+        try:
+            rows = await self.db.fetch(
+                "select pl.*, a.patient_id as _patient_id from public.plans pl "
+                "join public.appointments a on a.id = pl.appointment_id "
+                "where a.patient_id = any($1::uuid[]) "
+                "and (pl.end_date is null or pl.end_date >= current_date)",
+                patient_ids,
+            )
+        except Exception:
+            return {}
+
+        plans_by_patient: dict[str, list[dict]] = {}
+        for row in rows:
+            plans_by_patient.setdefault(row.pop("_patient_id"), []).append(row)
+        return plans_by_patient
+
+    async def create(
+        self,
+        appointment_id: str,
+        plan_data: dict,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Optional[dict]:
+        """Create a new plan."""
+        try:
+            return await self.db.fetchrow(
+                "insert into public.plans (appointment_id, plan, start_date, end_date) "
+                "values ($1, $2, $3, $4) returning *",
+                appointment_id,
+                plan_data,
+                start_date or date.today(),
+                end_date,
+            )
+        except Exception as e:
+            print(f"Error creating plan: {e}")
+            return None
+
+
+@lru_cache
+def get_postgres_database() -> PostgresDatabase:
+    """Get the process-wide Postgres pool holder."""
+    return PostgresDatabase(get_settings().DATABASE_URL)
+
+
+async def _init_connection(conn: "asyncpg.Connection") -> None:
+    # jsonb <-> dict, so embeds and JSON columns come back like PostgREST's
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+def _to_dict(record: "asyncpg.Record") -> dict:
+    """Convert a record to PostgREST-like JSON values (UUIDs and dates as strings)."""
+    data = dict(record)
+    for key, value in data.items():
+        if isinstance(value, UUID):
+            data[key] = str(value)
+        elif isinstance(value, (datetime, date)):
+            data[key] = value.isoformat()
+    return data
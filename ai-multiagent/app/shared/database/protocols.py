@@ -0,0 +1,163 @@
+"""Repository interfaces shared by the Supabase, local and Postgres backends.
+
+Callers should depend on these protocols and get instances from the
+factories in backends.py, so the backend can be switched via
+Settings.DATABASE_BACKEND without touching tools or services.
+"""
+
+from datetime import date, datetime
+from typing import Optional, Protocol
+
+from .records import AppointmentSummary, FollowingSummary, PatientIdentity
+
+
+class PatientRepositoryProtocol(Protocol):
+    """Patients (users + patients 1:1)."""
+
+    async def get_by_phone(self, phone: str) -> Optional[dict]: ...
+
+    async def get_by_id(self, patient_id: str) -> Optional[dict]: ...
+
+    async def get_identity(self, phone: str) -> Optional[PatientIdentity]: ...
+
+    async def create_or_update(self, phone: str, data: dict) -> Optional[dict]: ...
+
+    async def create_patient_record(self, user_id: str, data: dict) -> Optional[dict]: ...
+
+    async def merge_clinical_profile(self, patient_id: str, patch: dict) -> Optional[dict]: ...
+
+    async def update_clinical_profile(self, patient_id: str, profile: dict) -> None: ...
+
+
+class FollowingRepositoryProtocol(Protocol):
+    """Follow-up interactions."""
+
+    async def create(
+        self,
+        patient_id: str,
+        following_type: str,
+        summary: str | None = None,
+        severity_score: int | None = None,
+        is_urgent: bool = False,
+        message_count: int = 1,
+        appointment_id: str | None = None,
+        transcript_url: str | None = None,
+        conversation_id: str | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]: ...
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+    ) -> list[dict]: ...
+
+    async def get_urgent_by_patient(self, patient_id: str) -> list[dict]: ...
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+        urgent_only: bool = False,
+    ) -> list[FollowingSummary]: ...
+
+    async def update_message_count(self, following_id: str, count: int) -> None: ...
+
+
+class AppointmentRepositoryProtocol(Protocol):
+    """Appointments."""
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        upcoming_only: bool = False,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[dict]: ...
+
+    async def get_summaries(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[AppointmentSummary]: ...
+
+    async def get_by_id(
+        self, appointment_id: str, patient_id: str | None = None
+    ) -> Optional[dict]: ...
+
+    async def get_upcoming(self, patient_id: str, limit: int = 5) -> list[dict]: ...
+
+    async def create(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+    ) -> Optional[dict]: ...
+
+    async def book(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+        following_summary: str | None = None,
+    ) -> Optional[dict]: ...
+
+    async def update_status(
+        self, appointment_id: str, status: str, notes: str | None = None
+    ) -> None: ...
+
+
+class DoctorRepositoryProtocol(Protocol):
+    """Doctors (read in bulk by the DoctorDirectory)."""
+
+    async def list_all(self) -> Optional[list[dict]]: ...
+
+
+class TimelineRepositoryProtocol(Protocol):
+    """Patient timeline events."""
+
+    async def add_event(
+        self,
+        patient_id: str,
+        event_type: str,
+        source_table: str,
+        source_id: str,
+        occurred_at: datetime | None = None,
+        summary: str | None = None,
+        payload: dict | None = None,
+        deferred: bool = False,
+    ) -> Optional[dict]: ...
+
+    async def get_by_patient(
+        self,
+        patient_id: str,
+        limit: int = 20,
+        event_type: str | None = None,
+    ) -> list[dict]: ...
+
+
+class PlanRepositoryProtocol(Protocol):
+    """Treatment plans."""
+
+    async def get_active_by_patient(self, patient_id: str) -> list[dict]: ...
+
+    async def get_active_by_patients(self, patient_ids: list[str]) -> dict[str, list[dict]]: ...
+
+    async def create(
+        self,
+        appointment_id: str,
+        plan_data: dict,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Optional[dict]: ...
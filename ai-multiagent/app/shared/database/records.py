@@ -0,0 +1,128 @@
+"""Slim read records for hot, per-use-case repository queries.
+
+Each record maps to a column projection in repositories.py, so only the
+columns it carries travel over the wire. Records are slotted and frozen
+(no per-instance __dict__), and `as_dict()` drops empty fields so tool
+results and prompt context serialized for the model stay short.
+"""
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Optional
+
+
+def _parse_timestamp(value: str | None) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class _Record:
+    __slots__ = ()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Serialize for the model, omitting None / empty fields."""
+        data = {}
+        for field in fields(self):  # type: ignore[arg-type]
+            value = getattr(self, field.name)
+            if value is not None and value != {}:
+                data[field.name] = value
+        return data
+
+
+@dataclass(slots=True, frozen=True)
+class PatientIdentity(_Record):
+    """Who the patient is: enough to greet them and key other queries."""
+
+    id: str
+    phone: str | None = None
+    name: str | None = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "PatientIdentity":
+        """Build from a users row projected with PATIENT_IDENTITY_COLUMNS."""
+        return cls(id=row["id"], phone=row.get("phone"), name=row.get("full_name"))
+
+
+@dataclass(slots=True, frozen=True)
+class OnboardingStatus(_Record):
+    """Where the patient is in onboarding, plus what was collected so far."""
+
+    id: str
+    name: str | None = None
+    onboarding_state: str | None = None
+    clinical_profile: dict | None = None
+
+    @classmethod
+    def from_patient(cls, patient: dict) -> "OnboardingStatus":
+        """Build from a formatted patient record (PatientRepository)."""
+        profile = patient.get("clinical_profile") or {}
+        return cls(
+            id=patient["id"],
+            name=patient.get("name"),
+            onboarding_state=profile.get("onboarding_state"),
+            # onboarding_state is already a top-level field
+            clinical_profile={k: v for k, v in profile.items() if k != "onboarding_state"},
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class AppointmentSummary(_Record):
+    """One line of an appointment list."""
+
+    id: str
+    date: str | None = None
+    time: str | None = None
+    type: str | None = None
+    status: str | None = None
+    doctor_name: str | None = None
+
+    @classmethod
+    def from_row(cls, row: dict, doctor_name: str | None = None) -> "AppointmentSummary":
+        """Build from an appointments row projected with APPOINTMENT_SUMMARY_COLUMNS."""
+        scheduled_dt = _parse_timestamp(row.get("scheduled_at"))
+        return cls(
+            id=row["id"],
+            date=scheduled_dt.strftime("%Y-%m-%d") if scheduled_dt else None,
+            time=scheduled_dt.strftime("%H:%M") if scheduled_dt else None,
+            type=row.get("type"),
+            status=row.get("status"),
+            doctor_name=doctor_name,
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class FollowingSummary(_Record):
+    """One entry of a patient's follow-up history."""
+
+    id: str
+    type: str | None = None
+    contacted_at: str | None = None
+    summary: str | None = None
+    severity_score: int | None = None
+    is_urgent: bool = False
+    appointment_id: str | None = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "FollowingSummary":
+        """Build from a followings row projected with FOLLOWING_SUMMARY_COLUMNS."""
+        return cls(
+            id=row["id"],
+            type=row.get("type"),
+            contacted_at=row.get("contacted_at"),
+            summary=row.get("summary"),
+            severity_score=row.get("severity_score"),
+            is_urgent=bool(row.get("is_urgent")),
+            appointment_id=row.get("appointment_id"),
+        )
+
+
+# Column projections (PostgREST select strings) matching the records above
+PATIENT_IDENTITY_COLUMNS = "id, phone, full_name"
+APPOINTMENT_SUMMARY_COLUMNS = "id, doctor_id, type, status, scheduled_at"
+FOLLOWING_SUMMARY_COLUMNS = (
+    "id, type, contacted_at, summary, severity_score, is_urgent, appointment_id"
+)
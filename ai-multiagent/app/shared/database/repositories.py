@@ -4,7 +4,29 @@ from datetime import date, datetime
 from typing import Any, Optional
 from uuid import uuid4
 
-from .client import get_supabase_client
+from app.shared.config import get_settings
+
+from .cache import get_patient_cache
+from .client import get_async_supabase_client
+from .doctors import get_doctor_directory
+from .records import (
+    APPOINTMENT_SUMMARY_COLUMNS,
+    FOLLOWING_SUMMARY_COLUMNS,
+    PATIENT_IDENTITY_COLUMNS,
+    AppointmentSummary,
+    FollowingSummary,
+    PatientIdentity,
+)
+from .write_behind import get_write_behind_queue
+
+# Full patient record, from either side of the users <-> patients 1:1 join
+_USER_COLUMNS = "id, phone, full_name, email, birth_date, created_at, updated_at"
+_PATIENT_COLUMNS = "id, dni, clinical_profile_json"
+PATIENT_BY_USER_SELECT = f"{_USER_COLUMNS}, patients({_PATIENT_COLUMNS})"
+PATIENT_BY_PATIENT_SELECT = f"{_PATIENT_COLUMNS}, users({_USER_COLUMNS})"
+
+# Doctor names come from the DoctorDirectory instead of a doctors(users(...)) embed
+APPOINTMENT_SELECT = "id, patient_id, doctor_id, type, status, scheduled_at, notes, created_at"
 
 
 def normalize_phone(phone: str) -> str:
@@ -12,71 +34,149 @@ def normalize_phone(phone: str) -> str:
     return phone if phone.startswith("+") else f"+{phone}"
 
 
+def _enqueue_write(table: str, row: dict) -> bool:
+    """Queue a row on the write-behind queue (False if disabled or full)."""
+    if not get_settings().WRITE_BEHIND_ENABLED:
+        return False
+    return get_write_behind_queue().enqueue(table, row)
+
+
+async def _flush_pending_writes() -> None:
+    """Flush queued rows so reads see writes made earlier in the same turn."""
+    queue = get_write_behind_queue()
+    if queue.pending:
+        await queue.flush()
+
+
 class PatientRepository:
-    """Repository for patient data."""
+    """Repository for patient data.
+
+    Reads go through the process-wide PatientCache; every write path
+    invalidates or writes through to it.
+    """
 
     def __init__(self):
-        self.client = get_supabase_client()
+        self.cache = get_patient_cache()
 
-    def get_by_phone(self, phone: str) -> Optional[dict]:
+    async def get_by_phone(self, phone: str) -> Optional[dict]:
         """Get patient by phone number.
 
         Phone is normalized to E.164 format (+prefix) for consistent lookups.
         """
-        if not self.client:
+        # Normalize phone to E.164 format
+        normalized = normalize_phone(phone)
+
+        if self.cache.is_missing(normalized):
             return None
 
-        try:
-            # Normalize phone to E.164 format
-            normalized = normalize_phone(phone)
+        cached = self.cache.get_by_phone(normalized)
+        if cached:
+            return cached
+        read_at = self.cache.generation
+
+        client = await get_async_supabase_client()
+        if not client:
+            return None
 
-            result = (
-                self.client.table("users")
-                .select("*, patients(*)")
+        try:
+            # maybe_single() returns None for zero rows instead of raising
+            result = await (
+                client.table("users")
+                .select(PATIENT_BY_USER_SELECT)
                 .eq("phone", normalized)
-                .single()
+                .maybe_single()
                 .execute()
             )
-            if result.data:
-                return self._format_patient(result.data)
+            if result and result.data:
+                patient = self._format_patient(result.data)
+                self.cache.set(patient, phone=normalized, read_at=read_at)
+                return patient
+
+            self.cache.set_missing(normalized, read_at=read_at)
             return None
         except Exception as e:
             print(f"Error getting patient by phone {phone}: {e}")
             return None
 
-    def get_by_id(self, patient_id: str) -> Optional[dict]:
+    async def get_by_id(self, patient_id: str) -> Optional[dict]:
         """Get patient by ID."""
-        if not self.client:
+        cached = self.cache.get_by_id(patient_id)
+        if cached:
+            return cached
+        read_at = self.cache.generation
+
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
-            result = (
-                self.client.table("patients")
-                .select("*, users(*)")
+            result = await (
+                client.table("patients")
+                .select(PATIENT_BY_PATIENT_SELECT)
                 .eq("id", patient_id)
-                .single()
+                .maybe_single()
                 .execute()
             )
-            if result.data:
-                return self._format_patient_reverse(result.data)
+            if result and result.data:
+                patient = self._format_patient_reverse(result.data)
+                self._cache_patient(patient, read_at=read_at)
+                return patient
             return None
         except Exception:
             return None
 
-    def create_or_update(self, phone: str, data: dict) -> Optional[dict]:
+    async def get_identity(self, phone: str) -> Optional[PatientIdentity]:
+        """Get just id, phone and name for a phone number.
+
+        Served from the full-record cache when possible; otherwise only the
+        identity columns are fetched (and nothing is cached).
+        """
+        normalized = normalize_phone(phone)
+
+        if self.cache.is_missing(normalized):
+            return None
+
+        cached = self.cache.get_by_phone(normalized)
+        if cached:
+            return PatientIdentity(id=cached["id"], phone=cached["phone"], name=cached["name"])
+        read_at = self.cache.generation
+
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
+        try:
+            result = await (
+                client.table("users")
+                .select(PATIENT_IDENTITY_COLUMNS)
+                .eq("phone", normalized)
+                .maybe_single()
+                .execute()
+            )
+            if result and result.data:
+                return PatientIdentity.from_row(result.data)
+
+            self.cache.set_missing(normalized, read_at=read_at)
+            return None
+        except Exception as e:
+            print(f"Error getting patient identity for {phone}: {e}")
+            return None
+
+    async def create_or_update(self, phone: str, data: dict) -> Optional[dict]:
         """Update an existing patient by phone number.
 
         NOTE: This method no longer creates new users/patients.
         User creation is handled by wa-agent-gateway via Supabase Auth.
         This method only updates existing records.
         """
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
-            existing = self.get_by_phone(phone)
+            existing = await self.get_by_phone(phone)
             if existing:
-                return self._update_patient(existing["id"], data)
+                return await self._update_patient(existing["id"], data)
             else:
                 # User doesn't exist - wa-agent-gateway should create them first
                 print(f"⚠️ No user found for phone {phone}. Check wa-agent-gateway.")
@@ -85,7 +185,7 @@ class PatientRepository:
             print(f"Error updating patient: {e}")
             return None
 
-    def create_patient_record(self, user_id: str, data: dict) -> Optional[dict]:
+    async def create_patient_record(self, user_id: str, data: dict) -> Optional[dict]:
         """Create a patient record for an existing user.
 
         Use this when a user exists but doesn't have a patient record yet.
@@ -98,12 +198,13 @@ class PatientRepository:
         Returns:
             Created patient data or None if creation failed
         """
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
             # Check if patient record already exists
-            existing = self.get_by_id(user_id)
+            existing = await self.get_by_id(user_id)
             if existing:
                 return existing
 
@@ -114,18 +215,25 @@ class PatientRepository:
                 "clinical_profile_json": data.get("clinical_profile", {"onboarding_state": "new"}),
             }
 
-            self.client.table("patients").insert(patient_data).execute()
-            return self.get_by_id(user_id)
+            await client.table("patients").insert(patient_data).execute()
+            self.cache.invalidate(patient_id=user_id)
+            return await self.get_by_id(user_id)
         except Exception as e:
             print(f"Error creating patient record: {e}")
             return None
 
-    def _update_patient(self, patient_id: str, data: dict) -> Optional[dict]:
+    async def _update_patient(self, patient_id: str, data: dict) -> Optional[dict]:
         """Update existing patient.
 
         Updates users table for name/birth_date.
-        Updates patients table for clinical_profile.
+        Merges clinical_profile into the patients table (see merge_clinical_profile).
+        The users update returns the updated row (return=representation), so
+        only the patients columns are read back to refresh the cache.
         """
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
         try:
             # Update users table (name, birth_date)
             user_updates: dict[str, Any] = {"updated_at": datetime.now().isoformat()}
@@ -135,39 +243,100 @@ class PatientRepository:
             if data.get("birth_date"):
                 user_updates["birth_date"] = data["birth_date"]
 
-            result = self.client.table("users").update(user_updates).eq("id", patient_id).execute()
+            result = await client.table("users").update(user_updates).eq("id", patient_id).execute()
             if not result.data:
                 print(f"⚠️ No rows updated for user {patient_id} - user may not exist")
+                self.cache.invalidate(patient_id=patient_id)
+                return None
 
-            # Update patients table (clinical_profile)
+            # Merge patients.clinical_profile_json (returns patient + user)
             if data.get("clinical_profile"):
-                patient_result = (
-                    self.client.table("patients")
-                    .update({"clinical_profile_json": data["clinical_profile"]})
-                    .eq("id", patient_id)
-                    .execute()
-                )
-                if not patient_result.data:
-                    print(f"⚠️ No rows updated for patient {patient_id} - patient may not exist")
+                return await self.merge_clinical_profile(patient_id, data["clinical_profile"])
 
-            return self.get_by_id(patient_id)
+            # update() can't embed patients(...); join the patients row here
+            patient_row = await (
+                client.table("patients")
+                .select(_PATIENT_COLUMNS)
+                .eq("id", patient_id)
+                .maybe_single()
+                .execute()
+            )
+            patient = self._format_patient(
+                {**result.data[0], "patients": patient_row.data if patient_row else None}
+            )
+            self._cache_patient(patient)
+            return patient
         except Exception as e:
             print(f"❌ Error updating patient {patient_id}: {e}")
+            self.cache.invalidate(patient_id=patient_id)
+            return None
+
+    async def merge_clinical_profile(self, patient_id: str, patch: dict) -> Optional[dict]:
+        """Merge keys into the patient's clinical profile JSON server-side.
+
+        Runs `clinical_profile_json || patch` in a single UPDATE (RPC
+        merge_clinical_profile), so there is no read-modify-write race between
+        concurrent updates to different keys.
+
+        Args:
+            patient_id: Patient UUID
+            patch: Top-level keys to set (existing keys not in the patch are kept)
+
+        Returns:
+            Updated patient data or None if the patient doesn't exist
+        """
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
+        try:
+            result = await (
+                client.rpc(
+                    "merge_clinical_profile",
+                    {"p_patient_id": patient_id, "p_patch": patch},
+                )
+                .select(PATIENT_BY_PATIENT_SELECT)
+                .execute()
+            )
+            # The RPC returns setof patients: a list with zero or one row
+            if result.data:
+                patient = self._format_patient_reverse(result.data[0])
+                self._cache_patient(patient)
+                return patient
+
+            print(f"⚠️ No rows updated for patient {patient_id} - patient may not exist")
+            self.cache.invalidate(patient_id=patient_id)
+            return None
+        except Exception as e:
+            print(f"❌ Error merging clinical profile for {patient_id}: {e}")
+            self.cache.invalidate(patient_id=patient_id)
             return None
 
-    def update_clinical_profile(self, patient_id: str, profile: dict) -> None:
+    async def update_clinical_profile(self, patient_id: str, profile: dict) -> None:
         """Update patient's clinical profile JSON."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return
 
         try:
-            self.client.table("patients").update({"clinical_profile_json": profile}).eq(
-                "id", patient_id
-            ).execute()
+            await (
+                client.table("patients")
+                .update({"clinical_profile_json": profile})
+                .eq("id", patient_id)
+                .execute()
+            )
         except Exception as e:
             print(f"Error updating clinical profile: {e}")
+        finally:
+            self.cache.invalidate(patient_id=patient_id)
 
-    def _format_patient(self, data: dict) -> dict:
+    def _cache_patient(self, patient: dict, read_at: int | None = None) -> None:
+        """Cache a record indexed by its normalized phone."""
+        phone = patient.get("phone")
+        self.cache.set(patient, phone=normalize_phone(phone) if phone else None, read_at=read_at)
+
+    @staticmethod
+    def _format_patient(data: dict) -> dict:
         """Format user+patient data for the agent."""
         patient_data = data.get("patients", {}) or {}
         return {
@@ -186,7 +355,8 @@ class PatientRepository:
             "updated_at": data.get("updated_at"),
         }
 
-    def _format_patient_reverse(self, data: dict) -> dict:
+    @staticmethod
+    def _format_patient_reverse(data: dict) -> dict:
         """Format patient+user data for the agent."""
         user_data = data.get("users", {}) or {}
         return {
@@ -205,10 +375,7 @@ class PatientRepository:
 class FollowingRepository:
     """Repository for follow-up interactions (WhatsApp conversations)."""
 
-    def __init__(self):
-        self.client = get_supabase_client()
-
-    def create(
+    async def create(
         self,
         patient_id: str,
         following_type: str,
@@ -219,6 +386,7 @@ class FollowingRepository:
         appointment_id: str | None = None,
         transcript_url: str | None = None,
         conversation_id: str | None = None,
+        deferred: bool = False,
     ) -> Optional[dict]:
         """Create a new following record.
 
@@ -232,8 +400,11 @@ class FollowingRepository:
             appointment_id: Optional linked appointment UUID
             transcript_url: Optional URL to conversation transcript
             conversation_id: Optional conversation UUID for CMS mapping
+            deferred: Queue the insert on the write-behind queue and return the
+                row (with its client-generated id) without waiting for it
         """
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
@@ -257,25 +428,31 @@ class FollowingRepository:
             if conversation_id:
                 data["conversation_id"] = conversation_id
 
-            result = self.client.table("followings").insert(data).execute()
+            if deferred and _enqueue_write("followings", data):
+                return data
+
+            result = await client.table("followings").insert(data).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error creating following: {e}")
             return None
 
-    def get_by_patient(
+    async def get_by_patient(
         self,
         patient_id: str,
         limit: int = 10,
         following_type: str | None = None,
     ) -> list[dict]:
         """Get recent followings for a patient."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return []
 
+        await _flush_pending_writes()
+
         try:
             query = (
-                self.client.table("followings")
+                client.table("followings")
                 .select("*")
                 .eq("patient_id", patient_id)
                 .order("contacted_at", desc=True)
@@ -285,19 +462,22 @@ class FollowingRepository:
             if following_type:
                 query = query.eq("type", following_type)
 
-            result = query.execute()
+            result = await query.execute()
             return result.data or []
         except Exception:
             return []
 
-    def get_urgent_by_patient(self, patient_id: str) -> list[dict]:
+    async def get_urgent_by_patient(self, patient_id: str) -> list[dict]:
         """Get urgent followings for a patient."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return []
 
+        await _flush_pending_writes()
+
         try:
-            result = (
-                self.client.table("followings")
+            result = await (
+                client.table("followings")
                 .select("*")
                 .eq("patient_id", patient_id)
                 .eq("is_urgent", True)
@@ -308,15 +488,52 @@ class FollowingRepository:
         except Exception:
             return []
 
-    def update_message_count(self, following_id: str, count: int) -> None:
+    async def get_summaries(
+        self,
+        patient_id: str,
+        limit: int = 10,
+        following_type: str | None = None,
+        urgent_only: bool = False,
+    ) -> list[FollowingSummary]:
+        """Get recent followings for a patient as slim summaries (most recent first)."""
+        client = await get_async_supabase_client()
+        if not client:
+            return []
+
+        await _flush_pending_writes()
+
+        try:
+            query = (
+                client.table("followings")
+                .select(FOLLOWING_SUMMARY_COLUMNS)
+                .eq("patient_id", patient_id)
+                .order("contacted_at", desc=True)
+                .limit(limit)
+            )
+
+            if following_type:
+                query = query.eq("type", following_type)
+            if urgent_only:
+                query = query.eq("is_urgent", True)
+
+            result = await query.execute()
+            return [FollowingSummary.from_row(row) for row in (result.data or [])]
+        except Exception:
+            return []
+
+    async def update_message_count(self, following_id: str, count: int) -> None:
         """Update message count for a following."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return
 
         try:
-            self.client.table("followings").update({"message_count": count}).eq(
-                "id", following_id
-            ).execute()
+            await (
+                client.table("followings")
+                .update({"message_count": count})
+                .eq("id", following_id)
+                .execute()
+            )
         except Exception:
             pass
 
@@ -324,10 +541,7 @@ class FollowingRepository:
 class AppointmentRepository:
     """Repository for appointments."""
 
-    def __init__(self):
-        self.client = get_supabase_client()
-
-    def get_by_patient(
+    async def get_by_patient(
         self,
         patient_id: str,
         status: str | None = None,
@@ -336,13 +550,14 @@ class AppointmentRepository:
         limit: int = 10,
     ) -> list[dict]:
         """Get appointments for a patient."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return []
 
         try:
             query = (
-                self.client.table("appointments")
-                .select("*, doctors(users(full_name))")
+                client.table("appointments")
+                .select(APPOINTMENT_SELECT)
                 .eq("patient_id", patient_id)
                 .order("scheduled_at", desc=False)
                 .limit(limit)
@@ -354,38 +569,75 @@ class AppointmentRepository:
             if upcoming_only or not include_past:
                 query = query.gte("scheduled_at", datetime.now().isoformat())
 
-            result = query.execute()
+            result = await query.execute()
+            await get_doctor_directory().ensure_loaded()
             return [self._format_appointment(a) for a in (result.data or [])]
         except Exception:
             return []
 
-    def get_by_id(self, appointment_id: str, patient_id: str | None = None) -> Optional[dict]:
-        """Get a specific appointment by ID."""
-        if not self.client:
-            return None
+    async def get_summaries(
+        self,
+        patient_id: str,
+        status: str | None = None,
+        include_past: bool = False,
+        limit: int = 10,
+    ) -> list[AppointmentSummary]:
+        """Get appointments for a patient as slim summaries (soonest first)."""
+        client = await get_async_supabase_client()
+        if not client:
+            return []
 
         try:
             query = (
-                self.client.table("appointments")
-                .select("*, doctors(users(full_name))")
-                .eq("id", appointment_id)
+                client.table("appointments")
+                .select(APPOINTMENT_SUMMARY_COLUMNS)
+                .eq("patient_id", patient_id)
+                .order("scheduled_at", desc=False)
+                .limit(limit)
             )
 
+            if status:
+                query = query.eq("status", status)
+
+            if not include_past:
+                query = query.gte("scheduled_at", datetime.now().isoformat())
+
+            result = await query.execute()
+            directory = get_doctor_directory()
+            await directory.ensure_loaded()
+            return [
+                AppointmentSummary.from_row(row, doctor_name=directory.name_of(row["doctor_id"]))
+                for row in (result.data or [])
+            ]
+        except Exception:
+            return []
+
+    async def get_by_id(self, appointment_id: str, patient_id: str | None = None) -> Optional[dict]:
+        """Get a specific appointment by ID."""
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
+        try:
+            query = client.table("appointments").select(APPOINTMENT_SELECT).eq("id", appointment_id)
+
             if patient_id:
                 query = query.eq("patient_id", patient_id)
 
-            result = query.single().execute()
+            result = await query.single().execute()
             if result.data:
+                await get_doctor_directory().ensure_loaded()
                 return self._format_appointment(result.data)
             return None
         except Exception:
             return None
 
-    def get_upcoming(self, patient_id: str, limit: int = 5) -> list[dict]:
+    async def get_upcoming(self, patient_id: str, limit: int = 5) -> list[dict]:
         """Get upcoming appointments."""
-        return self.get_by_patient(patient_id, status="scheduled", upcoming_only=True)[:limit]
+        appointments = await self.get_by_patient(patient_id, status="scheduled", upcoming_only=True)
+        return appointments[:limit]
 
-    def create(
+    async def create(
         self,
         patient_id: str,
         doctor_id: str,
@@ -404,7 +656,8 @@ class AppointmentRepository:
             notes: Optional notes for the appointment
             conversation_id: Optional conversation UUID for CMS mapping
         """
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
@@ -423,15 +676,67 @@ class AppointmentRepository:
             if conversation_id:
                 data["conversation_id"] = conversation_id
 
-            result = self.client.table("appointments").insert(data).execute()
+            result = await client.table("appointments").insert(data).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error creating appointment: {e}")
             return None
 
-    def update_status(self, appointment_id: str, status: str, notes: str | None = None) -> None:
+    async def book(
+        self,
+        patient_id: str,
+        doctor_id: str,
+        scheduled_at: datetime,
+        appointment_type: str = "consulta",
+        notes: str | None = None,
+        conversation_id: str | None = None,
+        following_summary: str | None = None,
+    ) -> Optional[dict]:
+        """Atomically create an appointment and its "business" following.
+
+        Calls the book_appointment database function (one round trip, one
+        transaction), so either both rows exist or neither does.
+
+        Args:
+            patient_id: The patient's UUID
+            doctor_id: The doctor's UUID
+            scheduled_at: Appointment datetime
+            appointment_type: Type of appointment (pre_consulta, consulta)
+            notes: Optional notes for the appointment
+            conversation_id: Optional conversation UUID for CMS mapping
+            following_summary: Summary stored on the following
+
+        Returns:
+            {"appointment": row, "following": row} or None if booking failed
+        """
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
+        try:
+            result = await client.rpc(
+                "book_appointment",
+                {
+                    "p_patient_id": patient_id,
+                    "p_doctor_id": doctor_id,
+                    "p_scheduled_at": scheduled_at.isoformat(),
+                    "p_type": appointment_type,
+                    "p_notes": notes,
+                    "p_conversation_id": conversation_id,
+                    "p_following_summary": following_summary,
+                },
+            ).execute()
+            return result.data or None
+        except Exception as e:
+            print(f"Error booking appointment: {e}")
+            return None
+
+    async def update_status(
+        self, appointment_id: str, status: str, notes: str | None = None
+    ) -> None:
         """Update appointment status."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return
 
         try:
@@ -442,15 +747,13 @@ class AppointmentRepository:
             if notes:
                 updates["notes"] = notes
 
-            self.client.table("appointments").update(updates).eq("id", appointment_id).execute()
+            await client.table("appointments").update(updates).eq("id", appointment_id).execute()
         except Exception:
             pass
 
-    def _format_appointment(self, data: dict) -> dict:
-        """Format appointment for the agent."""
-        doctor_info = data.get("doctors", {})
-        doctor_user = doctor_info.get("users", {}) if doctor_info else {}
-
+    @staticmethod
+    def _format_appointment(data: dict) -> dict:
+        """Format appointment for the agent (doctor name from the DoctorDirectory)."""
         scheduled = data.get("scheduled_at", "")
         scheduled_dt = None
         if scheduled:
@@ -463,7 +766,7 @@ class AppointmentRepository:
             "id": data["id"],
             "patient_id": data.get("patient_id"),
             "doctor_id": data.get("doctor_id"),
-            "doctor_name": doctor_user.get("full_name") if doctor_user else None,
+            "doctor_name": get_doctor_directory().name_of(data.get("doctor_id")),
             "type": data.get("type"),
             "status": data.get("status"),
             "scheduled_at": scheduled,
@@ -474,13 +777,37 @@ class AppointmentRepository:
         }
 
 
+class DoctorRepository:
+    """Repository for doctors (loaded in bulk by the DoctorDirectory)."""
+
+    async def list_all(self) -> Optional[list[dict]]:
+        """Get every doctor as {id, name, specialty, cmp} (None if the query failed)."""
+        client = await get_async_supabase_client()
+        if not client:
+            return None
+
+        try:
+            result = await (
+                client.table("doctors").select("id, specialty, cmp, users(full_name)").execute()
+            )
+            return [
+                {
+                    "id": row["id"],
+                    "name": (row.get("users") or {}).get("full_name"),
+                    "specialty": row.get("specialty"),
+                    "cmp": row.get("cmp"),
+                }
+                for row in (result.data or [])
+            ]
+        except Exception as e:
+            print(f"Error loading doctors: {e}")
+            return None
+
+
 class TimelineRepository:
     """Repository for patient timeline events."""
 
-    def __init__(self):
-        self.client = get_supabase_client()
-
-    def add_event(
+    async def add_event(
         self,
         patient_id: str,
         event_type: str,
@@ -489,9 +816,15 @@ class TimelineRepository:
         occurred_at: datetime | None = None,
         summary: str | None = None,
         payload: dict | None = None,
+        deferred: bool = False,
     ) -> Optional[dict]:
-        """Add an event to the patient timeline."""
-        if not self.client:
+        """Add an event to the patient timeline.
+
+        With deferred=True the insert goes through the write-behind queue and
+        the row is returned immediately.
+        """
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
@@ -506,25 +839,31 @@ class TimelineRepository:
                 "payload": payload,
             }
 
-            result = self.client.table("patient_timeline_events").insert(data).execute()
+            if deferred and _enqueue_write("patient_timeline_events", data):
+                return data
+
+            result = await client.table("patient_timeline_events").insert(data).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error adding timeline event: {e}")
             return None
 
-    def get_by_patient(
+    async def get_by_patient(
         self,
         patient_id: str,
         limit: int = 20,
         event_type: str | None = None,
     ) -> list[dict]:
         """Get timeline events for a patient."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return []
 
+        await _flush_pending_writes()
+
         try:
             query = (
-                self.client.table("patient_timeline_events")
+                client.table("patient_timeline_events")
                 .select("*")
                 .eq("patient_id", patient_id)
                 .order("occurred_at", desc=True)
@@ -534,7 +873,7 @@ class TimelineRepository:
             if event_type:
                 query = query.eq("event_type", event_type)
 
-            result = query.execute()
+            result = await query.execute()
             return result.data or []
         except Exception:
             return []
@@ -543,41 +882,45 @@ class TimelineRepository:
 class PlanRepository:
     """Repository for treatment plans (medications, prescriptions)."""
 
-    def __init__(self):
-        self.client = get_supabase_client()
+    async def get_active_by_patient(self, patient_id: str) -> list[dict]:
+        """Get active plans for a patient (via appointments).
 
-    def get_active_by_patient(self, patient_id: str) -> list[dict]:
-        """Get active plans for a patient (via appointments)."""
-        if not self.client:
-            return []
+        One request: plans are inner-joined to their appointment and filtered
+        on the appointment's patient_id server-side.
+        """
+        plans_by_patient = await self.get_active_by_patients([patient_id])
+        return plans_by_patient.get(patient_id, [])
 
-        try:
-            appointments = (
-                self.client.table("appointments")
-                .select("id")
-                .eq("patient_id", patient_id)
-                .execute()
-            )
+    async def get_active_by_patients(self, patient_ids: list[str]) -> dict[str, list[dict]]:
+        """Get active plans for many patients in a single query (e.g. reminder jobs).
 
-            if not appointments.data:
-                return []
+        Returns:
+            Mapping of patient_id to its active plans (patients without plans are omitted)
+        """
+        client = await get_async_supabase_client()
+        if not client or not patient_ids:
+            return {}
 
-            appointment_ids = [a["id"] for a in appointments.data]
+        try:
             today = date.today().isoformat()
 
-            result = (
-                self.client.table("plans")
-                .select("*")
-                .in_("appointment_id", appointment_ids)
-                .or_(f"end_date.is.null,end_date.gte.{today}")
-                .execute()
-            )
+            query = client.table("plans").select("*, appointments!inner(patient_id)")
+            if len(patient_ids) == 1:
+                query = query.eq("appointments.patient_id", patient_ids[0])
+            else:
+                query = query.in_("appointments.patient_id", patient_ids)
 
-            return result.data or []
+            result = await query.or_(f"end_date.is.null,end_date.gte.{today}").execute()
+
+            plans_by_patient: dict[str, list[dict]] = {}
+            for row in result.data or []:
+                appointment = row.pop("appointments", None) or {}
+                plans_by_patient.setdefault(appointment.get("patient_id"), []).append(row)
+            return plans_by_patient
         except Exception:
-            return []
+            return {}
 
-    def create(
+    async def create(
         self,
         appointment_id: str,
         plan_data: dict,
@@ -585,7 +928,8 @@ class PlanRepository:
         end_date: date | None = None,
     ) -> Optional[dict]:
         """Create a new plan."""
-        if not self.client:
+        client = await get_async_supabase_client()
+        if not client:
             return None
 
         try:
@@ -601,7 +945,7 @@ class PlanRepository:
             if end_date:
                 data["end_date"] = end_date.isoformat()
 
-            result = self.client.table("plans").insert(data).execute()
+            result = await client.table("plans").insert(data).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error creating plan: {e}")
@@ -0,0 +1,239 @@
+"""Background write-behind queue for inserts the reply doesn't depend on."""
+
+import asyncio
+from functools import lru_cache
+
+from postgrest import APIError, ReturnMethod
+
+from app.shared.config import get_settings
+
+from .client import get_async_supabase_client
+
+# Queue item: (table name, row) or None as the stop sentinel
+type _Item = tuple[str, dict] | None
+
+# Error codes worth retrying: Postgres connection (08), transaction rollback
+# (40), insufficient resources (53) and operator intervention (57) classes,
+# and PostgREST's connection/pool errors (PGRST000-003)
+_TRANSIENT_CODES = ("08", "40", "53", "57", "PGRST00")
+
+
+def _is_rejected(e: Exception) -> bool:
+    """True if PostgREST rejected the rows themselves (4xx, constraint violation)."""
+    if not isinstance(e, APIError) or e.code is None:
+        return False
+    code = str(e.code)
+    if code.isdigit() and len(code) == 3:
+        # HTTP status, when the error body wasn't JSON
+        return 400 <= int(code) < 500
+    return not code.startswith(_TRANSIENT_CODES)
+
+
+class WriteBehindQueue:
+    """
+    Batches fire-and-forget inserts (followings, timeline events).
+
+    Rows are queued with their client-generated id and written by a single
+    background task: it collects up to `max_batch_size` rows or waits at most
+    `flush_interval` seconds, then issues one multi-row insert per table.
+    Inserts are upserts on the primary key, so a retry after a timeout that
+    actually committed doesn't duplicate rows. Failed batches are retried with
+    exponential backoff and dropped (and counted) after `max_retries`. A batch
+    rejected by the database (bad row, constraint violation) isn't retried:
+    its rows are inserted one by one so only the offending rows are dropped.
+
+    Call `start()` on startup and `stop()` on shutdown (lifespan.py) so queued
+    rows are flushed before the process exits.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        max_batch_size: int,
+        max_retries: int,
+        retry_backoff: float,
+        max_pending: int,
+    ):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue[_Item] | None = None
+        self._worker: asyncio.Task | None = None
+        self._write_lock: asyncio.Lock | None = None
+        # Rows the worker has dequeued but not started writing yet
+        self._collecting: list[tuple[str, dict]] = []
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Rows waiting to be written."""
+        queued = self._queue.qsize() if self._queue else 0
+        return queued + len(self._collecting)
+
+    def start(self) -> None:
+        """Start the background writer (no-op if already running)."""
+        if self._worker and not self._worker.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._write_lock = asyncio.Lock()
+        self._worker = asyncio.create_task(self._run(), name="write-behind")
+
+    def enqueue(self, table: str, row: dict) -> bool:
+        """
+        Queue a row for insertion.
+
+        Returns:
+            False if the queue is full (caller should write inline instead)
+        """
+        self.start()
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait((table, row))
+        except asyncio.QueueFull:
+            return False
+        self.enqueued += 1
+        return True
+
+    async def flush(self) -> None:
+        """
+        Write everything enqueued so far, without waiting for the interval.
+
+        Takes over the rows the worker is still collecting and waits for the
+        batch it's writing, so rows enqueued before the call are in the
+        database (or dropped) when it returns.
+        """
+        if not self._queue:
+            return
+        batch = list(self._collecting)
+        self._collecting.clear()
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is None:
+                # Keep the stop sentinel for the worker
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        # Even with nothing to write, the lock waits for the worker's batch
+        await self._write(batch)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush pending rows and stop the background writer."""
+        if self._worker and not self._worker.done() and self._queue:
+            try:
+                self._queue.put_nowait(None)
+                await asyncio.wait_for(self._worker, timeout=timeout)
+            except (asyncio.QueueFull, TimeoutError):
+                self._worker.cancel()
+        self._worker = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            "pending": self.pending,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+
+            # Shared with flush(), which may take the rows over
+            batch = self._collecting = [item]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._collecting = []
+            if batch:
+                await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: list[tuple[str, dict]]) -> None:
+        """Insert a batch, one multi-row request per table (in first-seen order)."""
+        by_table: dict[str, list[dict]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        assert self._write_lock is not None
+        async with self._write_lock:
+            for table, rows in by_table.items():
+                await self._insert_with_retry(table, rows)
+
+    async def _insert_with_retry(self, table: str, rows: list[dict]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                client = await get_async_supabase_client()
+                if not client:
+                    self.dropped += len(rows)
+                    return
+                await (
+                    client.table(table)
+                    .insert(rows, upsert=True, returning=ReturnMethod.minimal)
+                    .execute()
+                )
+                self.written += len(rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                if _is_rejected(e):
+                    await self._isolate_rejected(table, rows, e)
+                    return
+                if attempt >= self.max_retries:
+                    self.dropped += len(rows)
+                    print(
+                        f"❌ Write-behind: dropped {len(rows)} {table} rows "
+                        f"after {attempt + 1} attempts: {e}"
+                    )
+                    return
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+
+    async def _isolate_rejected(self, table: str, rows: list[dict], error: Exception) -> None:
+        """Retry a rejected batch row by row, dropping only the rows that fail."""
+        if len(rows) == 1:
+            self.dropped += 1
+            print(f"❌ Write-behind: dropped {table} row {rows[0].get('id')}: {error!r}")
+            return
+        for row in rows:
+            await self._insert_with_retry(table, [row])
+
+
+@lru_cache
+def get_write_behind_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue."""
+    settings = get_settings()
+    return WriteBehindQueue(
+        flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+        max_batch_size=settings.WRITE_BEHIND_MAX_BATCH_SIZE,
+        max_retries=settings.WRITE_BEHIND_MAX_RETRIES,
+        retry_backoff=settings.WRITE_BEHIND_RETRY_BACKOFF,
+        max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    )
@@ -8,6 +8,9 @@ from .clients import (
     get_model,
     get_model_with_fallbacks,
 )
+from .http import close_llm_http_clients, get_llm_async_http_client, get_llm_http_client
+from .registry import ModelRegistry, get_model_registry
+from .usage import UsageTracker, get_usage_tracker
 
 __all__ = [
     "AllowedModel",
@@ -16,5 +19,12 @@ __all__ = [
     "get_chat_model_with_fallbacks",
     "get_model",
     "get_model_with_fallbacks",
+    "close_llm_http_clients",
+    "get_llm_async_http_client",
+    "get_llm_http_client",
+    "ModelRegistry",
+    "get_model_registry",
+    "UsageTracker",
+    "get_usage_tracker",
 ]
 
@@ -14,6 +14,8 @@ from pydantic import BaseModel, Field, SecretStr
 
 from app.shared.config import get_settings
 
+from .http import get_llm_async_http_client, get_llm_http_client
+
 # Supported models
 type AllowedModel = Literal[
     # OpenAI
@@ -70,6 +72,11 @@ def get_model(
     """
     Get a LangChain chat model instance.
 
+    Instances are cached per (model, temperature) so provider-specific
+    parameter handling still runs at construction, but they are thin: every
+    OpenAI model sends its requests through one shared HTTP pool, so a new
+    temperature doesn't open new connections.
+
     Args:
         model_name: Name of the model to use
         temperature: Temperature for generation
@@ -86,6 +93,8 @@ def get_model(
                 temperature=temperature,
                 api_key=SecretStr(settings.OPENAI_API_KEY),
                 stream_usage=True,
+                http_client=get_llm_http_client(),
+                http_async_client=get_llm_async_http_client(),
             )
         case "gemini-2.0-flash" | "gemini-2.0-flash-lite" | "gemini-2.5-flash-preview-04-17":
             return ChatGoogleGenerativeAI(
@@ -0,0 +1,51 @@
+"""HTTP connection pool shared by every model provider client."""
+
+from functools import lru_cache
+
+import httpx
+
+from app.shared.config import get_settings
+
+
+def _limits() -> httpx.Limits:
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+@lru_cache
+def get_llm_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the async HTTP pool used by all OpenAI chat models.
+
+    Request timeouts are set per request by the provider SDK; this client only
+    owns the connections (keep-alive, HTTP/2 multiplexing).
+    """
+    return httpx.AsyncClient(
+        http2=get_settings().LLM_HTTP2,
+        follow_redirects=True,
+        limits=_limits(),
+    )
+
+
+@lru_cache
+def get_llm_http_client() -> httpx.Client:
+    """Get the sync HTTP pool (only used by sync invocations, e.g. scripts)."""
+    return httpx.Client(
+        http2=get_settings().LLM_HTTP2,
+        follow_redirects=True,
+        limits=_limits(),
+    )
+
+
+async def close_llm_http_clients() -> None:
+    """Close the shared pools (call on application shutdown)."""
+    if get_llm_async_http_client.cache_info().currsize:
+        await get_llm_async_http_client().aclose()
+        get_llm_async_http_client.cache_clear()
+    if get_llm_http_client.cache_info().currsize:
+        get_llm_http_client().close()
+        get_llm_http_client.cache_clear()
@@ -0,0 +1,170 @@
+"""Process-wide registry of tool-bound chat models, built once at startup."""
+
+import asyncio
+import time
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any
+
+from langchain_core.runnables import Runnable as LCRunnable
+from langchain_core.tools import BaseTool
+from langchain_openai import ChatOpenAI
+
+from .clients import (
+    DEFAULT_FALLBACK_MODELS,
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    AllowedModel,
+    get_model,
+    get_model_with_fallbacks,
+)
+
+# (model, fallbacks, temperature, tool names, bind options)
+type _Key = tuple[str, tuple[str, ...], float, tuple[str, ...], tuple[tuple[str, Any], ...]]
+
+
+class ModelRegistry:
+    """
+    Caches chat models with tools bound, per (model, temperature, tool set).
+
+    Binding tools converts every tool to a JSON schema and wrapping fallbacks
+    builds a new RunnableWithFallbacks; doing that per turn costs CPU before
+    the request is even sent. The registry does it once (normally during
+    startup) and hands out the same runnable afterwards. `warm()` opens the
+    providers' HTTP connections so the first turn doesn't pay the TLS
+    handshake; `stats()` reports build times and cold vs warm round trips.
+    """
+
+    def __init__(self) -> None:
+        self._bound: dict[_Key, LCRunnable] = {}
+        self._build_ms: dict[_Key, float] = {}
+        self._warmup: dict[str, dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def with_tools(
+        self,
+        tools: Sequence[BaseTool],
+        temperature: float = DEFAULT_TEMPERATURE,
+        model_name: AllowedModel | None = None,
+        fallback_models: list[AllowedModel] | None = None,
+        **bind_kwargs: Any,
+    ) -> LCRunnable:
+        """
+        Get the model (with fallbacks) with `tools` bound, building it on first use.
+
+        Args:
+            tools: Tools to bind (the set is identified by tool names)
+            temperature: Temperature for generation
+            model_name: Primary model (defaults to gpt-5.1)
+            fallback_models: Fallback models (defaults to gemini-2.0-flash)
+            **bind_kwargs: Passed to bind_tools (e.g. strict, parallel_tool_calls)
+        """
+        model_name = model_name or DEFAULT_MODEL
+        fallback_models = fallback_models or DEFAULT_FALLBACK_MODELS
+        key: _Key = (
+            model_name,
+            tuple(fallback_models),
+            temperature,
+            tuple(tool.name for tool in tools),
+            tuple(sorted(bind_kwargs.items())),
+        )
+        bound = self._bound.get(key)
+        if bound is not None:
+            self.hits += 1
+            return bound
+
+        self.misses += 1
+        started = time.perf_counter()
+        model = get_model_with_fallbacks(model_name, fallback_models, temperature)
+        bound = model.bind_tools(list(tools), **bind_kwargs)
+        self._build_ms[key] = (time.perf_counter() - started) * 1000
+        self._bound[key] = bound
+        return bound
+
+    def model(
+        self,
+        temperature: float = DEFAULT_TEMPERATURE,
+        model_name: AllowedModel | None = None,
+        fallback_models: list[AllowedModel] | None = None,
+    ) -> LCRunnable:
+        """
+        Get the model (with fallbacks) without tools, building it on first use.
+
+        For side calls such as summaries; registered like tool-bound models,
+        so `warm()` and `stats()` cover it.
+
+        Args:
+            temperature: Temperature for generation
+            model_name: Primary model (defaults to gpt-5.1)
+            fallback_models: Fallback models (defaults to gemini-2.0-flash)
+        """
+        model_name = model_name or DEFAULT_MODEL
+        fallback_models = fallback_models or DEFAULT_FALLBACK_MODELS
+        key: _Key = (model_name, tuple(fallback_models), temperature, (), ())
+        model = self._bound.get(key)
+        if model is not None:
+            self.hits += 1
+            return model
+
+        self.misses += 1
+        started = time.perf_counter()
+        model = get_model_with_fallbacks(model_name, fallback_models, temperature)
+        self._build_ms[key] = (time.perf_counter() - started) * 1000
+        self._bound[key] = model
+        return model
+
+    async def warm(self, timeout: float = 10.0) -> None:
+        """
+        Open an HTTP connection to every registered OpenAI model's endpoint.
+
+        Sends two cheap requests per endpoint: the first pays DNS/TLS (cold),
+        the second reuses the pooled connection (warm). Failures are only
+        logged; the first turn then opens the connection itself.
+        """
+        clients: dict[str, Any] = {}
+        for model_name, fallbacks, temperature, _, _ in self._bound:
+            for name in (model_name, *fallbacks):
+                model = get_model(name, temperature)
+                if isinstance(model, ChatOpenAI):
+                    client = model.root_async_client
+                    clients.setdefault(str(client.base_url), client)
+
+        for base_url, client in clients.items():
+            timings: dict[str, Any] = {}
+            for phase in ("cold_ms", "warm_ms"):
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(client.models.list(), timeout=timeout)
+                except Exception as e:
+                    # An HTTP error status still means the connection is open
+                    if getattr(e, "status_code", None) is None:
+                        print(f"⚠️ Could not warm up {base_url}: {e!r}")
+                        timings["error"] = repr(e)
+                        break
+                timings[phase] = round((time.perf_counter() - started) * 1000, 1)
+            self._warmup[base_url] = timings
+
+    def stats(self) -> dict:
+        """Registered models, build times and connection warm-up timings."""
+        return {
+            "models": [
+                {
+                    "model": key[0],
+                    "fallbacks": list(key[1]),
+                    "temperature": key[2],
+                    "tools": len(key[3]),
+                    "build_ms": round(self._build_ms[key], 1),
+                }
+                for key in self._bound
+            ],
+            "hits": self.hits,
+            "misses": self.misses,
+            "warmup": self._warmup,
+        }
+
+
+@lru_cache
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    return ModelRegistry()
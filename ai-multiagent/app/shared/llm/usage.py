@@ -0,0 +1,87 @@
+"""Token usage and prompt-cache counters per model call site."""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage
+
+
+@dataclass(slots=True)
+class _Usage:
+    calls: int = 0
+    cached_calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cached_latency_ms: float = 0.0
+    uncached_latency_ms: float = 0.0
+
+
+class UsageTracker:
+    """
+    Accumulates token usage reported by the provider (usage_metadata).
+
+    Cached tokens are the prompt prefix the provider served from its prompt
+    cache (input_token_details.cache_read); they are billed at a discount and
+    skip prefill, so the hit rate and the latency of calls with and without
+    a cache hit show what the prompt layout saves.
+    """
+
+    def __init__(self) -> None:
+        self._usage: dict[str, _Usage] = {}
+
+    def record(self, name: str, message: AIMessage, latency: float) -> None:
+        """
+        Record one model call.
+
+        Args:
+            name: Call site (e.g. "chat_v2")
+            message: The model's response (usage_metadata may be missing)
+            latency: Seconds the call took
+        """
+        metadata = message.usage_metadata
+        if not metadata:
+            return
+        cached = (metadata.get("input_token_details") or {}).get("cache_read", 0) or 0
+        usage = self._usage.setdefault(name, _Usage())
+        usage.calls += 1
+        usage.input_tokens += metadata.get("input_tokens", 0)
+        usage.output_tokens += metadata.get("output_tokens", 0)
+        usage.cached_tokens += cached
+        if cached:
+            usage.cached_calls += 1
+            usage.cached_latency_ms += latency * 1000
+        else:
+            usage.uncached_latency_ms += latency * 1000
+
+    def stats(self) -> dict:
+        """Counters per call site, with cache hit rate and average latencies."""
+        result = {}
+        for name, usage in self._usage.items():
+            uncached_calls = usage.calls - usage.cached_calls
+            result[name] = {
+                "calls": usage.calls,
+                "input_tokens": usage.input_tokens,
+                "cached_tokens": usage.cached_tokens,
+                "output_tokens": usage.output_tokens,
+                "cache_hit_rate": (
+                    round(usage.cached_tokens / usage.input_tokens, 3)
+                    if usage.input_tokens
+                    else 0.0
+                ),
+                "avg_latency_ms_cached": (
+                    round(usage.cached_latency_ms / usage.cached_calls, 1)
+                    if usage.cached_calls
+                    else None
+                ),
+                "avg_latency_ms_uncached": (
+                    round(usage.uncached_latency_ms / uncached_calls, 1) if uncached_calls else None
+                ),
+            }
+        return result
+
+
+@lru_cache
+def get_usage_tracker() -> UsageTracker:
+    """Get the process-wide usage tracker."""
+    return UsageTracker()
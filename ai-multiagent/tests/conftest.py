@@ -0,0 +1,73 @@
+"""Shared test doubles."""
+
+import time
+
+import pytest
+
+from app.shared.concurrency.redis_scripts import EXTEND_SCRIPT, RELEASE_SCRIPT
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis.asyncio commands locks and claims use.
+
+    Keys expire by the real monotonic clock. With `fail` set every command
+    raises, like an unreachable server.
+    """
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[str, float | None]] = {}
+        self.fail = False
+        self.calls: list[str] = []
+
+    def ttl_ms(self, key: str) -> float | None:
+        """Remaining time to live of a live key (None if it doesn't expire or is gone)."""
+        entry = self._entry(key)
+        if entry is None or entry[1] is None:
+            return None
+        return (entry[1] - time.monotonic()) * 1000
+
+    async def get(self, key: str) -> str | None:
+        self._call("get")
+        entry = self._entry(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: str, nx: bool = False, px: int | None = None) -> bool:
+        self._call("set")
+        if nx and self._entry(key) is not None:
+            return False
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def eval(self, script: str, numkeys: int, key: str, *args) -> int:
+        self._call("eval")
+        entry = self._entry(key)
+        if entry is None or entry[0] != args[0]:
+            return 0
+        if script == EXTEND_SCRIPT:
+            self.data[key] = (entry[0], time.monotonic() + int(args[1]) / 1000)
+            return 1
+        if script == RELEASE_SCRIPT:
+            del self.data[key]
+            return 1
+        raise NotImplementedError(script)
+
+    async def aclose(self) -> None:
+        pass
+
+    def _call(self, command: str) -> None:
+        self.calls.append(command)
+        if self.fail:
+            raise ConnectionError("Connection refused")
+
+    def _entry(self, key: str) -> tuple[str, float | None] | None:
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+
+@pytest.fixture
+def redis_server() -> FakeRedis:
+    return FakeRedis()
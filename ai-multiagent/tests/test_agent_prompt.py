@@ -0,0 +1,81 @@
+"""Agent prompt: cached prefix first, per-turn context as a trailing user message."""
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_google_genai.chat_models import _parse_chat_history
+from langchain_openai.chat_models.base import _convert_message_to_dict
+
+from app.chat_v2.agent import build_prompt
+from app.chat_v2.prompts import SYSTEM_PROMPT
+
+SYSTEM = SystemMessage(content=SYSTEM_PROMPT)
+
+
+def state(messages: list, **overrides) -> dict:
+    return {
+        "messages": messages,
+        "phone_number": "+51900",
+        "conversation_id": "c-1",
+        "summary": "Ana reportó bochornos.",
+        **overrides,
+    }
+
+
+def mid_turn_history() -> list:
+    return [
+        HumanMessage(content="hola", id="h1"),
+        AIMessage(
+            content="",
+            id="a1",
+            tool_calls=[{"name": "get_patient", "args": {}, "id": "call-1", "type": "tool_call"}],
+        ),
+        ToolMessage(content="{}", tool_call_id="call-1", id="t1"),
+    ]
+
+
+def test_context_is_a_tagged_user_message_after_the_history():
+    messages = build_prompt(SYSTEM, state(mid_turn_history()))
+
+    assert [type(message) for message in messages[:2]] == [SystemMessage, SystemMessage]
+    assert not any(isinstance(message, SystemMessage) for message in messages[2:])
+    context = messages[-1]
+    assert isinstance(context, HumanMessage)
+    assert context.content.startswith("<contexto>")
+    assert context.content.rstrip().endswith("</contexto>")
+    assert 'conversation_id="c-1"' in context.content
+
+
+def test_context_changes_leave_the_prefix_alone():
+    history = mid_turn_history()
+    first = build_prompt(SYSTEM, state(history, is_new_patient=True))
+    second = build_prompt(SYSTEM, state(history, is_new_patient=False))
+
+    assert first[:-1] == second[:-1]
+    assert first[-1] != second[-1]
+
+
+def test_gemini_keeps_the_context_out_of_the_system_instruction():
+    system_instruction, contents = _parse_chat_history(
+        build_prompt(SYSTEM, state(mid_turn_history()))
+    )
+
+    instruction = "".join(part.text for part in system_instruction.parts)
+    assert "+51900" not in instruction
+    assert "Ana reportó bochornos." in instruction
+    assert contents[-1].role == "user"
+    assert "<contexto>" in contents[-1].parts[-1].text
+
+
+def test_openai_sends_the_context_as_a_user_message():
+    payload = [
+        _convert_message_to_dict(message)
+        for message in build_prompt(SYSTEM, state(mid_turn_history()))
+    ]
+
+    assert [message["role"] for message in payload] == [
+        "system",
+        "system",
+        "user",
+        "assistant",
+        "tool",
+        "user",
+    ]
@@ -0,0 +1,164 @@
+"""Bounded checkpointer: index rebuild, TTL sweep and thread cap."""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.base.id import UUID, uuid6
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.shared.checkpoint import bounded
+from app.shared.checkpoint.bounded import BoundedCheckpointer
+from app.shared.checkpoint.compaction import checkpoint_time, latest_checkpoint_ids
+
+# 100 ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+class Clock:
+    """Stands in for time.monotonic so tests can move time forward."""
+
+    def __init__(self) -> None:
+        self.now = 10_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    # Only the module under test sees the fake clock (asyncio keeps the real one)
+    monkeypatch.setattr(bounded, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def uuid6_at(written: datetime) -> str:
+    """A LangGraph-style checkpoint id for a checkpoint written at `written`."""
+    timestamp = int(written.timestamp() * 1e7) + UUID_EPOCH_OFFSET
+    value = ((timestamp >> 12) & 0xFFFFFFFFFFFF) << 80
+    value |= (timestamp & 0x0FFF) << 64
+    return str(UUID(int=value, version=6))
+
+
+async def put(saver, thread_id: str, age: timedelta | None = None) -> None:
+    checkpoint = empty_checkpoint()
+    if age is not None:
+        written = datetime.now(UTC) - age
+        checkpoint["id"] = uuid6_at(written)
+        checkpoint["ts"] = written.isoformat()
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    await saver.aput(config, checkpoint, {"source": "input", "step": -1}, {})
+
+
+def make_checkpointer(saver, **overrides) -> BoundedCheckpointer:
+    options = {"ttl_seconds": 3600, "max_threads": 100, "sweep_interval": 60}
+    return BoundedCheckpointer(saver, **{**options, **overrides})
+
+
+def test_checkpoint_time_reads_the_uuid6_timestamp():
+    written = checkpoint_time(str(uuid6()))
+
+    assert written is not None
+    assert abs((datetime.now(UTC) - written).total_seconds()) < 5
+    assert checkpoint_time("not-a-uuid") is None
+    assert checkpoint_time(str(uuid.uuid4())) is None
+
+
+def test_seed_indexes_threads_from_their_latest_checkpoint_ids(tmp_path):
+    async def scenario() -> tuple[dict, list[str], int]:
+        async with AsyncSqliteSaver.from_conn_string(str(tmp_path / "cp.sqlite")) as saver:
+            await saver.setup()
+            await put(saver, "v2:old", age=timedelta(hours=3))
+            await put(saver, "v2:old", age=timedelta(hours=2))
+            await put(saver, "v2:recent", age=timedelta(minutes=5))
+            await put(saver, "v2:middle", age=timedelta(minutes=50))
+            await put(saver, "v1:other", age=timedelta(hours=5))
+            latest = await latest_checkpoint_ids(saver)
+
+            checkpointer = make_checkpointer(saver, namespace="v2")
+            await checkpointer.seed()
+            thread_ids = checkpointer.thread_ids()
+            deleted = await checkpointer.sweep()
+            return latest, thread_ids, deleted
+
+    latest, thread_ids, deleted = asyncio.run(scenario())
+
+    assert set(latest) == {"v2:old", "v2:recent", "v2:middle", "v1:other"}
+    # Least recently used first; the v1 thread belongs to another checkpointer
+    assert thread_ids == ["old", "middle", "recent"]
+    # Only "old" is past the one hour TTL
+    assert deleted == 1
+
+
+def test_idle_threads_expire_after_ttl(clock: Clock):
+    async def scenario() -> tuple[list[str], dict]:
+        saver = InMemorySaver()
+        checkpointer = make_checkpointer(saver, ttl_seconds=60)
+        await put(checkpointer, "a")
+        clock.now += 30
+        await put(checkpointer, "b")
+        clock.now += 31
+        await checkpointer.sweep()
+        return checkpointer.thread_ids(), dict(saver.storage)
+
+    thread_ids, storage = asyncio.run(scenario())
+
+    assert thread_ids == ["b"]
+    assert "a" not in storage
+    assert "b" in storage
+
+
+def test_least_recently_used_threads_are_evicted_beyond_the_cap(clock: Clock):
+    async def scenario() -> tuple[list[str], dict]:
+        checkpointer = make_checkpointer(InMemorySaver(), max_threads=2)
+        for thread_id in ("a", "b", "c"):
+            await put(checkpointer, thread_id)
+            clock.now += 1
+        # Reading "a" makes it the most recently used
+        await checkpointer.aget_tuple({"configurable": {"thread_id": "a"}})
+        await checkpointer.sweep()
+        return checkpointer.thread_ids(), checkpointer.stats()
+
+    thread_ids, stats = asyncio.run(scenario())
+
+    assert thread_ids == ["c", "a"]
+    assert stats["evicted"] == 1
+    assert stats["expired"] == 0
+
+
+def test_going_over_the_cap_wakes_the_sweeper(clock: Clock):
+    async def scenario() -> list[str]:
+        checkpointer = make_checkpointer(InMemorySaver(), max_threads=1, sweep_interval=3600)
+        await checkpointer.start()
+        await put(checkpointer, "a")
+        clock.now += 1
+        await put(checkpointer, "b")
+        await asyncio.sleep(0.05)
+        await checkpointer.stop()
+        return checkpointer.thread_ids()
+
+    assert asyncio.run(scenario()) == ["b"]
+
+
+def test_namespaces_share_one_saver(clock: Clock):
+    async def scenario() -> tuple[list[str], list[str], set[str]]:
+        saver = InMemorySaver()
+        v1 = make_checkpointer(saver, namespace="v1")
+        v2 = make_checkpointer(saver, namespace="v2")
+        await put(v1, "t1")
+        await put(v2, "t1")
+        await v2.adelete_thread("t1")
+        found = await v1.aget_tuple({"configurable": {"thread_id": "t1"}})
+        return v1.thread_ids(), [found.config["configurable"]["thread_id"]], set(saver.storage)
+
+    v1_threads, returned, stored = asyncio.run(scenario())
+
+    assert v1_threads == ["t1"]
+    assert returned == ["t1"]
+    assert "v1:t1" in stored
+    assert "v2:t1" not in stored
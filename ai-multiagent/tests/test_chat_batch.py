@@ -0,0 +1,54 @@
+"""Batch endpoint service: per-thread order and the concurrency cap."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.chat_v2 import service as service_module
+from app.chat_v2.schemas import BatchItemResult, MessageRequest
+from app.chat_v2.service import ChatServiceV2
+
+
+class Items:
+    """Stands in for ChatServiceV2._batch_item, tracking how many threads run at once."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.order: list[str] = []
+
+    async def __call__(self, request: MessageRequest) -> BatchItemResult:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.order.append(request.message_id)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return BatchItemResult(thread_id=request.thread_id, message_id=request.message_id)
+
+
+def run_batch(monkeypatch: pytest.MonkeyPatch, threads: int, concurrency: int | None) -> Items:
+    settings = SimpleNamespace(CHAT_BATCH_CONCURRENCY=2)
+    monkeypatch.setattr(service_module, "get_settings", lambda: settings)
+    service = ChatServiceV2(graph=None)
+    items = Items()
+    monkeypatch.setattr(service, "_batch_item", items)
+    requests = [
+        MessageRequest(thread_id=f"t{n}", message_id=f"m{n}", phone="+51900", message="hola")
+        for n in range(threads)
+    ]
+    response = asyncio.run(service.process_batch(requests, concurrency))
+    assert [result.message_id for result in response.results] == [f"m{n}" for n in range(threads)]
+    return items
+
+
+def test_requested_concurrency_is_capped_by_the_setting(monkeypatch: pytest.MonkeyPatch):
+    assert run_batch(monkeypatch, threads=6, concurrency=100).max_running == 2
+
+
+def test_requested_concurrency_can_be_lower(monkeypatch: pytest.MonkeyPatch):
+    assert run_batch(monkeypatch, threads=6, concurrency=1).max_running == 1
+
+
+def test_concurrency_defaults_to_the_setting(monkeypatch: pytest.MonkeyPatch):
+    assert run_batch(monkeypatch, threads=6, concurrency=None).max_running == 2
@@ -0,0 +1,138 @@
+"""Checkpoint compaction: picking stale checkpoints and deleting them per backend."""
+
+import asyncio
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.shared.checkpoint.bounded import BoundedCheckpointer
+from app.shared.checkpoint.compaction import delete_checkpoints, select_stale
+
+THREAD = "t1"
+
+
+class OpaqueSaver(BaseCheckpointSaver):
+    """A saver compaction knows nothing about (reads and writes go to memory)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.inner = InMemorySaver()
+
+    async def aget_tuple(self, config):
+        return await self.inner.aget_tuple(config)
+
+    def alist(self, config, **kwargs):
+        return self.inner.alist(config, **kwargs)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self.inner.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await self.inner.aput_writes(config, writes, task_id, task_path)
+
+
+async def turn(saver, config: dict | None, steps: int) -> tuple[dict, list[str]]:
+    """Write one turn: an input checkpoint plus `steps` loop checkpoints on top of it."""
+    config = config or {"configurable": {"thread_id": THREAD, "checkpoint_ns": ""}}
+    ids = []
+    for step in range(steps + 1):
+        checkpoint = empty_checkpoint()
+        metadata = {"source": "loop" if step else "input", "step": step - 1}
+        config = await saver.aput(config, checkpoint, metadata, {})
+        await saver.aput_writes(config, [("messages", f"write {checkpoint['id']}")], "task")
+        ids.append(checkpoint["id"])
+    return config, ids
+
+
+async def history(saver) -> list:
+    config = {"configurable": {"thread_id": THREAD, "checkpoint_ns": ""}}
+    return [checkpoint_tuple async for checkpoint_tuple in saver.alist(config)]
+
+
+async def two_turns(saver) -> tuple[list[str], list[str]]:
+    config, first = await turn(saver, None, steps=2)
+    _, second = await turn(saver, config, steps=2)
+    return first, second
+
+
+def test_select_stale_keeps_turn_final_checkpoints():
+    async def scenario() -> tuple[list[str], list[str], list[str], list[str]]:
+        saver = InMemorySaver()
+        first, second = await two_turns(saver)
+        checkpoints = await history(saver)
+        return first, second, select_stale(checkpoints, keep=1), select_stale(checkpoints, keep=2)
+
+    first, second, keep_one, keep_two = asyncio.run(scenario())
+
+    # Every step before a turn's last checkpoint goes; keep=1 also drops turn one's end
+    assert sorted(keep_one) == sorted([*first, *second[:-1]])
+    assert sorted(keep_two) == sorted([*first[:-1], *second[:-1]])
+
+
+def test_select_stale_never_selects_the_newest_checkpoint():
+    async def scenario() -> tuple[list[str], list[str]]:
+        saver = InMemorySaver()
+        _, ids = await turn(saver, None, steps=3)
+        return ids, select_stale(await history(saver), keep=0)
+
+    ids, stale = asyncio.run(scenario())
+
+    assert sorted(stale) == sorted(ids[:-1])
+    assert select_stale([], keep=1) == []
+
+
+def test_delete_checkpoints_in_memory_drops_writes_and_unreferenced_blobs():
+    async def scenario() -> tuple[bool, list[str], list[str], set]:
+        saver = InMemorySaver()
+        first, second = await two_turns(saver)
+        stale = select_stale(await history(saver), keep=1)
+        deleted = await delete_checkpoints(saver, THREAD, stale)
+        remaining = [item.config["configurable"]["checkpoint_id"] for item in await history(saver)]
+        writes = {key[2] for key in saver.writes}
+        return deleted, second, remaining, writes
+
+    deleted, second, remaining, writes = asyncio.run(scenario())
+
+    assert deleted is True
+    assert remaining == [second[-1]]
+    assert writes == {second[-1]}
+
+
+def test_delete_checkpoints_sqlite_removes_checkpoints_and_writes(tmp_path):
+    async def scenario() -> tuple[bool, list[str], list[str], list[str]]:
+        async with AsyncSqliteSaver.from_conn_string(str(tmp_path / "cp.sqlite")) as saver:
+            await saver.setup()
+            first, second = await two_turns(saver)
+            deleted = await delete_checkpoints(saver, THREAD, [*first, *second[:-1]])
+            remaining = [
+                item.config["configurable"]["checkpoint_id"] for item in await history(saver)
+            ]
+            async with saver.conn.execute("SELECT DISTINCT checkpoint_id FROM writes") as cursor:
+                writes = [row[0] for row in await cursor.fetchall()]
+            return deleted, second, remaining, writes
+
+    deleted, second, remaining, writes = asyncio.run(scenario())
+
+    assert deleted is True
+    assert remaining == [second[-1]]
+    assert writes == [second[-1]]
+
+
+def test_unsupported_saver_is_reported_instead_of_compacted():
+    async def scenario() -> tuple[bool, int, dict, int]:
+        saver = OpaqueSaver()
+        first, second = await two_turns(saver)
+        unsupported = await delete_checkpoints(saver, THREAD, first)
+        checkpointer = BoundedCheckpointer(
+            saver, ttl_seconds=3600, max_threads=10, sweep_interval=60
+        )
+        compacted = await checkpointer.acompact(THREAD)
+        return unsupported, compacted, checkpointer.stats(), len(await history(saver))
+
+    unsupported, compacted, stats, remaining = asyncio.run(scenario())
+
+    assert unsupported is False
+    assert compacted == 0
+    assert stats["compaction_supported"] is False
+    assert remaining == 6
@@ -0,0 +1,255 @@
+"""History manager: turn splitting, pruning, folding into the summary and archive failures."""
+
+import asyncio
+import json
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from app.chat_v2.history import HistoryManager, split_history
+from app.chat_v2.pruning import DEFAULT_RULES, PRUNED_KEY
+from app.shared.llm import registry as registry_module
+from app.shared.llm.registry import ModelRegistry
+
+THREAD = "t1"
+CONFIG = {"configurable": {"thread_id": THREAD}}
+
+
+class State(TypedDict, total=False):
+    messages: Annotated[list[BaseMessage], add_messages]
+    summary: str
+
+
+class Summarizer:
+    """Stands in for the summary model; remembers the prompts it got."""
+
+    def __init__(self, reply: str = "Ana reportó bochornos."):
+        self.reply = reply
+        self.prompts: list[str] = []
+
+    async def ainvoke(self, prompt: str) -> AIMessage:
+        self.prompts.append(prompt)
+        return AIMessage(content=self.reply)
+
+
+class Archive:
+    """Stands in for ToolResultArchive; fails every put with `fail` set."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.archived: list[str] = []
+
+    async def put(self, thread_id: str, message: ToolMessage) -> None:
+        if self.fail:
+            raise ConnectionError("store unavailable")
+        self.archived.append(message.id)
+
+
+def turn(n: int) -> list[BaseMessage]:
+    """One patient turn with a get_followings lookup."""
+    call = {"name": "get_followings", "args": {}, "id": f"call-{n}", "type": "tool_call"}
+    result = json.dumps([{"id": f"f{n}-{i}", "summary": "bochornos " * 20} for i in range(5)])
+    return [
+        HumanMessage(content=f"mensaje {n}", id=f"h{n}"),
+        AIMessage(content="", id=f"c{n}", tool_calls=[call]),
+        ToolMessage(content=result, name="get_followings", tool_call_id=f"call-{n}", id=f"t{n}"),
+        AIMessage(content=f"respuesta {n}", id=f"a{n}"),
+    ]
+
+
+async def make_graph(messages: list[BaseMessage]):
+    graph = StateGraph(State)
+    graph.add_node("agent", lambda state: {})
+    graph.set_entry_point("agent")
+    graph.add_edge("agent", END)
+    compiled = graph.compile(checkpointer=InMemorySaver())
+    await compiled.aupdate_state(CONFIG, {"messages": messages}, as_node="agent")
+    return compiled
+
+
+def make_manager(summarizer: Summarizer, **overrides) -> HistoryManager:
+    options = {"keep_turns": 1, "token_budget": 100, "prune_rules": None}
+    manager = HistoryManager(**{**options, **overrides})
+    manager.summary_model = lambda: summarizer
+    return manager
+
+
+def ids(messages: list[BaseMessage]) -> list[str]:
+    return [message.id for message in messages]
+
+
+def test_split_history_cuts_at_patient_messages():
+    messages = [*turn(1), *turn(2), *turn(3)]
+
+    older, recent = split_history(messages, keep_turns=2)
+    assert ids(older) == ["h1", "c1", "t1", "a1"]
+    assert ids(recent) == ids(messages)[4:]
+
+    assert split_history(messages, keep_turns=3) == ([], messages)
+    assert split_history(messages, keep_turns=5) == ([], messages)
+    assert split_history(messages, keep_turns=0) == (messages, [])
+
+
+def test_split_history_folds_a_leading_reply_with_the_first_turn():
+    # The welcome message comes before any patient message
+    messages = [AIMessage(content="hola", id="a0"), *turn(1)]
+    assert split_history(messages, keep_turns=1) == ([], messages)
+
+    older, recent = split_history([*messages, *turn(2)], keep_turns=1)
+    assert ids(older) == ["a0", "h1", "c1", "t1", "a1"]
+    assert ids(recent) == ["h2", "c2", "t2", "a2"]
+
+
+def test_maintain_folds_older_turns_into_the_summary():
+    summarizer = Summarizer()
+
+    async def scenario() -> tuple[bool, dict, HistoryManager]:
+        manager = make_manager(summarizer)
+        graph = await make_graph([*turn(1), *turn(2)])
+        updated = await manager.maintain(graph, THREAD)
+        return updated, (await graph.aget_state(CONFIG)).values, manager
+
+    updated, values, manager = asyncio.run(scenario())
+
+    assert updated
+    assert ids(values["messages"]) == ["h2", "c2", "t2", "a2"]
+    assert values["summary"] == "Ana reportó bochornos."
+    assert "Paciente: mensaje 1" in summarizer.prompts[0]
+    assert "mensaje 2" not in summarizer.prompts[0]
+    stats = manager.stats()
+    assert (stats["summaries"], stats["folded_messages"]) == (1, 4)
+
+
+def test_maintain_under_budget_changes_nothing():
+    summarizer = Summarizer()
+
+    async def scenario() -> tuple[bool, dict]:
+        manager = make_manager(summarizer, token_budget=100_000)
+        graph = await make_graph([*turn(1), *turn(2)])
+        return await manager.maintain(graph, THREAD), (await graph.aget_state(CONFIG)).values
+
+    updated, values = asyncio.run(scenario())
+
+    assert not updated
+    assert len(values["messages"]) == 8
+    assert summarizer.prompts == []
+
+
+def test_empty_summary_keeps_the_history():
+    async def scenario() -> tuple[bool, dict]:
+        manager = make_manager(Summarizer(reply=""))
+        graph = await make_graph([*turn(1), *turn(2)])
+        return await manager.maintain(graph, THREAD), (await graph.aget_state(CONFIG)).values
+
+    updated, values = asyncio.run(scenario())
+
+    assert not updated
+    assert len(values["messages"]) == 8
+    assert "summary" not in values
+
+
+def test_folded_tool_results_are_archived_first():
+    archive = Archive()
+
+    async def scenario() -> dict:
+        manager = make_manager(Summarizer())
+        manager.archive = archive
+        graph = await make_graph([*turn(1), *turn(2)])
+        await manager.maintain(graph, THREAD)
+        return manager.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert archive.archived == ["t1"]
+    assert stats["archived_results"] == 1
+
+
+def test_archive_failure_postpones_folding_and_is_reported(capsys: pytest.CaptureFixture):
+    summarizer = Summarizer()
+
+    async def scenario() -> tuple[bool, dict, dict]:
+        manager = make_manager(summarizer)
+        manager.archive = Archive(fail=True)
+        graph = await make_graph([*turn(1), *turn(2)])
+        updated = await manager.maintain(graph, THREAD)
+        return updated, (await graph.aget_state(CONFIG)).values, manager.stats()
+
+    updated, values, stats = asyncio.run(scenario())
+
+    # The raw result would leave state unarchived: nothing is folded or summarized
+    assert not updated
+    assert len(values["messages"]) == 8
+    assert summarizer.prompts == []
+    assert (stats["archive_failures"], stats["folds_postponed"]) == (1, 1)
+    assert stats["failures"] == 0
+    assert "postponed" in capsys.readouterr().out
+
+
+def test_summary_model_comes_from_the_registry(monkeypatch: pytest.MonkeyPatch):
+    built = []
+
+    def build(model_name, fallback_models, temperature):
+        built.append((model_name, tuple(fallback_models), temperature))
+        return object()
+
+    monkeypatch.setattr(registry_module, "get_model_with_fallbacks", build)
+    registry = ModelRegistry()
+    monkeypatch.setattr("app.chat_v2.history.get_model_registry", lambda: registry)
+    manager = HistoryManager(keep_turns=1, token_budget=100)
+
+    assert manager.summary_model() is manager.summary_model()
+    assert len(built) == 1
+    stats = registry.stats()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+    assert stats["models"][0]["tools"] == 0
+
+
+def test_tool_results_are_not_pruned_while_under_budget():
+    async def scenario() -> tuple[bool, dict]:
+        manager = make_manager(Summarizer(), token_budget=1000, prune_rules=DEFAULT_RULES)
+        graph = await make_graph([*turn(1), *turn(2)])
+        return await manager.maintain(graph, THREAD), (await graph.aget_state(CONFIG)).values
+
+    updated, values = asyncio.run(scenario())
+
+    # Pruning would rewrite turn 1 and miss the prompt cache on every turn
+    assert not updated
+    assert not values["messages"][2].additional_kwargs.get(PRUNED_KEY)
+
+
+def test_over_budget_pass_prunes_first_and_folds_only_if_still_over():
+    summarizer = Summarizer()
+
+    async def scenario() -> tuple[bool, dict, dict]:
+        manager = make_manager(summarizer, token_budget=500, prune_rules=DEFAULT_RULES)
+        graph = await make_graph([*turn(1), *turn(2)])
+        updated = await manager.maintain(graph, THREAD)
+        return updated, (await graph.aget_state(CONFIG)).values, manager.stats()
+
+    updated, values, stats = asyncio.run(scenario())
+
+    assert updated
+    assert ids(values["messages"]) == ids([*turn(1), *turn(2)])
+    stub, latest = values["messages"][2], values["messages"][6]
+    assert stub.additional_kwargs[PRUNED_KEY]
+    assert stub.tool_call_id == "call-1"
+    assert not latest.additional_kwargs.get(PRUNED_KEY)
+    assert "summary" not in values
+    assert summarizer.prompts == []
+    assert (stats["pruned_results"], stats["summaries"]) == (1, 0)
+
+
+def test_without_summaries_tool_results_are_pruned_every_turn():
+    async def scenario() -> tuple[bool, dict]:
+        manager = make_manager(Summarizer(), token_budget=0, prune_rules=DEFAULT_RULES)
+        graph = await make_graph([*turn(1), *turn(2)])
+        return await manager.maintain(graph, THREAD), (await graph.aget_state(CONFIG)).values
+
+    updated, values = asyncio.run(scenario())
+
+    assert updated
+    assert values["messages"][2].additional_kwargs[PRUNED_KEY]
@@ -0,0 +1,166 @@
+"""Idempotency cache: replays, in-flight retries and cross-worker claims."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from app.chat_v2.schemas import MessageRequest
+from app.shared.concurrency import idempotency
+from app.shared.concurrency.idempotency import IdempotencyCache
+
+
+class Reply(BaseModel):
+    text: str
+
+
+class Compute:
+    """Counts how often the response is produced; each run takes `delay` seconds."""
+
+    def __init__(self, text: str = "hola", delay: float = 0.0, fail: bool = False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self) -> Reply:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return Reply(text=self.text)
+
+
+def make_cache(redis=None, **overrides) -> IdempotencyCache:
+    options = {"ttl_seconds": 60, "max_entries": 10, "wait_timeout": 1.0}
+    cache = IdempotencyCache(
+        redis_url="redis://fake" if redis else None, **{**options, **overrides}
+    )
+    cache._redis = redis
+    return cache
+
+
+def test_retry_in_flight_attaches_and_later_retry_replays():
+    async def scenario() -> tuple[list[Reply], Reply, Compute, dict]:
+        cache = make_cache()
+        compute = Compute(delay=0.02)
+        replies = await asyncio.gather(
+            cache.run("v2:m1", compute, Reply), cache.run("v2:m1", compute, Reply)
+        )
+        replay = await cache.run("v2:m1", compute, Reply)
+        return replies, replay, compute, cache.stats()
+
+    replies, replay, compute, stats = asyncio.run(scenario())
+
+    assert compute.calls == 1
+    assert replies == [Reply(text="hola"), Reply(text="hola")]
+    assert replay == Reply(text="hola")
+    assert (stats["misses"], stats["attached"], stats["hits"]) == (1, 1, 1)
+
+
+def test_failures_are_not_remembered():
+    async def scenario() -> Reply:
+        cache = make_cache()
+        with pytest.raises(RuntimeError):
+            await cache.run("v2:m1", Compute(fail=True), Reply)
+        return await cache.run("v2:m1", Compute(text="retry"), Reply)
+
+    assert asyncio.run(scenario()) == Reply(text="retry")
+
+
+def test_responses_expire_after_ttl(monkeypatch: pytest.MonkeyPatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+    async def scenario() -> Compute:
+        cache = make_cache(ttl_seconds=60)
+        compute = Compute()
+        await cache.run("v2:m1", compute, Reply)
+        now[0] += 59
+        await cache.run("v2:m1", compute, Reply)
+        now[0] += 1
+        await cache.run("v2:m1", compute, Reply)
+        return compute
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_zero_ttl_disables_the_cache():
+    async def scenario() -> Compute:
+        cache = make_cache(ttl_seconds=0)
+        compute = Compute()
+        await cache.run("v2:m1", compute, Reply)
+        await cache.run("v2:m1", compute, Reply)
+        return compute
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_retry_on_another_worker_waits_for_the_claim_holder(redis_server):
+    async def scenario() -> tuple[Reply, Reply, Compute, Compute, dict]:
+        first, second = make_cache(redis_server), make_cache(redis_server)
+        original, duplicate = Compute(text="original", delay=0.1), Compute(text="duplicate")
+        task = asyncio.create_task(first.run("v2:m1", original, Reply))
+        await asyncio.sleep(0.02)
+        replayed = await second.run("v2:m1", duplicate, Reply)
+        return await task, replayed, original, duplicate, second.stats()
+
+    reply, replayed, original, duplicate, stats = asyncio.run(scenario())
+
+    assert reply == replayed == Reply(text="original")
+    assert (original.calls, duplicate.calls) == (1, 0)
+    assert stats["hits"] == 1
+    # The claim is released and the response shared for the TTL
+    assert set(redis_server.data) == {"pausiva:idempotency:v2:m1"}
+
+
+def test_claim_is_renewed_while_the_turn_runs(redis_server):
+    async def scenario() -> tuple[float | None, Compute]:
+        first, second = make_cache(redis_server, wait_timeout=0.09), make_cache(redis_server)
+        duplicate = Compute(text="duplicate")
+        task = asyncio.create_task(first.run("v2:m1", Compute(delay=0.25), Reply))
+        # Well past the 90ms claim: only renewal keeps the key
+        await asyncio.sleep(0.15)
+        remaining = redis_server.ttl_ms("pausiva:idempotency:v2:m1:pending")
+        replayed = await second.run("v2:m1", duplicate, Reply)
+        await task
+        return remaining, replayed, duplicate
+
+    remaining, replayed, duplicate = asyncio.run(scenario())
+
+    assert remaining is not None and remaining > 0
+    assert replayed == Reply(text="hola")
+    assert duplicate.calls == 0
+
+
+def test_failed_turn_releases_its_claim(redis_server):
+    async def scenario() -> Reply:
+        first, second = make_cache(redis_server), make_cache(redis_server)
+        with pytest.raises(RuntimeError):
+            await first.run("v2:m1", Compute(fail=True), Reply)
+        return await second.run("v2:m1", Compute(text="retry"), Reply)
+
+    assert asyncio.run(scenario()) == Reply(text="retry")
+    assert "pausiva:idempotency:v2:m1:pending" not in redis_server.data
+
+
+def test_redis_outage_falls_back_to_this_worker(redis_server):
+    redis_server.fail = True
+
+    async def scenario() -> tuple[Reply, dict]:
+        cache = make_cache(redis_server)
+        return await cache.run("v2:m1", Compute(), Reply), cache.stats()
+
+    reply, stats = asyncio.run(scenario())
+
+    assert reply == Reply(text="hola")
+    assert stats["errors"] >= 1
+
+
+def test_generated_message_ids_are_not_client_ids():
+    generated = MessageRequest(thread_id="t1", phone="+51900", message="hola")
+    sent = MessageRequest(thread_id="t1", phone="+51900", message="hola", message_id="wamid.1")
+
+    assert not generated.has_client_message_id
+    assert sent.has_client_message_id
@@ -0,0 +1,165 @@
+"""Patient cache: TTL, LRU eviction, negative entries and reads racing writes."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.shared.database import cache as cache_module
+from app.shared.database.cache import PatientCache
+
+
+class Clock:
+    """Stands in for time.monotonic so tests can move time forward."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    # Only the module under test sees the fake clock (asyncio keeps the real one)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def patient(patient_id: str, phone: str, name: str = "Ana") -> dict:
+    return {"id": patient_id, "phone": phone, "name": name}
+
+
+def test_lookup_by_id_and_phone_hits_the_same_entry(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.set(patient("p1", "+51900"))
+
+    assert cache.get_by_id("p1") == patient("p1", "+51900")
+    assert cache.get_by_phone("+51900") == patient("p1", "+51900")
+    cache.invalidate(patient_id="p1")
+    assert cache.get_by_phone("+51900") is None
+
+
+def test_records_are_copied(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    record = patient("p1", "+51900")
+    cache.set(record)
+    record["name"] = "changed"
+    cache.get_by_id("p1")["name"] = "changed"
+
+    assert cache.get_by_id("p1")["name"] == "Ana"
+
+
+def test_entries_expire_after_ttl(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.set(patient("p1", "+51900"))
+
+    clock.now += 59
+    assert cache.get_by_id("p1") is not None
+    clock.now += 1
+    assert cache.get_by_id("p1") is None
+    assert cache.get_by_phone("+51900") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock: Clock):
+    cache = PatientCache(max_entries=2, ttl_seconds=60)
+    cache.set(patient("p1", "+51901"))
+    cache.set(patient("p2", "+51902"))
+    cache.get_by_id("p1")
+    cache.set(patient("p3", "+51903"))
+
+    assert cache.get_by_id("p2") is None
+    assert cache.get_by_phone("+51902") is None
+    assert cache.get_by_id("p1") is not None
+    assert cache.get_by_id("p3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_phone_change_drops_the_old_mapping(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.set(patient("p1", "+51900"))
+    cache.set(patient("p1", "+51999"))
+
+    assert cache.get_by_phone("+51900") is None
+    assert cache.get_by_phone("+51999")["id"] == "p1"
+
+
+def test_negative_entries_expire_and_are_cleared_by_set(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=30)
+    cache.set_missing("+51900")
+    assert cache.is_missing("+51900")
+
+    clock.now += 30
+    assert not cache.is_missing("+51900")
+
+    cache.set_missing("+51900")
+    cache.set(patient("p1", "+51900"))
+    assert not cache.is_missing("+51900")
+
+
+def test_negative_cache_disabled_without_ttl(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    cache.set_missing("+51900")
+
+    assert not cache.is_missing("+51900")
+
+
+def test_read_overlapping_an_invalidation_is_not_cached(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    read_at = cache.generation
+    # A write lands while the read is in flight
+    cache.invalidate(patient_id="p1")
+    cache.set(patient("p1", "+51900", name="Old"), read_at=read_at)
+
+    assert cache.get_by_id("p1") is None
+    assert cache.stats()["stale_reads"] == 1
+
+
+def test_read_overlapping_a_write_through_keeps_the_newer_record(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    read_at = cache.generation
+    cache.set(patient("p1", "+51900", name="New"))
+    cache.set(patient("p1", "+51900", name="Old"), read_at=read_at)
+
+    assert cache.get_by_id("p1")["name"] == "New"
+
+
+def test_read_of_another_patient_is_cached(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    read_at = cache.generation
+    cache.invalidate(patient_id="p2")
+    cache.set(patient("p1", "+51900"), read_at=read_at)
+
+    assert cache.get_by_id("p1") is not None
+
+
+def test_missing_phone_read_overlapping_a_phone_invalidation_is_not_cached(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=30)
+    read_at = cache.generation
+    # The gateway created the patient while the lookup was running
+    cache.invalidate(phone="+51900")
+    cache.set_missing("+51900", read_at=read_at)
+
+    assert not cache.is_missing("+51900")
+
+
+def test_reads_older_than_evicted_changes_are_dropped(clock: Clock):
+    cache = PatientCache(max_entries=2, ttl_seconds=60)
+    read_at = cache.generation
+    cache.invalidate(patient_id="p1")
+    # Push p1's change out of the bounded change log
+    cache.invalidate(patient_id="p2")
+    cache.invalidate(patient_id="p3")
+    cache.set(patient("p1", "+51900"), read_at=read_at)
+
+    assert cache.get_by_id("p1") is None
+
+
+def test_clear_drops_reads_in_flight(clock: Clock):
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    read_at = cache.generation
+    cache.clear()
+    cache.set(patient("p1", "+51900"), read_at=read_at)
+
+    assert cache.get_by_id("p1") is None
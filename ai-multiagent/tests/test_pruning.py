@@ -0,0 +1,92 @@
+"""Tool result pruning rules: stubs, truncation and already-pruned results."""
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.chat_v2.pruning import (
+    DEFAULT_RULE,
+    DEFAULT_RULES,
+    PRUNED_KEY,
+    parse_rules,
+    prunable,
+    prune_message,
+)
+
+
+def result(name: str, content: str, n: int = 1) -> ToolMessage:
+    return ToolMessage(
+        content=content, name=name, tool_call_id=f"call-{n}", id=f"t{n}", status="success"
+    )
+
+
+def test_parse_rules_overrides_the_defaults():
+    rules = parse_rules({"get_followings": "keep", "assess_symptoms": "120", "new_tool": "stub"})
+
+    assert rules["get_followings"] == "keep"
+    assert rules["assess_symptoms"] == 120
+    assert rules["new_tool"] == "stub"
+    assert rules["schedule_meeting"] == DEFAULT_RULES["schedule_meeting"]
+    assert parse_rules({}) == DEFAULT_RULES
+
+
+@pytest.mark.parametrize("rule", ["drop", "-5", "1.5", ""])
+def test_parse_rules_rejects_unknown_rules(rule: str):
+    with pytest.raises(ValueError, match="get_followings"):
+        parse_rules({"get_followings": rule})
+
+
+def test_stub_describes_the_payload_and_keeps_the_ids():
+    original = result("get_followings", json.dumps([{"id": i, "note": "x" * 50} for i in range(4)]))
+
+    stub = prune_message(original, "stub")
+
+    assert "get_followings" in stub.text and "4 elementos" in stub.text
+    assert (stub.id, stub.tool_call_id, stub.name, stub.status) == (
+        "t1",
+        "call-1",
+        "get_followings",
+        "success",
+    )
+    assert stub.additional_kwargs[PRUNED_KEY]
+
+
+def test_stub_of_an_object_lists_its_fields():
+    original = result("get_patient_by_phone", json.dumps({"id": "p1", "name": "Ana" * 100}))
+
+    assert "campos: id, name" in prune_message(original, "stub").text
+
+
+def test_truncate_keeps_the_start_and_the_original_length():
+    original = result("get_appointment_info", "a" * 1000)
+
+    truncated = prune_message(original, 100)
+
+    assert truncated.text.startswith("a" * 100)
+    assert "1000 caracteres" in truncated.text
+    assert len(truncated.text) < 1000
+
+
+def test_keep_leaves_the_result():
+    assert prune_message(result("schedule_meeting", "x" * 5000), "keep") is None
+
+
+def test_no_replacement_when_it_would_not_be_shorter():
+    assert prune_message(result("get_followings", "[]"), "stub") is None
+    assert prune_message(result("get_appointment_info", "a" * 100), 100) is None
+
+
+def test_prunable_skips_other_messages_and_already_pruned_results():
+    big = json.dumps([{"id": i, "note": "x" * 50} for i in range(20)])
+    fresh = result("get_followings", big, n=1)
+    already = prune_message(result("get_followings", big, n=2), "stub")
+    unknown = result("some_new_tool", "y" * (DEFAULT_RULE + 500), n=3)
+    messages = [HumanMessage(content="hola"), AIMessage(content="..."), fresh, already, unknown]
+
+    pairs = prunable(messages, DEFAULT_RULES)
+
+    assert [original.id for original, _ in pairs] == ["t1", "t3"]
+    assert prunable([already], DEFAULT_RULES) == []
+    # Tools without a rule are truncated to DEFAULT_RULE characters
+    assert pairs[1][1].text.startswith("y" * DEFAULT_RULE)
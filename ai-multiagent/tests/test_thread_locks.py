@@ -0,0 +1,119 @@
+"""Thread locks: per-thread serialization in process and across workers."""
+
+import asyncio
+
+import pytest
+
+from app.shared.concurrency.thread_lock import ThreadBusyError, ThreadLocks
+
+
+def make_locks(redis=None, **overrides) -> ThreadLocks:
+    options = {"ttl": 1.0, "timeout": 1.0}
+    locks = ThreadLocks(redis_url="redis://fake" if redis else None, **{**options, **overrides})
+    locks._redis = redis
+    return locks
+
+
+class Turns:
+    """Records turn start/end order; each turn holds the lock for `delay` seconds."""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.log: list[str] = []
+
+    async def run(self, locks: ThreadLocks, thread_id: str, name: str) -> None:
+        async with locks.hold(thread_id):
+            self.log.append(f"start {name}")
+            await asyncio.sleep(self.delay)
+            self.log.append(f"end {name}")
+
+
+def test_turns_of_one_thread_never_overlap():
+    async def scenario() -> tuple[list[str], dict]:
+        locks, turns = make_locks(), Turns()
+        await asyncio.gather(turns.run(locks, "t1", "a"), turns.run(locks, "t1", "b"))
+        return turns.log, locks.stats()
+
+    log, stats = asyncio.run(scenario())
+
+    assert log == ["start a", "end a", "start b", "end b"]
+    assert stats["contended"] == 1
+    assert stats["held"] == 0
+
+
+def test_threads_do_not_block_each_other():
+    async def scenario() -> list[str]:
+        locks, turns = make_locks(), Turns()
+        await asyncio.gather(turns.run(locks, "t1", "a"), turns.run(locks, "t2", "b"))
+        return turns.log
+
+    assert asyncio.run(scenario())[:2] == ["start a", "start b"]
+
+
+def test_waiting_past_the_timeout_raises_busy():
+    async def scenario() -> tuple[dict, int]:
+        locks, turns = make_locks(timeout=0.02), Turns(delay=0.1)
+        holder = asyncio.create_task(turns.run(locks, "t1", "a"))
+        await asyncio.sleep(0)
+        with pytest.raises(ThreadBusyError):
+            await turns.run(locks, "t1", "b")
+        await holder
+        return locks.stats(), len(locks._locals)
+
+    stats, local_locks = asyncio.run(scenario())
+
+    assert stats["timeouts"] == 1
+    assert local_locks == 0
+
+
+def test_workers_sharing_redis_take_turns(redis_server):
+    async def scenario() -> list[str]:
+        first, second, turns = make_locks(redis_server), make_locks(redis_server), Turns()
+        await asyncio.gather(turns.run(first, "t1", "a"), turns.run(second, "t1", "b"))
+        return turns.log
+
+    assert asyncio.run(scenario()) == ["start a", "end a", "start b", "end b"]
+    assert redis_server.data == {}
+
+
+def test_lock_held_on_another_worker_raises_busy(redis_server):
+    async def scenario() -> dict:
+        first, second = make_locks(redis_server), make_locks(redis_server, timeout=0.05)
+        holder = asyncio.create_task(Turns(delay=0.2).run(first, "t1", "a"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ThreadBusyError, match="another worker"):
+            await Turns().run(second, "t1", "b")
+        await holder
+        return second.stats()
+
+    assert asyncio.run(scenario())["timeouts"] == 1
+
+
+def test_lock_is_renewed_while_the_turn_runs(redis_server):
+    async def scenario() -> float | None:
+        locks = make_locks(redis_server, ttl=0.09)
+        holder = asyncio.create_task(Turns(delay=0.25).run(locks, "t1", "a"))
+        # Well past the 90ms TTL: only renewal keeps the key
+        await asyncio.sleep(0.15)
+        remaining = redis_server.ttl_ms("pausiva:thread-lock:t1")
+        await holder
+        return remaining
+
+    remaining = asyncio.run(scenario())
+
+    assert remaining is not None and remaining > 0
+    assert redis_server.data == {}
+
+
+def test_redis_outage_runs_the_turn_with_the_local_lock_only(redis_server):
+    redis_server.fail = True
+
+    async def scenario() -> tuple[list[str], dict]:
+        locks, turns = make_locks(redis_server), Turns()
+        await turns.run(locks, "t1", "a")
+        return turns.log, locks.stats()
+
+    log, stats = asyncio.run(scenario())
+
+    assert log == ["start a", "end a"]
+    assert stats["errors"] == 1
@@ -0,0 +1,133 @@
+"""Turn coalescer: merging message bursts and serializing turns per thread."""
+
+import asyncio
+
+import pytest
+
+from app.shared.concurrency.coalesce import QueuedMessage, TurnCoalescer
+
+
+class Runner:
+    """Records the batches it runs; each turn takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches: list[list[str]] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, messages: list[QueuedMessage]) -> str:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            self.batches.append([message.message_id for message in messages])
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("model unavailable")
+            return f"reply to {messages[-1].message_id}"
+        finally:
+            self.running -= 1
+
+
+async def send(coalescer: TurnCoalescer, thread_id: str, message_id: str, run: Runner):
+    return await coalescer.submit(thread_id, QueuedMessage(message_id, message_id), run)
+
+
+def test_burst_runs_as_one_turn_with_the_latest_reply():
+    async def scenario() -> tuple[list, Runner, dict]:
+        coalescer = TurnCoalescer(window=0.05, max_wait=1.0, max_messages=10)
+        run = Runner()
+        first = asyncio.create_task(send(coalescer, "t1", "m1", run))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(send(coalescer, "t1", "m2", run))
+        results = await asyncio.gather(first, second)
+        return results, run, coalescer.stats()
+
+    results, run, stats = asyncio.run(scenario())
+
+    assert run.batches == [["m1", "m2"]]
+    for result, batch in results:
+        assert result == "reply to m2"
+        assert [message.message_id for message in batch] == ["m1", "m2"]
+    assert stats["turns"] == 1
+    assert stats["merged"] == 1
+    assert stats["active_threads"] == 0
+
+
+def test_full_batch_closes_and_the_next_message_waits_for_its_turn():
+    async def scenario() -> Runner:
+        coalescer = TurnCoalescer(window=0.05, max_wait=1.0, max_messages=2)
+        run = Runner(delay=0.02)
+        await asyncio.gather(*(send(coalescer, "t1", f"m{n}", run) for n in range(1, 4)))
+        return run
+
+    run = asyncio.run(scenario())
+
+    assert run.batches == [["m1", "m2"], ["m3"]]
+    assert run.max_running == 1
+
+
+def test_zero_window_serializes_without_merging():
+    async def scenario() -> Runner:
+        coalescer = TurnCoalescer(window=0.0, max_wait=0.0, max_messages=10)
+        run = Runner(delay=0.02)
+        first = asyncio.create_task(send(coalescer, "t1", "m1", run))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, send(coalescer, "t1", "m2", run))
+        return run
+
+    run = asyncio.run(scenario())
+
+    assert run.batches == [["m1"], ["m2"]]
+    assert run.max_running == 1
+
+
+def test_threads_run_independently():
+    async def scenario() -> Runner:
+        coalescer = TurnCoalescer(window=0.0, max_wait=0.0, max_messages=10)
+        run = Runner(delay=0.02)
+        await asyncio.gather(send(coalescer, "t1", "m1", run), send(coalescer, "t2", "m2", run))
+        return run
+
+    run = asyncio.run(scenario())
+
+    assert sorted(run.batches) == [["m1"], ["m2"]]
+    assert run.max_running == 2
+
+
+def test_a_failed_turn_fails_every_submitter_and_the_thread_recovers():
+    async def scenario() -> tuple[list, str]:
+        coalescer = TurnCoalescer(window=0.05, max_wait=1.0, max_messages=10)
+        failing = Runner(fail=True)
+        results = await asyncio.gather(
+            send(coalescer, "t1", "m1", failing),
+            send(coalescer, "t1", "m2", failing),
+            return_exceptions=True,
+        )
+        result, _ = await send(coalescer, "t1", "m3", Runner())
+        return results, result
+
+    results, result = asyncio.run(scenario())
+
+    assert all(isinstance(error, RuntimeError) for error in results)
+    assert result == "reply to m3"
+
+
+def test_a_cancelled_submitter_does_not_cancel_the_turn():
+    async def scenario() -> tuple[str, Runner]:
+        coalescer = TurnCoalescer(window=0.02, max_wait=1.0, max_messages=10)
+        run = Runner(delay=0.02)
+        first = asyncio.create_task(send(coalescer, "t1", "m1", run))
+        second = asyncio.create_task(send(coalescer, "t1", "m2", run))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result, _ = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return result, run
+
+    result, run = asyncio.run(scenario())
+
+    assert result == "reply to m2"
+    assert run.batches == [["m1", "m2"]]
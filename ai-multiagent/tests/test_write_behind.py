@@ -0,0 +1,130 @@
+"""Write-behind queue: flush semantics and isolation of rejected rows."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from postgrest import AsyncPostgrestClient
+
+from app.shared.database import write_behind
+from app.shared.database.write_behind import WriteBehindQueue
+
+
+class FakePostgrest:
+    """
+    Minimal PostgREST: upserts rows into memory and answers selects.
+
+    Rows with "bad" set are rejected like a NOT NULL violation (400, 23502),
+    failing the whole request as Postgres does.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.tables: dict[str, dict[str, dict]] = {}
+        self.inserts: list[int] = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        table = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "GET":
+            return httpx.Response(200, json=list(self.tables.get(table, {}).values()))
+
+        await asyncio.sleep(self.delay)
+        payload = json.loads(request.content)
+        rows = payload if isinstance(payload, list) else [payload]
+        self.inserts.append(len(rows))
+        if any(row.get("bad") for row in rows):
+            error = {
+                "code": "23502",
+                "message": 'null value in column "patient_id" violates not-null constraint',
+                "details": None,
+                "hint": None,
+            }
+            return httpx.Response(400, json=error)
+        for row in rows:
+            self.tables.setdefault(table, {})[row["id"]] = row
+        return httpx.Response(201)
+
+    def client(self) -> AsyncPostgrestClient:
+        http_client = httpx.AsyncClient(
+            base_url="http://postgrest", transport=httpx.MockTransport(self.handle)
+        )
+        return AsyncPostgrestClient("http://postgrest", http_client=http_client)
+
+
+@pytest.fixture
+def postgrest(monkeypatch: pytest.MonkeyPatch) -> FakePostgrest:
+    server = FakePostgrest(delay=0.05)
+    client = server.client()
+
+    async def get_client() -> AsyncPostgrestClient:
+        return client
+
+    monkeypatch.setattr(write_behind, "get_async_supabase_client", get_client)
+    return server
+
+
+def make_queue(**overrides) -> WriteBehindQueue:
+    options = {
+        "flush_interval": 0.2,
+        "max_batch_size": 50,
+        "max_retries": 2,
+        "retry_backoff": 0.01,
+        "max_pending": 100,
+    }
+    return WriteBehindQueue(**{**options, **overrides})
+
+
+def test_flush_writes_rows_the_worker_is_collecting(postgrest: FakePostgrest):
+    async def scenario() -> list[dict]:
+        queue = make_queue()
+        queue.enqueue("followings", {"id": "f1"})
+        # Let the worker dequeue f1 and start waiting for more rows
+        await asyncio.sleep(0.01)
+        queue.enqueue("followings", {"id": "f2"})
+        await queue.flush()
+        response = await postgrest.client().table("followings").select("*").execute()
+        await queue.stop()
+        return response.data
+
+    rows = asyncio.run(scenario())
+
+    assert sorted(row["id"] for row in rows) == ["f1", "f2"]
+
+
+def test_flush_waits_for_the_batch_being_written(postgrest: FakePostgrest):
+    async def scenario() -> tuple[list[dict], dict]:
+        queue = make_queue(flush_interval=0.0)
+        queue.enqueue("followings", {"id": "f1"})
+        # The worker writes f1 right away; the request takes 50ms
+        await asyncio.sleep(0.01)
+        assert queue.pending == 0
+        await queue.flush()
+        response = await postgrest.client().table("followings").select("*").execute()
+        stats = queue.stats()
+        await queue.stop()
+        return response.data, stats
+
+    rows, stats = asyncio.run(scenario())
+
+    assert [row["id"] for row in rows] == ["f1"]
+    assert stats["written"] == 1
+
+
+def test_rejected_batch_only_drops_the_bad_row(postgrest: FakePostgrest):
+    async def scenario() -> dict:
+        queue = make_queue()
+        queue.enqueue("followings", {"id": "f1"})
+        queue.enqueue("followings", {"id": "f2", "bad": True})
+        queue.enqueue("followings", {"id": "f3"})
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert sorted(postgrest.tables["followings"]) == ["f1", "f3"]
+    assert stats["written"] == 2
+    assert stats["dropped"] == 1
+    # One rejected batch, then one insert per row, no retries
+    assert postgrest.inserts == [3, 1, 1, 1]
+    assert stats["retries"] == 0
@@ -0,0 +1,57 @@
+-- Atomic booking for the WhatsApp agent (ai-multiagent schedule_meeting tool)
+-- Creates the appointment and its "business" following in a single transaction
+-- and returns both rows, so a failure in between can't leave orphans.
+
+begin;
+
+create or replace function public.book_appointment(
+  p_patient_id uuid,
+  p_doctor_id uuid,
+  p_scheduled_at timestamptz,
+  p_type appointment_type default 'consulta',
+  p_notes text default null,
+  p_conversation_id uuid default null,
+  p_following_summary text default null
+)
+returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_appointment public.appointments;
+  v_following public.followings;
+begin
+  insert into public.appointments (
+    patient_id, doctor_id, type, status, scheduled_at, notes, conversation_id
+  )
+  values (
+    p_patient_id, p_doctor_id, p_type, 'scheduled', p_scheduled_at, p_notes, p_conversation_id
+  )
+  returning * into v_appointment;
+
+  insert into public.followings (
+    patient_id, appointment_id, type, channel, contacted_at, message_count,
+    summary, is_urgent, conversation_id
+  )
+  values (
+    p_patient_id, v_appointment.id, 'business', 'whatsapp', now(), 1,
+    p_following_summary, false, p_conversation_id
+  )
+  returning * into v_following;
+
+  return jsonb_build_object(
+    'appointment', to_jsonb(v_appointment),
+    'following', to_jsonb(v_following)
+  );
+end;
+$$;
+
+revoke execute on function public.book_appointment(
+  uuid, uuid, timestamptz, appointment_type, text, uuid, text
+) from public, anon, authenticated;
+
+grant execute on function public.book_appointment(
+  uuid, uuid, timestamptz, appointment_type, text, uuid, text
+) to service_role;
+
+commit;
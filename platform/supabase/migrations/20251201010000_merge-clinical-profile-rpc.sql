@@ -0,0 +1,29 @@
+-- Server-side merge of patients.clinical_profile_json for the WhatsApp agent
+-- (ai-multiagent update_onboarding_state / update_patient_info tools).
+-- Top-level keys of the patch replace existing ones (jsonb ||) in a single
+-- UPDATE, so concurrent updates to different keys can't overwrite each other.
+-- Returns the updated row so callers can embed users(*) through PostgREST.
+
+begin;
+
+create or replace function public.merge_clinical_profile(
+  p_patient_id uuid,
+  p_patch jsonb
+)
+returns setof public.patients
+language sql
+set search_path = public
+as $$
+  update public.patients
+  set clinical_profile_json = coalesce(clinical_profile_json, '{}'::jsonb)
+    || coalesce(p_patch, '{}'::jsonb)
+  where id = p_patient_id
+  returning *;
+$$;
+
+revoke execute on function public.merge_clinical_profile(uuid, jsonb)
+  from public, anon, authenticated;
+
+grant execute on function public.merge_clinical_profile(uuid, jsonb) to service_role;
+
+commit;
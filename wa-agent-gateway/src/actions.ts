@@ -25,7 +25,7 @@ type ActionType = "chat" | "process_data" | "query_data";
  * Start a new conversation thread using V2 single agent
  * This handles the onboarding flow for new patients
  */
-export async function startThread(chatId: string): Promise<string> {
+export async function startThread(chatId: string, messageId?: string): Promise<string> {
   if (!isFastAPIConfigured()) {
     throw new Error("FASTAPI_URL environment variable is not set");
   }
@@ -52,6 +52,7 @@ export async function startThread(chatId: string): Promise<string> {
   // Use V2 endpoint with is_new_conversation flag for natural greeting
   const response = await sendMessageV2({
     thread_id: threadId,
+    message_id: messageId, // WhatsApp id of the greeting, so a redelivery isn't answered twice
     phone: chatId,
     message: "hola", // Natural greeting to trigger welcome message
     user_id: userId,
@@ -248,9 +249,10 @@ export async function runAndStreamBatched({
       is_new_conversation: false,
     });
   } else {
-    // Single message - use regular endpoint
+    // Single message - use regular endpoint (WhatsApp id makes redeliveries idempotent)
     response = await sendMessageV2({
       thread_id: threadId,
+      message_id: messages[0].id,
       phone: chatId,
       message: combinedUserInput,
       user_id: effectiveUserId,
@@ -140,7 +140,7 @@ async function handleMessage(message: WhatsAppMessage): Promise<void> {
     console.log(`👋 Greeting detected: "${content}" - forcing new conversation`);
     await whatsappClient.markAsRead(messageId, true);
     await forceNewConversation(chatId);
-    await startThread(chatId);
+    await startThread(chatId, messageId);
     return;
   }
 
@@ -254,7 +254,7 @@ async function handleTextMessageBatched(
   // Start new conversation for truly new conversations (no previous history)
   if (isNew) {
     console.log(`🆕 New conversation for ${chatId} - starting thread`);
-    await startThread(chatId);
+    await startThread(chatId, messages[messages.length - 1].id);
     return;
   }
 